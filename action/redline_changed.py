@@ -13,15 +13,23 @@ $GITHUB_OUTPUT and $GITHUB_STEP_SUMMARY.
 
 from __future__ import annotations
 
+import hashlib
+import importlib.metadata
+import inspect
+import io
 import json
 import os
 import re
 import shutil
 import subprocess
 import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import BinaryIO, Dict, List, Optional, Tuple, Union
 
 ZERO_SHA = re.compile(r'^0+$')
 REVISION_COUNT = re.compile(r'(?:Revisions found:|Redline complete:)\s*(\d+)')
@@ -48,6 +56,11 @@ class Change:
     redline: Optional[str] = None
     html: Optional[str] = None
     error: Optional[str] = None
+    skipped: Optional[str] = None        # why it was not redlined: 'time budget' | 'max-files'
+
+    @classmethod
+    def from_dict(cls, record: Dict) -> 'Change':
+        return cls(**{name: record.get(name) for name in cls.__dataclass_fields__})
 
     def to_dict(self) -> Dict:
         return {
@@ -58,6 +71,7 @@ class Change:
             'redline': self.redline,
             'html': self.html,
             'error': self.error,
+            'skipped': self.skipped,
         }
 
 
@@ -75,6 +89,13 @@ class Inputs:
     output_dir: str = 'redlines'
     html_preview: str = 'auto'
     write_summary: bool = True
+    parallelism: int = 1
+    cache_dir: str = ''
+    shard_index: int = 0
+    shard_count: int = 1
+    merge: bool = False
+    max_files: int = 0                 # 0: no cap
+    time_budget: Optional[float] = None  # minutes
     raw: Dict[str, str] = field(default_factory=dict)
 
     @classmethod
@@ -88,6 +109,27 @@ class Inputs:
                 raise ConfigError(f"Input '{name}' must be 'true' or 'false', got '{value}'")
             return value == 'true'
 
+        def get_count(name: str, default: int, minimum: int = 1) -> int:
+            value = get(name)
+            if not value:
+                return default
+            if not value.isdigit() or int(value) < minimum:
+                kind = 'a positive' if minimum else 'a non-negative'
+                raise ConfigError(f"Input '{name}' must be {kind} integer, got '{value}'")
+            return int(value)
+
+        def get_minutes(name: str) -> Optional[float]:
+            value = get(name)
+            if not value:
+                return None
+            try:
+                minutes = float(value)
+            except ValueError:
+                minutes = 0
+            if not minutes > 0:
+                raise ConfigError(f"Input '{name}' must be a positive number of minutes, got '{value}'")
+            return minutes
+
         inputs = cls(
             original=get('original'),
             modified=get('modified'),
@@ -101,6 +143,13 @@ class Inputs:
             output_dir=get('output-dir') or 'redlines',
             html_preview=(get('html-preview') or 'auto').lower(),
             write_summary=get_bool('summary', True),
+            parallelism=get_count('parallelism', os.cpu_count() or 1),
+            cache_dir=get('cache-dir'),
+            shard_index=get_count('shard-index', 0, minimum=0),
+            shard_count=get_count('shard-count', 1),
+            merge=get_bool('merge', False),
+            max_files=get_count('max-files', 0, minimum=0),
+            time_budget=get_minutes('time-budget'),
         )
         inputs.raw = {k: v for k, v in env.items() if k.startswith('INPUT_')}
         inputs.validate()
@@ -116,6 +165,13 @@ class Inputs:
             raise ConfigError(
                 "Inputs 'original' and 'modified' must be provided together "
                 "(explicit-pair mode) or both left empty (auto-detect mode).")
+        if self.shard_index >= self.shard_count:
+            raise ConfigError(
+                f"Input 'shard-index' must be below 'shard-count' ({self.shard_count}), "
+                f"got {self.shard_index}")
+        if self.original and (self.shard_count > 1 or self.merge):
+            raise ConfigError(
+                "Sharding and 'merge' apply to auto-detect mode, not to an explicit pair.")
         if self.engine != 'docxodus':
             if self.comparison:
                 raise ConfigError(
@@ -251,6 +307,195 @@ def read_blob(commit: str, path: str, cwd: Optional[str] = None) -> bytes:
     return run_git(['cat-file', 'blob', f'{commit}:{path}'], cwd=cwd, binary=True)
 
 
+class BlobReader:
+    """Reads blobs through one long-lived `git cat-file --batch` process instead
+    of a git process per blob, streaming each to a file. Threads may share one
+    reader; their requests take turns. Use as a context manager."""
+
+    CHUNK = 1024 * 1024
+
+    def __init__(self, cwd: Optional[str] = None):
+        self.cwd = cwd
+        self._process = subprocess.Popen(
+            ['git', 'cat-file', '--batch'], cwd=cwd,
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        self._check: Optional[subprocess.Popen] = None  # --batch-check, started when first needed
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'BlobReader':
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        for process in (self._process, self._check):
+            if process is not None:
+                process.stdin.close()
+                process.stdout.close()
+                process.wait()
+
+    def blob_info(self, commit: str, path: str) -> Tuple[str, int]:
+        """The object id and size of the blob at commit:path, without reading it."""
+        if '\n' in path:
+            object_id = run_git(['rev-parse', f'{commit}:{path}'], cwd=self.cwd).strip()
+            return object_id, int(run_git(['cat-file', '-s', object_id], cwd=self.cwd))
+        with self._lock:
+            if self._check is None:
+                self._check = subprocess.Popen(
+                    ['git', 'cat-file', '--batch-check'], cwd=self.cwd,
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+            self._check.stdin.write(f'{commit}:{path}\n'.encode('utf-8'))
+            self._check.stdin.flush()
+            header = self._check.stdout.readline().split()
+        if len(header) != 3 or header[1] != b'blob':
+            raise subprocess.CalledProcessError(
+                128, ['git', 'cat-file', '--batch-check'],
+                stderr=f'{commit}:{path} is not a blob: {b" ".join(header).decode("utf-8", "replace")}')
+        return header[0].decode('ascii'), int(header[2])
+
+    def write_blob(self, commit: str, path: str, target: Path) -> str:
+        """Write the blob at commit:path to target and return its object id."""
+        with open(target, 'wb') as handle:
+            return self._copy_blob(commit, path, handle)
+
+    def read(self, commit: str, path: str) -> bytes:
+        """The content of the blob at commit:path; for small blobs."""
+        buffer = io.BytesIO()
+        self._copy_blob(commit, path, buffer)
+        return buffer.getvalue()
+
+    def _copy_blob(self, commit: str, path: str, handle: BinaryIO) -> str:
+        if '\n' in path:  # --batch reads one object name per line
+            handle.write(read_blob(commit, path, cwd=self.cwd))
+            return run_git(['rev-parse', f'{commit}:{path}'], cwd=self.cwd).strip()
+
+        with self._lock:
+            self._process.stdin.write(f'{commit}:{path}\n'.encode('utf-8'))
+            self._process.stdin.flush()
+            header = self._process.stdout.readline().split()
+            if len(header) != 3 or header[1] != b'blob':
+                raise subprocess.CalledProcessError(
+                    128, ['git', 'cat-file', '--batch'],
+                    stderr=f'{commit}:{path} is not a blob: {b" ".join(header).decode("utf-8", "replace")}')
+            remaining = int(header[2])
+            while remaining:
+                chunk = self._process.stdout.read(min(remaining, self.CHUNK))
+                if not chunk:
+                    raise subprocess.CalledProcessError(
+                        128, ['git', 'cat-file', '--batch'], stderr='git exited mid-blob')
+                handle.write(chunk)
+                remaining -= len(chunk)
+            self._process.stdout.read(1)  # the newline after each blob
+        return header[0].decode('ascii')
+
+
+# --------------------------------------------------------------------------
+# Git LFS
+# --------------------------------------------------------------------------
+
+# Pointer files are small text files; the spec caps them below 1024 bytes.
+LFS_POINTER_MAX_SIZE = 1024
+LFS_POINTER = re.compile(
+    rb'\Aversion https://git-lfs\.github\.com/spec/v1\n(?:.*\n)*?oid sha256:([0-9a-f]{64})\nsize (\d+)\n')
+# Paths per `git lfs fetch --include`, to keep command lines short.
+LFS_FETCH_BATCH = 100
+# What a path needs before it can go in --include, a comma-separated list of
+# gitignore-style patterns. Glob characters are matched literally in brackets.
+# git-lfs cannot escape a comma, so a comma, backslash, leading '!' (negation)
+# or edge whitespace (trimmed) becomes '?', which also matches it; anything
+# else that pattern fetches is merely downloaded too.
+LFS_GLOB_CHARACTER = re.compile(r'[*?\[]')
+LFS_UNESCAPABLE = re.compile(r'[,\\]|^[!\s]|\s$')
+
+
+@dataclass
+class LfsPointer:
+    oid: str
+    size: int
+    text: bytes  # the pointer file itself, for `git lfs smudge`
+
+
+@dataclass
+class BlobSide:
+    """One version of a changed file: its git blob and, for LFS-tracked files,
+    the pointer it holds. size is the real content's size either way."""
+    commit: str
+    path: str
+    object_id: str
+    size: int
+    lfs: Optional[LfsPointer] = None
+
+
+def parse_lfs_pointer(data: bytes) -> Optional[LfsPointer]:
+    match = LFS_POINTER.match(data)
+    if not match:
+        return None
+    return LfsPointer(oid=match.group(1).decode('ascii'), size=int(match.group(2)), text=data)
+
+
+def describe_blob(blobs: BlobReader, commit: str, path: str) -> BlobSide:
+    object_id, size = blobs.blob_info(commit, path)
+    pointer = parse_lfs_pointer(blobs.read(commit, path)) if size < LFS_POINTER_MAX_SIZE else None
+    return BlobSide(commit, path, object_id, pointer.size if pointer else size, pointer)
+
+
+def describe_change(blobs: BlobReader, change: Change, base: str, head: str) -> Tuple[BlobSide, BlobSide]:
+    return (describe_blob(blobs, base, change.previous_path or change.path),
+            describe_blob(blobs, head, change.path))
+
+
+def lfs_objects_dir(cwd: Optional[str] = None) -> Path:
+    """Where git-lfs keeps downloaded objects: lfs.storage when set (relative
+    to the git directory), else <git dir>/lfs, with objects/ inside."""
+    git_dir = Path(run_git(['rev-parse', '--git-common-dir'], cwd=cwd).strip())
+    if not git_dir.is_absolute():
+        git_dir = Path(cwd or '.') / git_dir
+    storage = try_git(['config', 'lfs.storage'], cwd=cwd)
+    root = git_dir / storage if storage else git_dir / 'lfs'
+    return root / 'objects'
+
+
+def lfs_include_pattern(path: str) -> str:
+    """A `git lfs fetch --include` pattern matching path."""
+    path = LFS_GLOB_CHARACTER.sub(lambda match: f'[{match.group(0)}]', path)
+    return LFS_UNESCAPABLE.sub('?', path)
+
+
+def fetch_lfs_objects(sides: List[BlobSide], concurrency: int, cwd: Optional[str] = None) -> None:
+    """Download the LFS objects of sides in a few `git lfs fetch` runs instead
+    of one smudge per file. Objects already present are not fetched again;
+    anything a fetch misses is smudged individually later."""
+    patterns = sorted({lfs_include_pattern(side.path) for side in sides})
+    commits = sorted({side.commit for side in sides})
+    for start in range(0, len(patterns), LFS_FETCH_BATCH):
+        include = ','.join(patterns[start:start + LFS_FETCH_BATCH])
+        try:
+            run_git(['-c', f'lfs.concurrenttransfers={concurrency}', 'lfs', 'fetch',
+                     f'--include={include}', 'origin'] + commits, cwd=cwd)
+        except (OSError, subprocess.CalledProcessError) as exc:
+            detail = _as_text(getattr(exc, 'stderr', None)).strip() or str(exc)
+            print(f'::warning::git lfs fetch failed; falling back to fetching LFS files one at a time. '
+                  f'{detail}')
+            return
+
+
+def write_lfs_object(side: BlobSide, target: Path, objects_dir: Path, cwd: Optional[str] = None) -> None:
+    """Write the content side's pointer stands for to target: from the local
+    LFS store when fetched, else through `git lfs smudge`."""
+    oid = side.lfs.oid
+    stored = objects_dir / oid[:2] / oid[2:4] / oid
+    if stored.is_file() and stored.stat().st_size == side.lfs.size:
+        shutil.copyfile(stored, target)
+        return
+    with open(target, 'wb') as handle:
+        result = subprocess.run(['git', 'lfs', 'smudge', '--', side.path], cwd=cwd, input=side.lfs.text,
+                                stdout=handle, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, ['git', 'lfs', 'smudge'], stderr=result.stderr)
+
+
+
 # --------------------------------------------------------------------------
 # redline + preview generation
 # --------------------------------------------------------------------------
@@ -262,8 +507,48 @@ def _as_text(value) -> str:
 
 
 def make_engine(inputs: Inputs):
+    """The configured engine. run_redline_pair() already skips pairs with the
+    same content, so engines that would check again (skip_unchanged, in
+    python-redlines versions that have it) are told not to."""
     from python_redlines.engines import DocxodusEngine, XmlPowerToolsEngine
-    return DocxodusEngine() if inputs.engine == 'docxodus' else XmlPowerToolsEngine()
+    engine_class = DocxodusEngine if inputs.engine == 'docxodus' else XmlPowerToolsEngine
+    try:
+        checks_content = 'skip_unchanged' in inspect.signature(engine_class).parameters
+    except (TypeError, ValueError):
+        checks_content = False
+    return engine_class(skip_unchanged=False) if checks_content else engine_class()
+
+
+def prepare_engine(inputs: Inputs):
+    """make_engine(), with the binary extracted and launched once so the first
+    redline does not pay for it. Warm-up failures are left for that redline to
+    report; python-redlines versions before warmup() skip it."""
+    engine = make_engine(inputs)
+    warmup = getattr(engine, 'warmup', None)
+    if warmup is not None:
+        try:
+            warmup()
+        except (ImportError, OSError) as exc:
+            print(f'::debug::Engine warm-up failed: {exc}')
+    return engine
+
+
+def same_content(original: bytes, modified: bytes) -> bool:
+    """Whether the two documents differ only in what Word changes on every save.
+    Always False with python-redlines versions (package-version input) that
+    predate python_redlines.canonical."""
+    try:
+        from python_redlines.canonical import same_content as canonical_same_content
+    except ImportError:
+        return False
+    return canonical_same_content(original, modified)
+
+
+def revision_count(result, stdout: Optional[str]) -> Optional[int]:
+    """The engine's own count when run_redline returns a RedlineResult; older
+    python-redlines versions (package-version input) return a plain tuple."""
+    revisions = getattr(result, 'revisions', None)
+    return revisions if revisions is not None else revision_count_from_stdout(stdout)
 
 
 def revision_count_from_stdout(stdout: Optional[str]) -> Optional[int]:
@@ -329,21 +614,173 @@ def generate_preview(previewer: str, redline_path: Path, html_path: Path) -> boo
     return True
 
 
+class PreviewQueue:
+    """Converts redlines to HTML on background threads, so previews of finished
+    redlines render while later ones are still being compared. finish() waits
+    for all of them and records each successful preview on its Change."""
+
+    def __init__(self, previewer: str, workers: int):
+        self.previewer = previewer
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        self._pending: List[Tuple[Change, Path, Future]] = []
+        self._lock = threading.Lock()
+
+    def submit(self, change: Change, redline_path: Path, html_path: Path) -> None:
+        future = self._pool.submit(generate_preview, self.previewer, redline_path, html_path)
+        with self._lock:
+            self._pending.append((change, html_path, future))
+
+    def finish(self) -> None:
+        for change, html_path, future in self._pending:
+            if future.result():
+                change.html = html_path.as_posix()
+        self._pool.shutdown()
+
+
+def start_previews(previewer: Optional[str], inputs: Inputs) -> Optional[PreviewQueue]:
+    return PreviewQueue(previewer, inputs.parallelism) if previewer else None
+
+
+def installed_versions(engine) -> List[str]:
+    """python-redlines and the engine's binary package, as name==version."""
+    names = ['python-redlines']
+    binary_package = getattr(engine, 'BINARY_PACKAGE', None)
+    if binary_package:
+        names.append(binary_package.replace('_', '-'))
+    versions = []
+    for name in names:
+        try:
+            versions.append(f'{name}=={importlib.metadata.version(name)}')
+        except importlib.metadata.PackageNotFoundError:
+            versions.append(f'{name}==unknown')
+    return versions
+
+
+class RedlineStore:
+    """Redlines from earlier workflow runs, in a directory that actions/cache
+    carries from run to run. Git blob IDs are content hashes, so an entry is
+    keyed on the two blob IDs, the engine and its options, the author and the
+    installed package versions. A hit is copied into place without running
+    the engine. Entries unused for MAX_AGE seconds are pruned on close()."""
+
+    MAX_AGE = 30 * 24 * 3600
+
+    def __init__(self, directory: str, inputs: Inputs, versions: List[str]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._salt = json.dumps([inputs.engine, inputs.engine_kwargs(), inputs.author, versions],
+                                sort_keys=True)
+        self.hits = self.misses = 0
+        self._lock = threading.Lock()
+
+    def key(self, original_id: str, modified_id: str) -> str:
+        return hashlib.sha256(f'{self._salt}\0{original_id}\0{modified_id}'.encode('utf-8')).hexdigest()
+
+    def restore(self, key: str, change: Change, inputs: Inputs,
+                previews: Optional[PreviewQueue]) -> bool:
+        """Fill in change from the entry for key, if there is one."""
+        record_path = self.directory / f'{key}.json'
+        try:
+            record = json.loads(record_path.read_text(encoding='utf-8'))
+            if record.get('redline'):
+                redline_path, html_path = redline_output_paths(inputs.output_dir, change.path)
+                redline_path.parent.mkdir(parents=True, exist_ok=True)
+                cached = self.directory / f'{key}.docx'
+                shutil.copyfile(cached, redline_path)
+                os.utime(cached)
+                change.redline = redline_path.as_posix()
+                if previews:
+                    previews.submit(change, redline_path, html_path)
+            os.utime(record_path)
+        except (OSError, ValueError):
+            self._count(hit=False)
+            return False
+        change.revisions = record.get('revisions')
+        self._count(hit=True)
+        return True
+
+    def store(self, key: str, change: Change) -> None:
+        """Keep change's outcome under key, unless the redline failed."""
+        if change.error:
+            return
+        if change.redline:
+            # Copied file to file, so a large redline is never held in memory.
+            self._replace(self.directory / f'{key}.docx', Path(change.redline))
+        # The record goes last, so a half-written entry is never a hit.
+        record = {'revisions': change.revisions, 'redline': bool(change.redline)}
+        self._replace(self.directory / f'{key}.json', json.dumps(record).encode('utf-8'))
+
+    def close(self) -> int:
+        """Prune old entries and return how many remain."""
+        cutoff = time.time() - self.MAX_AGE
+        remaining = 0
+        for entry in self.directory.iterdir():
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    entry.unlink()
+                elif entry.suffix == '.json':
+                    remaining += 1
+            except OSError:
+                pass
+        return remaining
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _replace(self, target: Path, data: Union[bytes, Path]) -> None:
+        """Atomically set target to data, or to a copy of the file at data."""
+        temporary = target.with_name(f'{target.name}.{threading.get_ident()}.tmp')
+        if isinstance(data, Path):
+            shutil.copyfile(data, temporary)
+        else:
+            temporary.write_bytes(data)
+        os.replace(temporary, target)
+
+
+def accepts_argument(engine, name: str) -> bool:
+    """Whether engine.run_redline takes the named argument; older
+    python-redlines versions take neither output (streamed redlines) nor
+    timeout (resource limits)."""
+    try:
+        return name in inspect.signature(engine.run_redline).parameters
+    except (TypeError, ValueError):
+        return False
+
+
 def run_redline_pair(engine, inputs: Inputs, change: Change,
-                     original: bytes, modified: bytes,
-                     previewer: Optional[str]) -> None:
-    if original == modified:
-        # e.g. a pure rename — nothing to redline.
+                     original: Union[bytes, Path], modified: Union[bytes, Path],
+                     previews: Optional[PreviewQueue], timeout: Optional[float] = None) -> None:
+    """Redline one pair, given as bytes or paths. timeout, in seconds, is
+    passed to engines that support one; running out of it skips the change."""
+    if original == modified or same_content(original, modified):
+        # e.g. a pure rename, or a file re-saved without edits — nothing to redline.
         change.revisions = 0
         return
 
     redline_path, html_path = redline_output_paths(inputs.output_dir, change.path)
     redline_path.parent.mkdir(parents=True, exist_ok=True)
 
+    kwargs = inputs.engine_kwargs()
+    if timeout is not None and accepts_argument(engine, 'timeout'):
+        kwargs['timeout'] = timeout
+    # Engines that can write the redline straight to its path never hold it in memory.
+    streamed = accepts_argument(engine, 'output')
+    if streamed:
+        kwargs['output'] = redline_path
     try:
-        redline_bytes, stdout, stderr = engine.run_redline(
-            inputs.author, original, modified, **inputs.engine_kwargs())
+        result = engine.run_redline(inputs.author, original, modified, **kwargs)
+        redline_bytes, stdout, stderr = result
+    except TimeoutError:
+        redline_path.unlink(missing_ok=True)
+        change.skipped = 'time budget'
+        print(f'::warning::Stopped redlining {change.path}: the time budget ran out.')
+        return
     except subprocess.CalledProcessError as exc:
+        redline_path.unlink(missing_ok=True)
         detail = _as_text(exc.stderr) or _as_text(exc.stdout)
         change.error = detail.strip() or f'engine exited with code {exc.returncode}'
         print(f'::error::Redline generation failed for {change.path}: {change.error}')
@@ -352,12 +789,178 @@ def run_redline_pair(engine, inputs: Inputs, change: Change,
     if stderr:
         print(f"::warning::redline engine stderr for {change.path}: {stderr.strip()}")
 
-    redline_path.write_bytes(redline_bytes)
+    if not streamed:
+        redline_path.write_bytes(redline_bytes)
     change.redline = redline_path.as_posix()
-    change.revisions = revision_count_from_stdout(stdout)
+    change.revisions = revision_count(result, stdout)
+
+    if previews:
+        previews.submit(change, redline_path, html_path)
+
+
+def redline_changes(engine, inputs: Inputs, changes: List[Change], base: str, head: str,
+                    previews: Optional[PreviewQueue], cwd: Optional[str] = None,
+                    store: Optional[RedlineStore] = None, deadline: Optional[float] = None) -> None:
+    """Redline each change, up to inputs.parallelism at once and largest first,
+    so the biggest file does not start last and set the total time. Both
+    versions are read with one BlobReader into files that are removed once
+    compared; files stored in Git LFS are fetched for both commits in one
+    batched pass up front. Pure renames are resolved without reading either
+    side and pairs found in store are restored from it instead, both even past
+    the deadline. Redlines not started by deadline (a time.monotonic() value)
+    are skipped, and one that is running when it passes is stopped where the
+    engine supports a timeout. Results are recorded on the Change records and progress is
+    printed in list order, so the outputs do not depend on which redline
+    finishes first."""
+    def write_side(side: BlobSide, target: Path) -> None:
+        if side.lfs:
+            write_lfs_object(side, target, objects_dir, cwd=cwd)
+        else:
+            blobs.write_blob(side.commit, side.path, target)
+
+    def redline(numbered: Tuple[int, Change]) -> Change:
+        index, change = numbered
+        original_side, modified_side = sides[index]
+        original_id, modified_id = original_side.object_id, modified_side.object_id
+        if original_id == modified_id:
+            # A pure rename: the same blob on both sides, nothing to redline.
+            change.revisions = 0
+            return change
+        key = store.key(original_id, modified_id) if store else None
+        if key and store.restore(key, change, inputs, previews):
+            return change
+        # Renames and restores cost no engine time, so the budget only stops real runs.
+        if deadline is not None and time.monotonic() >= deadline:
+            change.skipped = 'time budget'
+            return change
+
+        original = Path(workdir) / f'{index}.original.docx'
+        modified = Path(workdir) / f'{index}.modified.docx'
+        try:
+            try:
+                write_side(original_side, original)
+                write_side(modified_side, modified)
+            except subprocess.CalledProcessError as exc:
+                if not (original_side.lfs or modified_side.lfs):
+                    raise
+                detail = _as_text(exc.stderr).strip() or f'git lfs exited with code {exc.returncode}'
+                change.error = f'Could not fetch the Git LFS content: {detail}'
+                print(f'::error::Redline generation failed for {change.path}: {change.error}')
+                return change
+            timeout = max(deadline - time.monotonic(), 1.0) if deadline is not None else None
+            run_redline_pair(engine, inputs, change, original, modified, previews, timeout=timeout)
+            if key and not change.skipped:
+                store.store(key, change)
+        finally:
+            original.unlink(missing_ok=True)
+            modified.unlink(missing_ok=True)
+        return change
+
+    with BlobReader(cwd=cwd) as blobs, tempfile.TemporaryDirectory(prefix='redlines-') as workdir, \
+            ThreadPoolExecutor(max_workers=max(min(inputs.parallelism, len(changes)), 1)) as pool:
+        sides = [describe_change(blobs, change, base, head) for change in changes]
+        lfs_sides = [side for pair in sides for side in pair if side.lfs]
+        objects_dir = None
+        if lfs_sides:
+            print(f'Fetching {len(lfs_sides)} Git LFS object(s).')
+            fetch_lfs_objects(lfs_sides, inputs.parallelism, cwd=cwd)
+            objects_dir = lfs_objects_dir(cwd=cwd)
+        sizes = [original.size + modified.size for original, modified in sides]
+        futures = {}
+        for index in sorted(range(len(changes)), key=lambda i: (-sizes[i], i)):
+            futures[index] = pool.submit(redline, (index, changes[index]))
+        for index in range(len(changes)):
+            change = futures[index].result()
+            if change.skipped:
+                print(f'  {change.path}: skipped ({change.skipped})')
+            else:
+                print(f'  {change.path}: {change.revisions} revision(s) '
+                      f'-> {change.redline}')
 
-    if previewer and generate_preview(previewer, redline_path, html_path):
-        change.html = html_path.as_posix()
+
+# --------------------------------------------------------------------------
+# sharding
+# --------------------------------------------------------------------------
+
+def assign_shards(sizes: List[int], shard_count: int) -> List[int]:
+    """The shard of each item, balancing the total size per shard: largest
+    first, each to the shard with the least so far (lowest index on ties).
+    Every shard of a matrix computes the same assignment."""
+    loads = [0] * shard_count
+    shards = [0] * len(sizes)
+    for position in sorted(range(len(sizes)), key=lambda i: (-sizes[i], i)):
+        shard = min(range(shard_count), key=lambda s: (loads[s], s))
+        shards[position] = shard
+        loads[shard] += sizes[position]
+    return shards
+
+
+def select_shard(changes: List[Change], base: str, head: str, inputs: Inputs,
+                 cwd: Optional[str] = None) -> List[int]:
+    """Positions in changes that belong to this shard. Comparable changes are
+    balanced by the size of both versions (the real content's, for LFS
+    files); the rest, which cost nothing to report, go to shard 0."""
+    if inputs.shard_count == 1:
+        return list(range(len(changes)))
+    comparable = [i for i, c in enumerate(changes) if c.status in ('modified', 'renamed')]
+    with BlobReader(cwd=cwd) as blobs:
+        sizes = [sum(side.size for side in describe_change(blobs, changes[i], base, head))
+                 for i in comparable]
+    shards = dict(zip(comparable, assign_shards(sizes, inputs.shard_count)))
+    return [i for i in range(len(changes)) if shards.get(i, 0) == inputs.shard_index]
+
+
+def shard_manifest_path(output_dir: str, shard_index: int) -> Path:
+    return Path(output_dir) / f'redlines-shard-{shard_index}.json'
+
+
+def write_shard_manifest(inputs: Inputs, changes: List[Change], positions: List[int],
+                         base: str, head: str, cache: Optional[Tuple[int, int]]) -> None:
+    """Record this shard's results next to its redlines, for merge mode."""
+    path = shard_manifest_path(inputs.output_dir, inputs.shard_index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps({
+        'shard_index': inputs.shard_index,
+        'shard_count': inputs.shard_count,
+        'base': base,
+        'head': head,
+        'cache': list(cache) if cache else None,
+        'changes': [dict(changes[i].to_dict(), position=i) for i in positions],
+    }), encoding='utf-8')
+
+
+def merge_shards(output_dir: str) -> Tuple[List[Change], str, str, Optional[Tuple[int, int]], List[int]]:
+    """Combine the shard manifests found in output_dir, which are then removed.
+    Returns the changes in detection order, the compared commits, the summed
+    cache statistics and the indexes of any shards with no manifest. Shards
+    that compared different commits, or split the changes differently, are
+    rejected with a ConfigError."""
+    paths = sorted(Path(output_dir).glob('redlines-shard-*.json'))
+    manifests = [json.loads(path.read_text(encoding='utf-8')) for path in paths]
+    if not manifests:
+        raise ConfigError(
+            f"Merge mode found no shard results in '{output_dir}'. Download the shards' "
+            "artifacts there first.")
+    first = manifests[0]
+    for manifest in manifests[1:]:
+        for key in ('base', 'head', 'shard_count'):
+            if manifest[key] != first[key]:
+                raise ConfigError(
+                    f"Shards {first['shard_index']} and {manifest['shard_index']} disagree on "
+                    f"{key.replace('_', ' ')} ({first[key]} and {manifest[key]}); every "
+                    "shard must compare the same commits with the same shard-count.")
+    for path in paths:
+        path.unlink()
+
+    shard_count = manifests[0]['shard_count']
+    found = {manifest['shard_index'] for manifest in manifests}
+    missing = [index for index in range(shard_count) if index not in found]
+    records = sorted((record for manifest in manifests for record in manifest['changes']),
+                     key=lambda record: record['position'])
+    stats = [manifest['cache'] for manifest in manifests if manifest['cache']]
+    cache = (sum(hits for hits, _ in stats), sum(misses for _, misses in stats)) if stats else None
+    return ([Change.from_dict(record) for record in records],
+            manifests[0]['base'], manifests[0]['head'], cache, missing)
 
 
 # --------------------------------------------------------------------------
@@ -373,8 +976,14 @@ STATUS_LABELS = {
 }
 
 
-def build_summary(changes: List[Change], base: Optional[str], head: Optional[str]) -> str:
-    lines = ['## 📕 DOCX redlines', '']
+def build_summary(changes: List[Change], base: Optional[str], head: Optional[str],
+                  cache: Optional[Tuple[int, int]] = None, shard: Optional[Tuple[int, int]] = None) -> str:
+    """cache is the (hits, misses) of the redline store; shard is (index, count)
+    when this run covers one shard of the changes."""
+    title = '## 📕 DOCX redlines'
+    if shard:
+        title += f' (shard {shard[0] + 1} of {shard[1]})'
+    lines = [title, '']
     if base and head:
         lines.append(f'Compared `{base[:12]}` → `{head[:12]}`.')
         lines.append('')
@@ -392,9 +1001,23 @@ def build_summary(changes: List[Change], base: Optional[str], head: Optional[str
         redline = f'`{c.redline}`' if c.redline else '—'
         if c.error:
             redline = '⚠️ failed'
+        elif c.skipped:
+            redline = f'⏭️ skipped ({c.skipped})'
         html = f'`{c.html}`' if c.html else '—'
         lines.append(f'| {name} | {STATUS_LABELS[c.status]} | {revisions} | {redline} | {html} |')
 
+    skipped = [c for c in changes if c.skipped]
+    if skipped:
+        lines.append('')
+        lines.append(f'{len(skipped)} file(s) were skipped to stay within the `max-files` or '
+                     '`time-budget` limits; raise them or shard the run to redline the rest.')
+
+    looked_up = sum(cache) if cache else 0
+    if looked_up:
+        lines.append('')
+        lines.append(f'Restored {cache[0]} of {looked_up} redline(s) from the cache '
+                     f'({100 * cache[0] // looked_up}% hit rate).')
+
     if any(c.redline for c in changes):
         lines.append('')
         lines.append('Redline documents carry native Word tracked changes: open one in '
@@ -416,6 +1039,7 @@ def write_outputs(changes: List[Change], env: Dict[str, str]) -> None:
     content = (
         f'count={len(generated)}\n'
         f'any-changes={"true" if changes else "false"}\n'
+        f'skipped={sum(1 for c in changes if c.skipped)}\n'
         f'redlines={payload}\n'
     )
     append_to_file('GITHUB_OUTPUT', content, env)
@@ -435,40 +1059,86 @@ def load_event(env: Dict[str, str]) -> Dict:
 
 def main(env: Dict[str, str]) -> int:
     inputs = Inputs.from_env(env)
-    previewer = resolve_previewer(inputs)
-    base = head = None
-
-    if inputs.original:  # explicit-pair mode
-        for label, candidate in (('original', inputs.original), ('modified', inputs.modified)):
-            if not os.path.isfile(candidate):
-                raise ConfigError(f"Input '{label}' file not found: {candidate}")
-        changes = [Change(path=inputs.modified, previous_path=inputs.original, status='explicit')]
-        engine = make_engine(inputs)
-        run_redline_pair(engine, inputs, changes[0],
-                         Path(inputs.original).read_bytes(),
-                         Path(inputs.modified).read_bytes(),
-                         previewer)
-    else:  # auto-detect mode
-        event = load_event(env)
-        base, head = resolve_refs(inputs, env, event)
-        patterns = [line.strip() for line in inputs.files.splitlines() if line.strip()]
-        changes = detect_changes(base, head, patterns)
-        comparable = [c for c in changes if c.status in ('modified', 'renamed')]
-        print(f'Found {len(changes)} changed .docx file(s) between '
-              f'{base[:12]} and {head[:12]}; {len(comparable)} comparable.')
-        if comparable:
-            engine = make_engine(inputs)
-            for change in comparable:
-                original = read_blob(base, change.previous_path or change.path)
-                modified = read_blob(head, change.path)
-                run_redline_pair(engine, inputs, change, original, modified, previewer)
-                print(f'  {change.path}: {change.revisions} revision(s) '
-                      f'-> {change.redline}')
+    if inputs.merge:
+        return merge_main(inputs, env)
+    base = head = store = shard = None
+    deadline = time.monotonic() + inputs.time_budget * 60 if inputs.time_budget else None
+
+    # Extracting and warming up the engine, and probing for the preview tool,
+    # happen while git works out what changed.
+    with ThreadPoolExecutor(max_workers=2) as setup:
+        engine_ready = setup.submit(prepare_engine, inputs)
+        previewer_ready = setup.submit(resolve_previewer, inputs)
+
+        if inputs.original:  # explicit-pair mode
+            for label, candidate in (('original', inputs.original), ('modified', inputs.modified)):
+                if not os.path.isfile(candidate):
+                    raise ConfigError(f"Input '{label}' file not found: {candidate}")
+            changes = [Change(path=inputs.modified, previous_path=inputs.original, status='explicit')]
+            previews = start_previews(previewer_ready.result(), inputs)
+            run_redline_pair(engine_ready.result(), inputs, changes[0],
+                             Path(inputs.original), Path(inputs.modified), previews)
+        else:  # auto-detect mode
+            event = load_event(env)
+            base, head = resolve_refs(inputs, env, event)
+            patterns = [line.strip() for line in inputs.files.splitlines() if line.strip()]
+            detected = detect_changes(base, head, patterns)
+            positions = select_shard(detected, base, head, inputs)
+            changes = [detected[i] for i in positions]
+            comparable = [c for c in changes if c.status in ('modified', 'renamed')]
+            if inputs.shard_count > 1:
+                shard = (inputs.shard_index, inputs.shard_count)
+                print(f'Found {len(detected)} changed .docx file(s) between '
+                      f'{base[:12]} and {head[:12]}; shard {inputs.shard_index + 1} of '
+                      f'{inputs.shard_count} has {len(comparable)} comparable.')
+            else:
+                print(f'Found {len(changes)} changed .docx file(s) between '
+                      f'{base[:12]} and {head[:12]}; {len(comparable)} comparable.')
+            if inputs.max_files and len(comparable) > inputs.max_files:
+                for change in comparable[inputs.max_files:]:
+                    change.skipped = 'max-files'
+                comparable = comparable[:inputs.max_files]
+            previews = start_previews(previewer_ready.result(), inputs)
+            if comparable:
+                engine = engine_ready.result()
+                if inputs.cache_dir:
+                    store = RedlineStore(inputs.cache_dir, inputs, installed_versions(engine))
+                redline_changes(engine, inputs, comparable, base, head, previews, store=store,
+                                deadline=deadline)
+                if store:
+                    append_to_file('GITHUB_OUTPUT', f'cache-entries={store.close()}\n', env)
+        if previews:
+            previews.finish()
+
+    cache = (store.hits, store.misses) if store else None
+    if shard:
+        write_shard_manifest(inputs, detected, positions, base, head, cache)
+    return report(inputs, changes, base, head, cache, shard, env)
+
+
+def merge_main(inputs: Inputs, env: Dict[str, str]) -> int:
+    """Merge mode: combine the results the shards left in output_dir."""
+    changes, base, head, cache, missing = merge_shards(inputs.output_dir)
+    print(f'Merged the results of {len(changes)} changed .docx file(s).')
+    status = report(inputs, changes, base, head, cache, None, env)
+    if missing:
+        print(f"::error::No results from shard(s) {', '.join(str(i) for i in missing)}; "
+              'the merged redlines are incomplete.')
+        return 1
+    return status
+
 
+def report(inputs: Inputs, changes: List[Change], base: Optional[str], head: Optional[str],
+           cache: Optional[Tuple[int, int]], shard: Optional[Tuple[int, int]],
+           env: Dict[str, str]) -> int:
     write_outputs(changes, env)
     if inputs.write_summary:
-        append_to_file('GITHUB_STEP_SUMMARY', build_summary(changes, base, head), env)
+        append_to_file('GITHUB_STEP_SUMMARY', build_summary(changes, base, head, cache, shard), env)
 
+    skipped = [c for c in changes if c.skipped]
+    if skipped:
+        print(f'::warning::Skipped {len(skipped)} file(s) to stay within the max-files or '
+              'time-budget limits.')
     failed = [c for c in changes if c.error]
     if failed:
         print(f'::error::Redline generation failed for {len(failed)} file(s).')
@@ -0,0 +1,110 @@
+"""Compare run_redline latency across I/O modes for large documents.
+
+Pads the repo fixtures with an incompressible media part to reach each target size,
+then times run_redline with every I/O mode available on this platform.
+
+By default the "engine" is a stand-in child process that reads both inputs and copies
+the modified document to the target. That isolates the cost of moving the bytes,
+which is the only thing the I/O mode changes. Pass --engine to time a real engine
+end to end instead.
+
+Usage:
+    python benchmarks/bench_io_modes.py
+    python benchmarks/bench_io_modes.py --sizes 1,10,100 --repeat 5
+    python benchmarks/bench_io_modes.py --engine xmlpowertools
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+import zipfile
+from pathlib import Path
+
+from python_redlines.engines import IO_MODES, BaseEngine, DocxodusEngine, XmlPowerToolsEngine, memfd_supported
+
+FIXTURES = Path(__file__).resolve().parent.parent / 'tests' / 'fixtures'
+
+COPY_SCRIPT = '''
+import sys
+_, original, modified, target = sys.argv
+open(original, 'rb').read()
+data = open(modified, 'rb').read()
+open(target, 'wb').write(data)
+print('Revisions found: 0')
+'''
+
+
+class CopyEngine(BaseEngine):
+    """Stand-in engine whose "comparison" is a copy, so only I/O is measured."""
+
+    def _resolve_binary(self) -> str:
+        return sys.executable
+
+    def _build_command(self, author_tag, original_path, modified_path, target_path, **kwargs):
+        return [sys.executable, '-c', COPY_SCRIPT, original_path, modified_path, target_path]
+
+
+ENGINES = {
+    'copy': CopyEngine,
+    'xmlpowertools': XmlPowerToolsEngine,
+    'docxodus': DocxodusEngine,
+}
+
+
+def padded_docx(source: Path, size: int) -> bytes:
+    """The source .docx plus a stored, incompressible media part, totalling about size bytes."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for item in src.infolist():
+            dst.writestr(item, src.read(item.filename))
+        padding = max(size - buffer.tell(), 0)
+        dst.writestr(zipfile.ZipInfo('word/media/padding.bin'), os.urandom(padding),
+                     compress_type=zipfile.ZIP_STORED)
+    return buffer.getvalue()
+
+
+def available_modes(engine_class):
+    modes = ['tempfile']
+    if memfd_supported():
+        modes.append('memfd')
+    if engine_class.SUPPORTS_STDIO:
+        modes.append('pipe')
+    return [mode for mode in IO_MODES if mode in modes]
+
+
+def time_mode(engine, original: bytes, modified: bytes, repeat: int):
+    engine.run_redline('Benchmark', original, modified)  # warm the page cache and the binary
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.run_redline('Benchmark', original, modified)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='copy')
+    parser.add_argument('--sizes', default='1,10,100', help='document sizes in MB (default: 1,10,100)')
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    engine_class = ENGINES[args.engine]
+    modes = available_modes(engine_class)
+    engines = {mode: engine_class(io_mode=mode) for mode in modes}
+
+    print(f"engine={args.engine}  repeat={args.repeat}  (median wall-clock per run_redline, ms)")
+    print(f"{'size':>8}  " + '  '.join(f'{mode:>9}' for mode in modes))
+    for size_mb in (float(s) for s in args.sizes.split(',')):
+        size = int(size_mb * 1024 * 1024)
+        original = padded_docx(FIXTURES / 'original.docx', size)
+        modified = padded_docx(FIXTURES / 'modified.docx', size)
+        timings = [time_mode(engines[mode], original, modified, args.repeat) * 1000 for mode in modes]
+        print(f"{size_mb:>6g}MB  " + '  '.join(f'{t:>9.1f}' for t in timings))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
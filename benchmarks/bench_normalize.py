@@ -0,0 +1,88 @@
+"""Measure what normalize=True saves on fragmented documents.
+
+Generates synthetic pairs (see synthetic.py) at several levels of run
+fragmentation, the fraction of paragraphs whose text Word has split into several
+identically formatted runs with their own rsids. For each it times run_redline with and
+without normalization, checks that both report the same revisions, and shows how many runs
+normalization removed and how long it took.
+
+Usage:
+    python benchmarks/bench_normalize.py
+    python benchmarks/bench_normalize.py --engine xmlpowertools --pages 50,200 --fragmentation 0,0.5,1
+"""
+import argparse
+import io
+import re
+import statistics
+import sys
+import time
+import zipfile
+
+from python_redlines.engines import DocxodusEngine, EngineNotInstalledError, XmlPowerToolsEngine
+from python_redlines.normalize import normalize_docx
+
+from synthetic import generate_pair
+
+ENGINES = {
+    'xmlpowertools': XmlPowerToolsEngine,
+    'docxodus': DocxodusEngine,
+}
+
+RUN = re.compile(rb'<w:r[ >]')
+
+
+def run_count(docx: bytes) -> int:
+    with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+        return len(RUN.findall(archive.read('word/document.xml')))
+
+
+def time_redline(engine, original: bytes, modified: bytes, normalize: bool, repeat: int):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = engine.run_redline('Benchmark', original, modified, normalize=normalize)
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples), result.revisions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--engine', choices=sorted(ENGINES), default='docxodus')
+    parser.add_argument('--pages', default='10,50,200', help='document sizes in pages (default: 10,50,200)')
+    parser.add_argument('--fragmentation', default='0,0.5,1', help='fractions of paragraphs split into runs')
+    parser.add_argument('--edits', type=int, default=20, help='insertions, deletions and format changes each')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args(argv)
+
+    # Never skip unchanged pairs: every pair here has edits, and the check would only add noise.
+    engine = ENGINES[args.engine](skip_unchanged=False)
+    try:
+        engine.warmup()
+    except EngineNotInstalledError as e:
+        print(f"{args.engine}: {e}")
+        return 1
+
+    print(f"engine={args.engine}  repeat={args.repeat}  (median wall-clock per run_redline)")
+    print(f"{'pages':>6} {'frag':>5} {'runs':>15} {'normalize':>10} {'raw':>10} {'normalized':>11} "
+          f"{'speed-up':>9}  revisions")
+    for pages in (int(p) for p in args.pages.split(',')):
+        for fragmentation in (float(f) for f in args.fragmentation.split(',')):
+            pair = generate_pair(pages, insertions=args.edits, deletions=args.edits, format_changes=args.edits,
+                                 fragmentation=fragmentation, seed=pages)
+            start = time.perf_counter()
+            normalized = normalize_docx(pair.modified)
+            normalize_time = time.perf_counter() - start
+
+            raw_time, raw_revisions = time_redline(engine, pair.original, pair.modified, False, args.repeat)
+            normalized_time, normalized_revisions = time_redline(engine, pair.original, pair.modified, True,
+                                                                 args.repeat)
+            same = 'same' if raw_revisions == normalized_revisions else 'DIFFERENT'
+            runs = f"{run_count(pair.modified)} -> {run_count(normalized)}"
+            print(f"{pages:>6} {fragmentation:>5g} {runs:>15} {normalize_time * 1000:>8.1f}ms "
+                  f"{raw_time * 1000:>8.1f}ms {normalized_time * 1000:>9.1f}ms {raw_time / normalized_time:>8.2f}x  "
+                  f"{raw_revisions} / {normalized_revisions} ({same})")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
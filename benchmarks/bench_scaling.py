@@ -0,0 +1,215 @@
+"""Measure how the engines scale with document size, edit rate, tables and images.
+
+Generates synthetic document pairs (see synthetic.py) for every combination
+of the swept parameters and times run_redline on each engine configuration. Reports p50/p95 latency,
+throughput and the engine process's peak memory, and can save the results as JSON and
+compare them against an earlier run to catch regressions.
+
+Sizes are in pages of about 500 words. The full sweep reaches 5,000 pages and takes hours;
+the default "quick" preset stops at 50. Larger sizes are skipped for a configuration once
+one times out.
+
+Usage:
+    python benchmarks/bench_scaling.py
+    python benchmarks/bench_scaling.py --preset full --output results.json
+    python benchmarks/bench_scaling.py --configs docxodus,docxodus-docxdiff --pages 10,100 \\
+        --edit-rates 0.01,0.1 --table-density 0,0.3 --images 0,20
+    python benchmarks/bench_scaling.py --output new.json --compare baseline.json
+"""
+import argparse
+import datetime
+import json
+import math
+import platform
+import statistics
+import sys
+import time
+
+from python_redlines import __version__
+from python_redlines.engines import DocxodusEngine, EngineNotInstalledError, EngineTimeoutError, XmlPowerToolsEngine
+
+from synthetic import PARAGRAPHS_PER_PAGE, generate_pair
+
+CONFIGS = {
+    'xmlpowertools': (XmlPowerToolsEngine, {}),
+    'docxodus': (DocxodusEngine, {}),
+    'docxodus-docxdiff': (DocxodusEngine, {'engine': 'docxdiff'}),
+    'docxodus-moves': (DocxodusEngine, {'detect_moves': True}),
+    'docxodus-detail': (DocxodusEngine, {'detail_threshold': 0.5}),
+    'docxodus-strip-media': (DocxodusEngine, {'strip_media': True}),
+}
+
+PRESETS = {
+    'quick': {'pages': '1,10,50', 'edit_rates': '0.05', 'table_density': '0', 'images': '0'},
+    'full': {'pages': '1,10,100,1000,5000', 'edit_rates': '0.01,0.05,0.2', 'table_density': '0,0.2',
+             'images': '0,50'},
+}
+
+
+def parse_list(text: str, kind):
+    return [kind(item) for item in text.split(',') if item.strip()]
+
+
+def percentile(samples, q: float) -> float:
+    """Nearest-rank percentile; with few samples p95 is simply the slowest."""
+    ordered = sorted(samples)
+    return ordered[max(math.ceil(q / 100 * len(ordered)), 1) - 1]
+
+
+def edit_counts(pages: int, edit_rate: float, table_density: float):
+    """Splits edit_rate of the body blocks into table edits and equal numbers of insertions,
+    deletions and formatting changes."""
+    edits = round(pages * PARAGRAPHS_PER_PAGE * edit_rate)
+    table_edits = round(edits * table_density)
+    share, extra = divmod(edits - table_edits, 3)
+    return {'insertions': share + extra, 'deletions': share, 'format_changes': share, 'table_edits': table_edits}
+
+
+def run_case(engine, options, original: bytes, modified: bytes, repeat: int):
+    """Times repeat runs of one pair; returns the case's measurements."""
+    reports = []
+    engine.on_metrics = reports.append
+    revisions = None
+    samples = []
+    try:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = engine.run_redline('Benchmark', original, modified, **options)
+            samples.append(time.perf_counter() - start)
+            revisions = result.revisions
+    finally:
+        engine.on_metrics = None
+
+    rss = [m.max_rss for m in reports if m.max_rss is not None]
+    return {
+        'samples': samples,
+        'p50': statistics.median(samples),
+        'p95': percentile(samples, 95),
+        'mean': statistics.fmean(samples),
+        'peak_rss': max(rss) if rss else None,
+        'revisions': revisions,
+    }
+
+
+def sweep(args):
+    pages = parse_list(args.pages, int)
+    edit_rates = parse_list(args.edit_rates, float)
+    table_densities = parse_list(args.table_density, float)
+    image_counts = parse_list(args.images, int)
+
+    results = []
+    for name in parse_list(args.configs, str):
+        engine_class, options = CONFIGS[name]
+        engine = engine_class(timeout=args.timeout)
+        try:
+            engine.warmup()
+        except EngineNotInstalledError as e:
+            print(f"{name}: skipped ({e})")
+            continue
+
+        timed_out_at = None
+        for page_count in sorted(pages):
+            for edit_rate in edit_rates:
+                for table_density in table_densities:
+                    for images in image_counts:
+                        case = {'config': name, 'options': options, 'pages': page_count, 'edit_rate': edit_rate,
+                                'table_density': table_density, 'images': images}
+                        case['id'] = '{config}/pages={pages}/edits={edit_rate}/tables={table_density}/' \
+                                     'images={images}'.format(**case)
+                        if timed_out_at is not None:
+                            case['error'] = f'skipped: timed out at {timed_out_at} pages'
+                            results.append(case)
+                            continue
+
+                        try:
+                            pair = generate_pair(page_count, table_density=table_density, images=images,
+                                                 **edit_counts(page_count, edit_rate, table_density))
+                            case.update(bytes=len(pair.original) + len(pair.modified),
+                                        expected_revisions=len(pair.revisions))
+                            case.update(run_case(engine, options, pair.original, pair.modified, args.repeat))
+                        except EngineTimeoutError:
+                            timed_out_at = page_count
+                            case['error'] = f'timed out after {args.timeout}s'
+                        except Exception as e:
+                            case['error'] = f'{type(e).__name__}: {e}'
+                        else:
+                            case['pages_per_second'] = page_count / case['p50']
+                            case['mb_per_second'] = case['bytes'] / 1024 ** 2 / case['p50']
+                        results.append(case)
+                        print_case(case)
+    return results
+
+
+def print_case(case):
+    if 'error' in case:
+        print(f"{case['id']:<60}  {case['error']}")
+        return
+    rss = f"{case['peak_rss'] / 1024 ** 2:8.0f}MB" if case['peak_rss'] else '       n/a'
+    print(f"{case['id']:<60}  p50 {case['p50'] * 1000:9.1f}ms  p95 {case['p95'] * 1000:9.1f}ms  "
+          f"{case['pages_per_second']:8.1f} pages/s  {case['mb_per_second']:7.2f} MB/s  rss {rss}")
+
+
+def compare(results, baseline, threshold: float) -> int:
+    """Prints p50 and peak-memory ratios against baseline; returns the number of regressions."""
+    previous = {case['id']: case for case in baseline['results'] if 'error' not in case}
+    regressions = 0
+    print(f"\ncompared with {baseline['meta'].get('timestamp', 'baseline')} (regression: ratio > {threshold})")
+    for case in results:
+        before = previous.get(case['id'])
+        if before is None or 'error' in case:
+            continue
+        ratios = {'p50': case['p50'] / before['p50']}
+        if case.get('peak_rss') and before.get('peak_rss'):
+            ratios['rss'] = case['peak_rss'] / before['peak_rss']
+        flagged = [metric for metric, ratio in ratios.items() if ratio > threshold]
+        regressions += bool(flagged)
+        print(f"{case['id']:<60}  " + '  '.join(f'{metric} x{ratio:.2f}' for metric, ratio in ratios.items())
+              + ('  REGRESSION' if flagged else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--preset', choices=sorted(PRESETS), default='quick')
+    parser.add_argument('--configs', default=','.join(CONFIGS), help=f"comma-separated, from: {', '.join(CONFIGS)}")
+    parser.add_argument('--pages', help='document sizes in pages')
+    parser.add_argument('--edit-rates', help='fraction of paragraphs edited')
+    parser.add_argument('--table-density', help='fraction of body blocks that are tables')
+    parser.add_argument('--images', help='images per document')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--timeout', type=float, default=600, help='seconds per run (default: 600)')
+    parser.add_argument('--output', help='write results to this JSON file')
+    parser.add_argument('--compare', help='baseline JSON to compare against; exits 1 on a regression')
+    parser.add_argument('--threshold', type=float, default=1.25, help='ratio counted as a regression')
+    args = parser.parse_args(argv)
+    for key, value in PRESETS[args.preset].items():
+        if getattr(args, key) is None:
+            setattr(args, key, value)
+
+    unknown = set(parse_list(args.configs, str)) - set(CONFIGS)
+    if unknown:
+        parser.error(f"unknown configs: {', '.join(sorted(unknown))}")
+
+    results = sweep(args)
+
+    if args.output:
+        meta = {
+            'timestamp': datetime.datetime.now(datetime.timezone.utc).isoformat(timespec='seconds'),
+            'python_redlines': __version__,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+        }
+        with open(args.output, 'w') as handle:
+            json.dump({'meta': meta, 'results': results}, handle, indent=2)
+
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
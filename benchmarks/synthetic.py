@@ -0,0 +1,359 @@
+"""
+Synthetic .docx document pairs with known edits, for benchmarking and stress-testing engines.
+
+generate_pair() builds an original document of realistic contract-like paragraphs, tables
+and images, then a modified copy with exact counts of insertions, deletions, moves,
+formatting changes and table cell edits. The returned manifest lists every edit, so engine
+output can be checked for accuracy as well as timed, at sizes far beyond the test fixtures.
+Everything is derived from the seed: the same arguments always give the same bytes.
+
+    pair = generate_pair(pages=500, insertions=20, deletions=20, moves=5, format_changes=10)
+    result = engine.run_redline("Author", pair.original, pair.modified)
+
+Or from the command line:
+
+    python benchmarks/synthetic.py corpus/ --pages 500 --insertions 20 --moves 5
+
+Only the standard library is used (zipfile plus hand-written WordprocessingML).
+"""
+import argparse
+import io
+import json
+import random
+import struct
+import sys
+import zipfile
+import zlib
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+from xml.sax.saxutils import escape
+
+# A "page" is this many body blocks of about fifty words each.
+PARAGRAPHS_PER_PAGE = 10
+SENTENCES_PER_PARAGRAPH = 5
+
+# Manifest edit kinds, in the order counts are reported.
+EDIT_KINDS = ('insert', 'delete', 'move', 'format', 'table_edit')
+
+_WORDS = (
+    'agreement party parties shall notice term termination payment invoice services '
+    'supplier customer confidential information obligation liability damages warranty '
+    'period days written consent assign transfer law jurisdiction dispute schedule '
+    'deliverable acceptance fee rate annual renewal breach remedy cure effective date'
+).split()
+
+_W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_R_NS = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+_CONTENT_TYPES = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Default Extension="png" ContentType="image/png"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>'''
+
+_ROOT_RELS = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>'''
+
+_IMAGE_REL = ('<Relationship Id="rIdImg{0}" Type="http://schemas.openxmlformats.org/officeDocument/2006/'
+              'relationships/image" Target="media/image{0}.png"/>')
+
+_IMAGE_RUN = '''<w:r><w:drawing><wp:inline xmlns:wp="http://schemas.openxmlformats.org/drawingml/2006/wordprocessingDrawing">
+<wp:extent cx="914400" cy="914400"/><wp:docPr id="{0}" name="Picture {0}"/>
+<a:graphic xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main">
+<a:graphicData uri="http://schemas.openxmlformats.org/drawingml/2006/picture">
+<pic:pic xmlns:pic="http://schemas.openxmlformats.org/drawingml/2006/picture">
+<pic:nvPicPr><pic:cNvPr id="{0}" name="image{0}.png"/><pic:cNvPicPr/></pic:nvPicPr>
+<pic:blipFill><a:blip r:embed="rIdImg{0}"/><a:stretch><a:fillRect/></a:stretch></pic:blipFill>
+<pic:spPr><a:xfrm><a:off x="0" y="0"/><a:ext cx="914400" cy="914400"/></a:xfrm><a:prstGeom prst="rect"><a:avLst/></a:prstGeom></pic:spPr>
+</pic:pic></a:graphicData></a:graphic></wp:inline></w:drawing></w:r>'''
+
+
+@dataclass
+class ExpectedRevision:
+    """One edit made to the modified document, as recorded in the manifest."""
+    kind: str                           # one of EDIT_KINDS
+    original_block: Optional[int]       # body block index in the original; None for insertions
+    modified_block: Optional[int]       # body block index in the modified; None for deletions
+    text: str                           # the text inserted, deleted, moved or reformatted
+    new_text: Optional[str] = None      # table_edit only: the cell's replacement text
+
+
+@dataclass
+class SyntheticPair:
+    """A generated original/modified pair and the ground truth of what changed between them."""
+    original: bytes
+    modified: bytes
+    revisions: List[ExpectedRevision]
+    parameters: Dict[str, Union[int, float]] = field(default_factory=dict)
+
+    @property
+    def expected_counts(self) -> Dict[str, int]:
+        counts = Counter(revision.kind for revision in self.revisions)
+        return {kind: counts[kind] for kind in EDIT_KINDS}
+
+    def manifest(self) -> dict:
+        return {
+            'parameters': self.parameters,
+            'counts': self.expected_counts,
+            'revisions': [vars(revision) for revision in self.revisions],
+        }
+
+    def write(self, directory) -> Path:
+        """Writes original.docx, modified.docx and manifest.json into directory."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        (directory / 'original.docx').write_bytes(self.original)
+        (directory / 'modified.docx').write_bytes(self.modified)
+        (directory / 'manifest.json').write_text(json.dumps(self.manifest(), indent=2), encoding='utf-8')
+        return directory
+
+
+def generate_pair(pages: int = 10, insertions: int = 0, deletions: int = 0, moves: int = 0,
+                  format_changes: int = 0, table_edits: int = 0, table_density: float = 0.0,
+                  images: int = 0, fragmentation: float = 0.0, seed: int = 0) -> SyntheticPair:
+    """
+    Builds a pair of documents of about pages pages, the modified one differing by exactly the
+    requested number of edits of each kind. Each edit touches a different block, so they never
+    overlap. table_density is the fraction of body blocks that are 4x3 tables, and images are
+    spread evenly through both documents.
+
+    fragmentation is the chance that a paragraph's text is split across several identically
+    formatted runs, decided independently for each document, as Word does when a paragraph
+    is edited over several sessions; like Word's, each such run carries its session's rsid.
+    It changes the markup but not the content, so it must not produce revisions.
+
+    Raises ValueError if the document has too few paragraphs or tables for the edits asked for.
+    """
+    parameters = dict(pages=pages, insertions=insertions, deletions=deletions, moves=moves,
+                      format_changes=format_changes, table_edits=table_edits, table_density=table_density,
+                      images=images, fragmentation=fragmentation, seed=seed)
+    for name, value in parameters.items():
+        if value < 0:
+            raise ValueError(f"{name} must not be negative, got {value!r}")
+
+    rng = random.Random(seed)
+    blocks = _build_blocks(pages, table_density, rng)
+    modified_blocks, revisions = _edit_blocks(blocks, insertions, deletions, moves, format_changes,
+                                              table_edits, rng)
+
+    # Both documents share one image seed, so the images themselves never differ.
+    original = _render(blocks, images, fragmentation, random.Random(f'{seed}-original'), random.Random(seed))
+    modified = _render(modified_blocks, images, fragmentation, random.Random(f'{seed}-modified'),
+                       random.Random(seed))
+    return SyntheticPair(original, modified, revisions, parameters)
+
+
+def _sentence(rng: random.Random) -> str:
+    words = [rng.choice(_WORDS) for _ in range(rng.randint(6, 14))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraph(rng: random.Random, sentences: int = SENTENCES_PER_PARAGRAPH) -> dict:
+    # runs are (text, bold) pairs.
+    return {'type': 'p', 'runs': [(' '.join(_sentence(rng) for _ in range(sentences)), False)]}
+
+
+def _table(rng: random.Random) -> dict:
+    return {'type': 'tbl', 'cells': [[' '.join(rng.choice(_WORDS) for _ in range(3)) for _ in range(3)]
+                                     for _ in range(4)]}
+
+
+def _text(block: dict) -> str:
+    if block['type'] == 'p':
+        return ''.join(text for text, _ in block['runs'])
+    return ' | '.join(' '.join(row) for row in block['cells'])
+
+
+def _build_blocks(pages: int, table_density: float, rng: random.Random) -> List[dict]:
+    return [_table(rng) if rng.random() < table_density else _paragraph(rng)
+            for _ in range(pages * PARAGRAPHS_PER_PAGE)]
+
+
+def _edit_blocks(blocks, insertions, deletions, moves, format_changes, table_edits, rng):
+    """The modified block list and the ExpectedRevisions that produce it from blocks."""
+    paragraphs = [index for index, block in enumerate(blocks) if block['type'] == 'p']
+    tables = [index for index, block in enumerate(blocks) if block['type'] == 'tbl']
+    wanted = deletions + moves + format_changes
+    if wanted > len(paragraphs):
+        raise ValueError(f"{wanted} deletions, moves and format changes need as many paragraphs; "
+                         f"the document has {len(paragraphs)}. Increase pages.")
+    if table_edits > len(tables):
+        raise ValueError(f"{table_edits} table edits need as many tables; the document has {len(tables)}. "
+                         f"Increase pages or table_density.")
+
+    targets = rng.sample(paragraphs, wanted)
+    deleted = set(targets[:deletions])
+    moved = targets[deletions:deletions + moves]
+    formatted = set(targets[deletions + moves:])
+    edited_tables = set(rng.sample(tables, table_edits))
+
+    # Gaps (before block k, or at the end for k == len(blocks)) that receive new or moved paragraphs.
+    inserted_at = Counter(rng.randrange(len(blocks) + 1) for _ in range(insertions))
+    moved_to = defaultdict(list)
+    for source in moved:
+        # Far enough that it cannot be mistaken for an edit in place.
+        choices = [gap for gap in range(len(blocks) + 1) if abs(gap - source) > 2] or [len(blocks)]
+        moved_to[rng.choice(choices)].append(source)
+
+    modified = []
+    revisions = []
+    for gap in range(len(blocks) + 1):
+        for _ in range(inserted_at[gap]):
+            block = _paragraph(rng, sentences=2)
+            revisions.append(ExpectedRevision('insert', None, len(modified), _text(block)))
+            modified.append(block)
+        for source in moved_to[gap]:
+            revisions.append(ExpectedRevision('move', source, len(modified), _text(blocks[source])))
+            modified.append(blocks[source])
+        if gap == len(blocks):
+            break
+
+        block = blocks[gap]
+        if gap in deleted:
+            revisions.append(ExpectedRevision('delete', gap, None, _text(block)))
+            continue
+        if gap in moved:
+            continue
+        if gap in formatted:
+            block, text = _embolden(block, rng)
+            revisions.append(ExpectedRevision('format', gap, len(modified), text))
+        elif gap in edited_tables:
+            block, old, new = _edit_cell(block, rng)
+            revisions.append(ExpectedRevision('table_edit', gap, len(modified), old, new_text=new))
+        modified.append(block)
+
+    revisions.sort(key=lambda revision: (EDIT_KINDS.index(revision.kind), revision.original_block or 0,
+                                         revision.modified_block or 0))
+    return modified, revisions
+
+
+def _embolden(block: dict, rng: random.Random):
+    """A copy of paragraph block with a few consecutive words made bold, and those words."""
+    words = _text(block).split(' ')
+    start = rng.randrange(len(words) - 4)
+    end = start + rng.randint(2, 4)
+    bold = ' '.join(words[start:end])
+    runs = [(' '.join(words[:start]) + ' ', False), (bold, True), (' ' + ' '.join(words[end:]), False)]
+    return {'type': 'p', 'runs': [run for run in runs if run[0].strip()]}, bold
+
+
+def _edit_cell(block: dict, rng: random.Random):
+    """A copy of table block with one cell's text replaced; returns (block, old, new)."""
+    cells = [list(row) for row in block['cells']]
+    row, column = rng.randrange(len(cells)), rng.randrange(len(cells[0]))
+    old = cells[row][column]
+    new = old
+    while new == old:
+        new = ' '.join(rng.choice(_WORDS) for _ in range(3))
+    cells[row][column] = new
+    return {'type': 'tbl', 'cells': cells}, old, new
+
+
+def _png(rng: random.Random, size: int = 64) -> bytes:
+    """A size x size RGB PNG of noise, so every image is distinct and incompressible."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    rows = b''.join(b'\0' + bytes(rng.getrandbits(8) for _ in range(size * 3)) for _ in range(size))
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', zlib.compress(rows)) + chunk(b'IEND', b'')
+
+
+def _run_xml(text: str, bold: bool, rsid: str = '') -> str:
+    properties = '<w:rPr><w:b/></w:rPr>' if bold else ''
+    attributes = f' w:rsidR="{rsid}"' if rsid else ''
+    return f'<w:r{attributes}>{properties}<w:t xml:space="preserve">{escape(text)}</w:t></w:r>'
+
+
+def _fragment(text: str, rng: random.Random) -> List[str]:
+    """text cut at word boundaries into 2-4 pieces that join back to exactly text."""
+    words = text.split(' ')
+    if len(words) < 4:
+        return [text]
+    cuts = sorted(rng.sample(range(1, len(words)), min(rng.randint(1, 3), len(words) - 1)))
+    pieces = [' '.join(words[start:end]) for start, end in zip([0] + cuts, cuts + [len(words)])]
+    # Keep the separating spaces inside the runs.
+    return [piece + ' ' for piece in pieces[:-1]] + [pieces[-1]]
+
+
+def _block_xml(block: dict, fragmentation: float, rng: random.Random) -> str:
+    if block['type'] == 'tbl':
+        rows = ''.join(
+            '<w:tr>' + ''.join(f'<w:tc><w:p>{_run_xml(cell, False)}</w:p></w:tc>' for cell in row) + '</w:tr>'
+            for row in block['cells'])
+        return f'<w:tbl><w:tblPr><w:tblW w:w="0" w:type="auto"/></w:tblPr>{rows}</w:tbl>'
+
+    if not (fragmentation and rng.random() < fragmentation):
+        return f'<w:p>{"".join(_run_xml(text, bold) for text, bold in block["runs"])}</w:p>'
+    runs = ''.join(_run_xml(piece, bold, f'{rng.getrandbits(32):08X}')
+                   for text, bold in block['runs']
+                   for piece in _fragment(text, rng))
+    return f'<w:p w:rsidR="{rng.getrandbits(32):08X}">{runs}</w:p>'
+
+
+def _render(blocks, images: int, fragmentation: float, rng: random.Random, image_rng: random.Random) -> bytes:
+    every = max(len(blocks) // images, 1) if images else 0
+    body = []
+    image_rels = []
+    media = {}
+    for index, block in enumerate(blocks):
+        body.append(_block_xml(block, fragmentation, rng))
+        if images and index % every == 0 and len(media) < images:
+            number = len(media) + 1
+            body.append(f'<w:p>{_IMAGE_RUN.format(number)}</w:p>')
+            image_rels.append(_IMAGE_REL.format(number))
+            media[f'word/media/image{number}.png'] = _png(image_rng)
+
+    document = (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                f'<w:document xmlns:w="{_W_NS}" xmlns:r="{_R_NS}"><w:body>{"".join(body)}'
+                f'<w:sectPr/></w:body></w:document>')
+    document_rels = ('<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+                     f'{"".join(image_rels)}</Relationships>')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as docx:
+        # A fixed timestamp keeps the output byte-for-byte reproducible.
+        def add(name, data, compress_type=zipfile.ZIP_DEFLATED):
+            docx.writestr(zipfile.ZipInfo(name, date_time=(1980, 1, 1, 0, 0, 0)), data, compress_type=compress_type)
+
+        add('[Content_Types].xml', _CONTENT_TYPES)
+        add('_rels/.rels', _ROOT_RELS)
+        add('word/document.xml', document)
+        add('word/_rels/document.xml.rels', document_rels)
+        for name, data in media.items():
+            add(name, data, compress_type=zipfile.ZIP_STORED)
+    return buffer.getvalue()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        prog='python benchmarks/synthetic.py',
+        description='Write a synthetic original.docx/modified.docx pair and its manifest.json.')
+    parser.add_argument('directory')
+    parser.add_argument('--pages', type=int, default=10)
+    for name in ('insertions', 'deletions', 'moves', 'format-changes', 'table-edits', 'images', 'seed'):
+        parser.add_argument(f'--{name}', type=int, default=0)
+    parser.add_argument('--table-density', type=float, default=0.0)
+    parser.add_argument('--fragmentation', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    try:
+        pair = generate_pair(args.pages, args.insertions, args.deletions, args.moves, args.format_changes,
+                             args.table_edits, args.table_density, args.images, args.fragmentation, args.seed)
+    except ValueError as e:
+        parser.error(str(e))
+    pair.write(args.directory)
+    counts = ', '.join(f'{count} {kind}' for kind, count in pair.expected_counts.items() if count)
+    print(f"Wrote {args.directory}: {len(pair.original)} / {len(pair.modified)} bytes; {counts or 'no edits'}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -12,12 +12,19 @@ Usage:
 
 Valid RIDs: linux-x64, linux-arm64, win-x64, win-arm64, osx-x64, osx-arm64
 """
+import hashlib
+import io
+import json
 import os
 import subprocess
 import sys
 import tarfile
 import zipfile
 
+# Integrity manifest stored at the root of every archive; python_redlines verifies
+# each extracted file against it before using the binary.
+MANIFEST_NAME = ".redlines-manifest.json"
+
 RIDS = ["linux-x64", "linux-arm64", "win-x64", "win-arm64", "osx-x64", "osx-arm64"]
 
 ENGINES = [
@@ -58,22 +65,46 @@ def archive_name(rid):
     return f"{rid}.zip" if rid.startswith("win-") else f"{rid}.tar.gz"
 
 
+def sha256_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_manifest(files):
+    """JSON manifest of the size and SHA-256 of each (full path, archive name) pair."""
+    manifest = {
+        "files": {
+            arcname.replace(os.sep, "/"): {"size": os.path.getsize(full), "sha256": sha256_file(full)}
+            for full, arcname in files
+        }
+    }
+    return json.dumps(manifest, indent=2, sort_keys=True).encode("utf-8")
+
+
 def compress_dir(source_dir, target_file):
-    """Compress the contents of source_dir (flat, no parent prefix) into target_file."""
+    """Compress the contents of source_dir (flat, no parent prefix) plus a manifest into target_file."""
     files = []
     for root, _, names in os.walk(source_dir):
         for name in names:
             full = os.path.join(root, name)
             files.append((full, os.path.relpath(full, source_dir)))
+    manifest = build_manifest(files)
 
     if target_file.endswith(".tar.gz"):
         with tarfile.open(target_file, "w:gz") as tar:
             for full, arcname in files:
                 tar.add(full, arcname=arcname)
+            info = tarfile.TarInfo(MANIFEST_NAME)
+            info.size = len(manifest)
+            tar.addfile(info, io.BytesIO(manifest))
     elif target_file.endswith(".zip"):
         with zipfile.ZipFile(target_file, "w", zipfile.ZIP_DEFLATED) as zf:
             for full, arcname in files:
                 zf.write(full, arcname=arcname)
+            zf.writestr(MANIFEST_NAME, manifest)
     else:
         raise ValueError(f"Unsupported archive format: {target_file}")
 
@@ -1,16 +1,52 @@
 using System;
+using System.Buffers.Binary;
+using System.Diagnostics;
 using System.IO;
+using System.Text;
+using System.Text.Json;
 using OpenXmlPowerTools;
 using DocumentFormat.OpenXml.Packaging;
 
 class Program
 {
-    static void Main(string[] args)
+    static int Main(string[] args)
     {
+        if (args.Length == 1 && args[0] == "--worker")
+        {
+            return ServeWorker();
+        }
+
+        return Run(args);
+    }
+
+    // "-" in place of a path streams that document through stdin/stdout instead of
+    // the filesystem. Each "-" input is read from stdin, in argument order, as an
+    // 8-byte big-endian length followed by the .docx bytes. A "-" output is written
+    // to stdout as StdioMagic, an 8-byte big-endian length and the redline bytes,
+    // followed by the usual summary text. Errors go to stderr with exit code 1.
+    static readonly byte[] StdioMagic = Encoding.ASCII.GetBytes("RDLN");
+
+    // --json before the positional arguments replaces the summary text with one
+    // line of JSON: {"ok": true, "summary", "revisions": {"total", "insert",
+    // "delete", "move", "format"}, "timings_ms": {"read", "compare", "revisions",
+    // "write"}, "sizes": {"original", "modified", "redline"}}. A failure is
+    // {"ok": false, "error": {"type", "message"}} with exit code 1.
+    const string JsonFlag = "--json";
+
+    static int Run(string[] args, bool allowStdio = true)
+    {
+        bool json = args.Length > 0 && args[0] == JsonFlag;
+        if (json)
+        {
+            args = args[1..];
+        }
+
         if (args.Length != 4)
         {
-            Console.WriteLine("Usage: redlines <author_tag> <original_path.docx> <modified_path.docx> <redline_path.docx>");
-            return;
+            Console.WriteLine("Usage: redlines [--json] <author_tag> <original_path.docx> <modified_path.docx> <redline_path.docx>");
+            Console.WriteLine("       redlines --worker");
+            Console.WriteLine("Pass - for a path to stream that document through stdin/stdout.");
+            return 0;
         }
 
         string authorTag = args[0];
@@ -18,18 +54,28 @@ class Program
         string modifiedFilePath = args[2];
         string outputFilePath = args[3];
 
-        if (!File.Exists(originalFilePath) || !File.Exists(modifiedFilePath))
+        bool originalFromStdin = allowStdio && originalFilePath == "-";
+        bool modifiedFromStdin = allowStdio && modifiedFilePath == "-";
+        bool outputToStdout = allowStdio && outputFilePath == "-";
+        bool stdio = originalFromStdin || modifiedFromStdin || outputToStdout;
+
+        if ((!originalFromStdin && !File.Exists(originalFilePath)) || (!modifiedFromStdin && !File.Exists(modifiedFilePath)))
         {
-            Console.WriteLine("Error: One or both files do not exist.");
-            return;
+            return Fail(json, "FileNotFoundException", "One or both files do not exist.", null);
         }
 
         try
         {
-            var originalBytes = File.ReadAllBytes(originalFilePath);
-            var modifiedBytes = File.ReadAllBytes(modifiedFilePath);
-            var originalDocument = new WmlDocument(originalFilePath, originalBytes);
-            var modifiedDocument = new WmlDocument(modifiedFilePath, modifiedBytes);
+            var timings = new Dictionary<string, double>();
+            var stopwatch = Stopwatch.StartNew();
+
+            using var stdin = stdio ? Console.OpenStandardInput() : Stream.Null;
+            using var stdout = outputToStdout ? Console.OpenStandardOutput() : Stream.Null;
+            var originalBytes = originalFromStdin ? ReadBlob(stdin) : File.ReadAllBytes(originalFilePath);
+            var modifiedBytes = modifiedFromStdin ? ReadBlob(stdin) : File.ReadAllBytes(modifiedFilePath);
+            var originalDocument = new WmlDocument(originalFromStdin ? "original.docx" : originalFilePath, originalBytes);
+            var modifiedDocument = new WmlDocument(modifiedFromStdin ? "modified.docx" : modifiedFilePath, modifiedBytes);
+            timings["read"] = Lap(stopwatch);
 
             var comparisonSettings = new WmlComparerSettings
             {
@@ -38,19 +84,242 @@ class Program
             };
 
             var comparisonResults = WmlComparer.Compare(originalDocument, modifiedDocument, comparisonSettings);
+            timings["compare"] = Lap(stopwatch);
             var revisions = WmlComparer.GetRevisions(comparisonResults, comparisonSettings);
+            timings["revisions"] = Lap(stopwatch);
 
             // Output results
-            Console.WriteLine($"Revisions found: {revisions.Count}");
+            string summary = $"Revisions found: {revisions.Count}";
+            var redlineBytes = comparisonResults.DocumentByteArray;
+
+            if (outputToStdout)
+            {
+                stdout.Write(StdioMagic, 0, StdioMagic.Length);
+                WriteBlob(stdout, redlineBytes);
+                stdout.Flush();
+            }
+            else
+            {
+                File.WriteAllBytes(outputFilePath, redlineBytes);
+            }
+            timings["write"] = Lap(stopwatch);
+
+            string report = summary;
+            if (json)
+            {
+                var counts = new Dictionary<string, int>
+                {
+                    ["total"] = revisions.Count,
+                    ["insert"] = 0,
+                    ["delete"] = 0,
+                    ["move"] = 0,
+                    ["format"] = 0,
+                };
+                foreach (var revision in revisions)
+                {
+                    var kind = RevisionKind(revision.RevisionType.ToString());
+                    counts[kind] = counts.GetValueOrDefault(kind) + 1;
+                }
 
-            File.WriteAllBytes(outputFilePath, comparisonResults.DocumentByteArray);
+                report = JsonSerializer.Serialize(new Dictionary<string, object>
+                {
+                    ["ok"] = true,
+                    ["summary"] = summary,
+                    ["revisions"] = counts,
+                    ["timings_ms"] = timings,
+                    ["sizes"] = new Dictionary<string, long>
+                    {
+                        ["original"] = originalBytes.Length,
+                        ["modified"] = modifiedBytes.Length,
+                        ["redline"] = redlineBytes.Length,
+                    },
+                });
+            }
+
+            if (outputToStdout)
+            {
+                // After the redline blob, on the stream the blob was written to.
+                var reportBytes = Encoding.UTF8.GetBytes(report + Environment.NewLine);
+                stdout.Write(reportBytes, 0, reportBytes.Length);
+                stdout.Flush();
+            }
+            else
+            {
+                Console.WriteLine(report);
+            }
         }
         catch (Exception ex)
         {
-            Console.WriteLine($"Error: {ex.Message}");
-            Console.WriteLine("Detailed Stack Trace:");
-            Console.WriteLine(ex.StackTrace);
+            return Fail(json, ex.GetType().Name, ex.Message, ex.StackTrace);
         }
+
+        return 0;
+    }
+
+    // Reports a failed comparison and returns its exit code. Errors used to go to
+    // stdout with exit code 0, leaving callers to notice an empty redline later.
+    static int Fail(bool json, string type, string message, string? stackTrace)
+    {
+        Console.Error.WriteLine($"Error: {message}");
+        if (stackTrace != null)
+        {
+            Console.Error.WriteLine(stackTrace);
+        }
+        if (json)
+        {
+            Console.WriteLine(JsonSerializer.Serialize(new Dictionary<string, object>
+            {
+                ["ok"] = false,
+                ["error"] = new Dictionary<string, string> { ["type"] = type, ["message"] = message },
+            }));
+        }
+        return 1;
+    }
+
+    static double Lap(Stopwatch stopwatch)
+    {
+        double elapsed = stopwatch.Elapsed.TotalMilliseconds;
+        stopwatch.Restart();
+        return elapsed;
+    }
+
+    // Buckets a WmlComparer revision type (Inserted, Deleted, and in some
+    // versions moves and formatting changes) into the keys the JSON reports.
+    static string RevisionKind(string revisionType)
+    {
+        if (revisionType.StartsWith("Insert")) return "insert";
+        if (revisionType.StartsWith("Delet")) return "delete";
+        if (revisionType.StartsWith("Move")) return "move";
+        if (revisionType.Contains("Format")) return "format";
+        return revisionType.ToLowerInvariant();
+    }
+
+    static byte[] ReadBlob(Stream stream)
+    {
+        var header = new byte[8];
+        if (!ReadExactly(stream, header))
+        {
+            throw new EndOfStreamException("Expected a document on stdin.");
+        }
+
+        var blob = new byte[checked((int)BinaryPrimitives.ReadInt64BigEndian(header))];
+        if (!ReadExactly(stream, blob))
+        {
+            throw new EndOfStreamException("Truncated document on stdin.");
+        }
+        return blob;
+    }
+
+    static void WriteBlob(Stream stream, byte[] blob)
+    {
+        var header = new byte[8];
+        BinaryPrimitives.WriteInt64BigEndian(header, blob.Length);
+        stream.Write(header, 0, header.Length);
+        stream.Write(blob, 0, blob.Length);
+    }
+
+    // Worker mode: one long-lived process runs many comparisons, so callers pay
+    // the runtime startup and JIT cost once. Each job is a frame holding
+    // {"args": [...]} - the same four arguments the one-shot CLI takes - and is
+    // answered with a frame holding {"exit_code", "stdout", "stderr"}. A frame
+    // is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON.
+    // The worker exits cleanly when stdin is closed.
+    static int ServeWorker()
+    {
+        using var input = Console.OpenStandardInput();
+        using var output = Console.OpenStandardOutput();
+
+        while (true)
+        {
+            byte[]? request = ReadFrame(input);
+            if (request == null)
+            {
+                return 0;
+            }
+
+            var stdout = new StringWriter();
+            var stderr = new StringWriter();
+            int exitCode;
+
+            // Anything a job writes to the console is captured for its response;
+            // it must never reach the real stdout, which carries the frames.
+            Console.SetOut(stdout);
+            Console.SetError(stderr);
+            try
+            {
+                using var job = JsonDocument.Parse(request);
+                var jobArgs = new List<string>();
+                foreach (var arg in job.RootElement.GetProperty("args").EnumerateArray())
+                {
+                    jobArgs.Add(arg.GetString() ?? "");
+                }
+                // The worker's own stdin/stdout carry frames, so jobs cannot stream through them.
+                exitCode = Run(jobArgs.ToArray(), allowStdio: false);
+            }
+            catch (Exception ex)
+            {
+                stderr.WriteLine($"Error: {ex.Message}");
+                exitCode = 1;
+            }
+            finally
+            {
+                Console.SetOut(TextWriter.Null);
+                Console.SetError(TextWriter.Null);
+            }
+
+            var response = new Dictionary<string, object>
+            {
+                ["exit_code"] = exitCode,
+                ["stdout"] = stdout.ToString(),
+                ["stderr"] = stderr.ToString(),
+            };
+            WriteFrame(output, JsonSerializer.SerializeToUtf8Bytes(response));
+        }
+    }
+
+    static byte[]? ReadFrame(Stream stream)
+    {
+        var header = new byte[4];
+        if (!ReadExactly(stream, header))
+        {
+            return null;
+        }
+
+        var payload = new byte[BinaryPrimitives.ReadInt32BigEndian(header)];
+        if (!ReadExactly(stream, payload))
+        {
+            throw new EndOfStreamException("Truncated worker frame.");
+        }
+        return payload;
+    }
+
+    // Fills buffer from stream. Returns false on a clean end of stream before
+    // the first byte; throws if the stream ends part-way through.
+    static bool ReadExactly(Stream stream, byte[] buffer)
+    {
+        int offset = 0;
+        while (offset < buffer.Length)
+        {
+            int read = stream.Read(buffer, offset, buffer.Length - offset);
+            if (read == 0)
+            {
+                if (offset == 0)
+                {
+                    return false;
+                }
+                throw new EndOfStreamException("Truncated worker frame.");
+            }
+            offset += read;
+        }
+        return true;
     }
-}
 
+    static void WriteFrame(Stream stream, byte[] payload)
+    {
+        var header = new byte[4];
+        BinaryPrimitives.WriteInt32BigEndian(header, payload.Length);
+        stream.Write(header, 0, header.Length);
+        stream.Write(payload, 0, payload.Length);
+        stream.Flush();
+    }
+}
@@ -3,17 +3,37 @@
 # SPDX-License-Identifier: MIT
 
 from .__about__ import __version__
+from .cache import CacheStats, RedlineCache
 from .engines import (
     BaseEngine,
+    BatchResult,
     DocxodusEngine,
+    EngineCPULimitError,
+    EngineLimitError,
+    EngineMemoryLimitError,
     EngineNotInstalledError,
+    EngineTimeoutError,
     XmlPowerToolsEngine,
 )
+from .metrics import RunMetrics
+from .result import EngineError, RedlineResult
+from .worker import WorkerEngine
 
 __all__ = [
     "BaseEngine",
+    "BatchResult",
     "XmlPowerToolsEngine",
     "DocxodusEngine",
     "EngineNotInstalledError",
+    "EngineError",
+    "RedlineResult",
+    "RunMetrics",
+    "EngineLimitError",
+    "EngineTimeoutError",
+    "EngineMemoryLimitError",
+    "EngineCPULimitError",
+    "RedlineCache",
+    "CacheStats",
+    "WorkerEngine",
     "__version__",
 ]
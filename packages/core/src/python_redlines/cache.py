@@ -0,0 +1,220 @@
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import BinaryIO, Callable, Optional, Tuple, Union
+
+import platformdirs
+
+from .result import RedlineResult
+
+logger = logging.getLogger(__name__)
+
+# Temp files left behind by a writer that died mid-write are swept after this long.
+_STALE_TEMP_SECONDS = 3600
+
+# Puts between full scans of the directory while the cache looks under max_size. A scan
+# picks up what other processes have written and sweeps stale temp files.
+_RESCAN_PUTS = 256
+
+
+@dataclass
+class CacheStats:
+    """Counters for one RedlineCache instance (this process only)."""
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class RedlineCache(object):
+    """
+    On-disk, content-addressed store of redline results, shared safely between processes.
+
+    Entries are keyed by a digest the engine computes from both inputs, the author tag, the
+    normalized engine options and the engine binary version (see BaseEngine._cache_key), so a
+    hit is always byte-for-byte what the engine would have produced. Each entry is a
+    ``<key>.docx`` redline plus a ``<key>.json`` holding the rest of the RedlineResult. Both are written to a
+    temp file and renamed into place, the JSON last, so readers never see a partial entry.
+    When the cache grows past max_size bytes, the least recently used entries are evicted.
+    The size is tracked as entries are written, so a put only scans the directory when the
+    cache looks full, and every few hundred puts to catch up with other processes.
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_size: int = 1024 ** 3):
+        if directory is None:
+            directory = Path(platformdirs.user_cache_dir('python-redlines')) / 'results'
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+        # Bytes on disk as of the last scan plus what this instance wrote since; None until the first scan.
+        self._size: Optional[int] = None
+        self._puts_since_scan = 0
+
+    def get(self, key: str) -> Optional[RedlineResult]:
+        """Returns the cached RedlineResult for key, or None on a miss."""
+        hit = self.lookup(key)
+        if hit is None:
+            return None
+        data_path, result = hit
+        try:
+            result.redline = data_path.read_bytes()
+        except OSError:
+            # Evicted by another process since the lookup; the hit was already counted.
+            return None
+        return result
+
+    def lookup(self, key: str) -> Optional[Tuple[Path, RedlineResult]]:
+        """
+        Returns (redline_path, result) for key without reading the redline, which is left out
+        of result, or None on a miss. Another process may evict the entry at any time, so
+        callers copying from redline_path must handle FileNotFoundError.
+        """
+        meta_path, data_path = self._entry_paths(key)
+        try:
+            meta = json.loads(meta_path.read_text(encoding='utf-8'))
+            # Recency for LRU eviction; atime is too often disabled to rely on.
+            os.utime(data_path)
+        except (OSError, ValueError):
+            # Missing, evicted by another process mid-read, or unreadable: all misses.
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        # Entries written before results carried revision counts hold only stdout/stderr.
+        return data_path, RedlineResult(
+            None, meta.get('stdout'), meta.get('stderr'), revisions=meta.get('revisions'),
+            revisions_by_type=meta.get('revisions_by_type') or {}, sizes=meta.get('sizes') or {})
+
+    def put(self, key: str, result: Union[RedlineResult, Tuple[bytes, Optional[str], Optional[str]]]):
+        """Stores a RedlineResult (or (redline, stdout, stderr) tuple) under key, then evicts if over max_size."""
+        redline = result[0]
+        self._put(key, lambda handle: handle.write(redline), result)
+
+    def put_file(self, key: str, redline_path, result: RedlineResult):
+        """Like put(), but copies the redline from a file rather than holding it in memory."""
+        def copy(handle):
+            with open(redline_path, 'rb') as source:
+                shutil.copyfileobj(source, handle, 1024 * 1024)
+
+        self._put(key, copy, result)
+
+    def _put(self, key: str, write_redline: Callable[[BinaryIO], object], result):
+        meta_path, data_path = self._entry_paths(key)
+        data_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Timings describe one engine run, not the comparison, so they are not kept.
+        _, stdout, stderr = result
+        fields = {'stdout': stdout, 'stderr': stderr}
+        if isinstance(result, RedlineResult):
+            fields.update(revisions=result.revisions, revisions_by_type=result.revisions_by_type,
+                          sizes=result.sizes)
+        meta = json.dumps(fields).encode('utf-8')
+
+        replaced = self._size_of(meta_path) + self._size_of(data_path)
+        self._write_atomic(data_path, write_redline)
+        self._write_atomic(meta_path, lambda handle: handle.write(meta))
+        self._count('writes')
+
+        added = self._size_of(meta_path) + self._size_of(data_path) - replaced
+        with self._lock:
+            self._puts_since_scan += 1
+            if self._size is not None:
+                self._size += added
+            scan = self._size is None or self._size > self.max_size or self._puts_since_scan >= _RESCAN_PUTS
+        if scan:
+            self._evict()
+
+    def clear(self):
+        """Removes every entry from the cache directory."""
+        for path in self._files():
+            self._remove(path)
+
+    def _entry_paths(self, key: str) -> Tuple[Path, Path]:
+        shard = self.directory / key[:2]
+        return shard / f'{key}.json', shard / f'{key}.docx'
+
+    @staticmethod
+    def _write_atomic(path: Path, write: Callable[[BinaryIO], object]):
+        fd, temp_path = tempfile.mkstemp(dir=path.parent, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as handle:
+                write(handle)
+            os.replace(temp_path, path)
+        except BaseException:
+            RedlineCache._remove(temp_path)
+            raise
+
+    @staticmethod
+    def _size_of(path: Path) -> int:
+        try:
+            return path.stat().st_size
+        except OSError:
+            return 0
+
+    def _evict(self):
+        """Scans the directory, sweeping stale temp files, and evicts down to max_size."""
+        entries = []
+        total = 0
+        now = time.time()
+        for path in self._files():
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            if path.name.startswith('.tmp-'):
+                if now - stat.st_mtime > _STALE_TEMP_SECONDS:
+                    self._remove(path)
+                continue
+            total += stat.st_size
+            if path.suffix == '.docx':
+                entries.append((stat.st_mtime, path))
+
+        if total > self.max_size:
+            for _, data_path in sorted(entries):
+                meta_path = data_path.with_suffix('.json')
+                for path in (meta_path, data_path):
+                    try:
+                        total -= path.stat().st_size
+                    except OSError:
+                        continue
+                    self._remove(path)
+                self._count('evictions')
+                if total <= self.max_size:
+                    break
+
+        with self._lock:
+            self._size = total
+            self._puts_since_scan = 0
+
+    def _files(self):
+        if not self.directory.is_dir():
+            return
+        for shard in self.directory.iterdir():
+            if shard.is_dir():
+                yield from shard.iterdir()
+
+    @staticmethod
+    def _remove(path):
+        # Another process may have evicted it first; that is fine.
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove cache file %s: %s", path, e)
+
+    def _count(self, counter: str):
+        with self._lock:
+            setattr(self.stats, counter, getattr(self.stats, counter) + 1)
@@ -0,0 +1,200 @@
+"""
+Content comparison of .docx files that ignores what Word changes on every save.
+
+Re-saving a document without editing it changes its bytes: new zip timestamps, a new
+modified date in docProps/core.xml, fresh revision-save IDs (rsids) and paragraph IDs,
+moved proofing marks. None of that is a revision, so two such files produce an empty
+redline, but finding that out by running an engine costs a .NET process start and a full
+comparison. same_content() answers it directly by streaming the parts that hold document
+content and comparing them with that churn removed.
+
+Compared: the main document, headers, footers, footnotes, endnotes, comments, list
+numbering, styles and embedded media. Relationship ids (r:id, r:embed) are compared as the
+targets they resolve to, so a changed hyperlink address is a difference and renumbered ids
+are not. Ignored: package metadata (docProps), settings, themes, zip layout, rsids and
+paragraph/text ID attributes, proofing marks, rendering hints and Word's _GoBack bookmark.
+"""
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+from itertools import zip_longest
+from pathlib import Path
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple, Union
+from xml.etree import ElementTree
+
+_W = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+_W14 = '{http://schemas.microsoft.com/office/word/2010/wordml}'
+_R = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+_RELATIONSHIP = '{http://schemas.openxmlformats.org/package/2006/relationships}Relationship'
+
+# Parts holding document content, compared as canonical XML.
+_CONTENT_PARTS = re.compile(
+    r'word/(document|header\d*|footer\d*|footnotes|endnotes|comments|numbering|styles)\.xml', re.IGNORECASE)
+# Parts compared byte for byte.
+_MEDIA_PARTS = re.compile(r'word/(media|embeddings)/', re.IGNORECASE)
+
+# Elements dropped with everything inside them.
+_IGNORED_ELEMENTS = frozenset({
+    _W + 'proofErr',                # spelling and grammar marks
+    _W + 'lastRenderedPageBreak',   # where the last layout happened to break pages
+    _W + 'rsid',                    # the save that last touched a style
+})
+# Attributes Word regenerates on save.
+_IGNORED_ATTRIBUTES = frozenset({_W14 + 'paraId', _W14 + 'textId'})
+# Elements whose text is document text, where whitespace matters.
+_TEXT_ELEMENTS = frozenset({_W + 't', _W + 'delText', _W + 'instrText', _W + 'delInstrText'})
+
+_MEDIA_CHUNK = 1024 * 1024
+
+Document = Union[str, bytes, Path, BinaryIO]
+Token = Tuple
+
+
+def same_content(original: Document, modified: Document) -> bool:
+    """
+    Whether the two documents have the same content, so that a redline of them would have no
+    revisions. Stops reading at the first difference. Returns False, rather than raising, for
+    anything that cannot be compared: a file that is not a .docx, or a non-seekable stream.
+    File objects are left at the position they started at.
+    """
+    try:
+        for left, right in zip_longest(_tokens(original), _tokens(modified)):
+            if left != right:
+                return False
+    except (ValueError, OSError, zipfile.BadZipFile, ElementTree.ParseError):
+        return False
+    return True
+
+
+def canonical_hash(document: Document) -> str:
+    """
+    SHA-256 hex digest of the document's content: equal for two documents exactly when
+    same_content() is true of them. Raises ValueError if the document is not a readable .docx.
+    """
+    digest = hashlib.sha256()
+    try:
+        for token in _tokens(document):
+            digest.update(repr(token).encode('utf-8'))
+            digest.update(b'\0')
+    except (zipfile.BadZipFile, ElementTree.ParseError) as e:
+        raise ValueError(f"Not a readable .docx file: {e}") from e
+    return digest.hexdigest()
+
+
+def _tokens(document: Document) -> Iterator[Token]:
+    """The document's content as a stream of comparable tuples, one part after another."""
+    if isinstance(document, bytes):
+        document = io.BytesIO(document)
+    elif not hasattr(document, 'read'):
+        document = Path(document)
+
+    position = None
+    if not isinstance(document, Path):
+        if not document.seekable():
+            raise ValueError("A non-seekable stream cannot be compared without consuming it.")
+        position = document.tell()
+    try:
+        with zipfile.ZipFile(document) as archive:
+            names = sorted(archive.namelist())
+            by_lower_name = {name.lower(): name for name in names}
+            for name in names:
+                if _CONTENT_PARTS.fullmatch(name):
+                    yield ('part', name.lower())
+                    relationships = _relationships(archive, by_lower_name, name)
+                    with archive.open(name) as part:
+                        yield from _xml_tokens(part, relationships)
+                elif _MEDIA_PARTS.match(name) and not name.endswith('/'):
+                    yield ('media', name.lower(), _media_digest(archive, name))
+    finally:
+        if position is not None:
+            document.seek(position)
+
+
+def _media_digest(archive: zipfile.ZipFile, name: str) -> str:
+    digest = hashlib.sha256()
+    with archive.open(name) as part:
+        for chunk in iter(lambda: part.read(_MEDIA_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _relationships(archive: zipfile.ZipFile, by_lower_name: Dict[str, str], name: str) -> Dict[str, Tuple]:
+    """The part's relationship ids, each mapped to its target mode and resolved target."""
+    folder, _, base = name.rpartition('/')
+    rels_name = by_lower_name.get(f'{folder}/_rels/{base}.rels'.lower())
+    if rels_name is None:
+        return {}
+    relationships = {}
+    with archive.open(rels_name) as part:
+        for _, element in ElementTree.iterparse(part):
+            if element.tag != _RELATIONSHIP:
+                continue
+            mode = element.get('TargetMode', 'Internal')
+            target = element.get('Target', '')
+            if mode != 'External':
+                # Internal targets are relative to the part's folder, or absolute from the root.
+                target = posixpath.normpath(posixpath.join('/' + folder, target)).lower()
+            relationships[element.get('Id')] = (mode, target)
+    return relationships
+
+
+def _is_rsid(attribute: str) -> bool:
+    return attribute.startswith(_W + 'rsid')
+
+
+def _attribute_value(key: str, value: str, relationships: Dict[str, Tuple]):
+    """The value to compare: relationship ids are replaced with what they point to."""
+    if key.startswith(_R):
+        return relationships.get(value, value)
+    return value
+
+
+def _xml_tokens(part, relationships: Optional[Dict[str, Tuple]] = None) -> Iterator[Token]:
+    """
+    A part's canonical XML: a token per element start, with its attributes sorted and the
+    ignored ones removed, and one per element end, with its text and tail. Elements are
+    discarded as they end, so memory stays flat however large the part. Relationship ids
+    are resolved through relationships, the part's id -> target map.
+    """
+    relationships = relationships or {}
+    skipping = 0            # depth inside an ignored element
+    go_back_ids = set()     # bookmark ids of Word's _GoBack bookmark
+    stack = []
+    for event, element in ElementTree.iterparse(part, events=('start', 'end')):
+        tag = element.tag
+        if event == 'start':
+            stack.append(element)
+            if skipping or tag in _IGNORED_ELEMENTS or _is_go_back(element, go_back_ids):
+                skipping += 1
+                continue
+            attributes = tuple(sorted((key, _attribute_value(key, value, relationships))
+                                      for key, value in element.attrib.items()
+                                      if key not in _IGNORED_ATTRIBUTES and not _is_rsid(key)))
+            yield ('<', tag, attributes)
+            continue
+
+        stack.pop()
+        if skipping:
+            skipping -= 1
+            # The tail belongs to the parent's content, not to the skipped element.
+            if not skipping and element.tail and element.tail.strip():
+                yield ('tail', element.tail)
+        else:
+            text = element.text or ''
+            if tag not in _TEXT_ELEMENTS:
+                text = text.strip()
+            tail = (element.tail or '').strip()
+            yield ('>', text, tail)
+        element.clear()
+        if stack:
+            stack[-1].remove(element)
+
+
+def _is_go_back(element, go_back_ids: set) -> bool:
+    """Whether element starts or ends the _GoBack bookmark Word inserts at the last edit."""
+    if element.tag == _W + 'bookmarkStart' and element.get(_W + 'name') == '_GoBack':
+        go_back_ids.add(element.get(_W + 'id'))
+        return True
+    return element.tag == _W + 'bookmarkEnd' and element.get(_W + 'id') in go_back_ids
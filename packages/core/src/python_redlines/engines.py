@@ -1,26 +1,283 @@
+import asyncio
+import concurrent.futures
+import contextlib
+import functools
+import hashlib
 import importlib.metadata
 import importlib.resources
+import json
+import locale
 import logging
 import os
 import platform
+import shutil
+import signal
+import struct
 import subprocess
+import sys
 import tarfile
 import tempfile
+import threading
 import zipfile
+from dataclasses import dataclass
+from itertools import islice
 from pathlib import Path
-from typing import Optional, Tuple, Union
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple, Union
 
 import platformdirs
 
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
 from .__about__ import __version__
+from .cache import RedlineCache
+from .canonical import same_content
+from .metrics import RunMetrics
+from .media import MediaStash, restore_media, strip_media
+from .normalize import normalize_docx
+from .result import EngineError, RedlineResult
+from .sections import merge_sections, plan_sections
 
 logger = logging.getLogger(__name__)
 
+# A document to compare: its bytes, a path to it, or a binary file object open for reading.
+DocumentInput = Union[str, bytes, Path, BinaryIO]
+# Where to put the redline: None to return it as bytes, a path, or a binary file object.
+RedlineOutput = Union[str, Path, BinaryIO, None]
+
+# Chunk size for streaming documents between files.
+_COPY_CHUNK = 1024 * 1024
+
+# Text an engine prints when it runs out of memory: .NET's OutOfMemoryException (message or
+# type name), and Python's MemoryError for stand-in engines.
+_OUT_OF_MEMORY_MARKERS = (b'OutOfMemory', b'Insufficient memory', b'MemoryError')
+
+# How run_redline hands documents to the binary; see BaseEngine.__init__.
+IO_MODES = ('auto', 'tempfile', 'memfd', 'pipe')
+
+# Prefix of a redline streamed to stdout in pipe mode (see csproj/Program.cs).
+_STDIO_MAGIC = b'RDLN'
+_STDIO_LENGTH = struct.Struct('>Q')
+
+# Binaries that turned out to predate pipe mode; they get temp files from then on.
+_STDIO_UNSUPPORTED = set()
+
+# Binaries that turned out to predate JSON results; their summary text is parsed instead.
+_JSON_UNSUPPORTED = set()
+
+# Resolved binary paths, shared by every instance of an engine class using the same
+# extraction directory: {(engine class, target_path): path}. Guarded by _RESOLVE_LOCK.
+_RESOLVED_BINARIES: Dict[Tuple[type, Optional[str]], str] = {}
+_WARMED_BINARIES = set()
+_RESOLVE_LOCK = threading.Lock()
+
+# Written by build_differ.py into each binary archive: {"files": {path: {"size", "sha256"}}}.
+_MANIFEST_NAME = '.redlines-manifest.json'
+# Written last into a fully extracted and verified binary directory.
+_STAMP_NAME = '.redlines-extracted'
+
+
+def _is_readable(document) -> bool:
+    return hasattr(document, 'read')
+
+
+def _is_writable(output) -> bool:
+    return hasattr(output, 'write')
+
+
+def _needs_staging(document) -> bool:
+    """Bytes and file objects must be put in a file for the binary; paths are used as-is."""
+    return isinstance(document, bytes) or _is_readable(document)
+
+
+def _write_document(handle, document):
+    if isinstance(document, bytes):
+        handle.write(document)
+    else:
+        shutil.copyfileobj(document, handle, _COPY_CHUNK)
+
+
+def _parse_json_object(data: bytes) -> Optional[dict]:
+    """data parsed as a JSON object, or None if it is not one."""
+    if not data.lstrip().startswith(b'{'):
+        return None
+    try:
+        payload = json.loads(data)
+    except ValueError:
+        return None
+    return payload if isinstance(payload, dict) else None
+
+
+def memfd_supported() -> bool:
+    """Whether memfd I/O mode works here: Linux with os.memfd_create and a mounted /proc."""
+    return sys.platform.startswith('linux') and hasattr(os, 'memfd_create') and os.path.isdir('/proc/self/fd')
+
 
 class EngineNotInstalledError(ImportError):
     """Raised when an engine is used but its binary package is not installed."""
 
 
+class EngineLimitError(RuntimeError):
+    """
+    Raised when an engine process is stopped for exceeding a timeout or resource limit.
+    command is the command that was run and limit the limit it exceeded.
+    """
+
+    def __init__(self, message: str, command=None, limit=None):
+        super().__init__(message)
+        self.command = command
+        self.limit = limit
+
+
+class EngineTimeoutError(EngineLimitError, TimeoutError):
+    """The engine ran longer than its timeout (seconds of wall-clock time) and was killed."""
+
+
+class EngineMemoryLimitError(EngineLimitError):
+    """The engine ran out of memory under its max_memory limit (bytes)."""
+
+
+class EngineCPULimitError(EngineLimitError):
+    """The engine used more CPU time than its max_cpu_seconds limit and was killed."""
+
+
+@dataclass(frozen=True)
+class _Limits:
+    """The limits one engine run is held to; None means unlimited."""
+    timeout: Optional[float] = None
+    max_memory: Optional[int] = None
+    max_cpu_seconds: Optional[float] = None
+
+    def validate(self):
+        for name in ('timeout', 'max_memory', 'max_cpu_seconds'):
+            value = getattr(self, name)
+            if value is not None and value <= 0:
+                raise ValueError(f"{name} must be positive, got {value!r}")
+        if self.max_cpu_seconds is not None and resource is None:
+            raise ValueError("max_cpu_seconds is not supported on this platform.")
+        return self
+
+
+def _cpu_seconds(limits: _Limits) -> int:
+    """max_cpu_seconds as the whole number of seconds RLIMIT_CPU takes."""
+    return max(int(limits.max_cpu_seconds + 0.5), 1)
+
+
+def _rlimits(limits: _Limits) -> List[Tuple[int, Tuple[int, int]]]:
+    """The (resource, (soft, hard)) rlimits that apply limits' memory and CPU caps."""
+    if resource is None:
+        return []
+    rlimits = []
+    if limits.max_memory is not None:
+        # RLIMIT_DATA rather than RLIMIT_AS: .NET reserves far more address space than it
+        # ever commits, so an address-space limit would stop it from starting at all.
+        rlimits.append((resource.RLIMIT_DATA, (limits.max_memory, limits.max_memory)))
+    if limits.max_cpu_seconds is not None:
+        # SIGXCPU at the soft limit; the kernel sends SIGKILL at the hard one.
+        seconds = _cpu_seconds(limits)
+        rlimits.append((resource.RLIMIT_CPU, (seconds, seconds + 1)))
+    return rlimits
+
+
+def _limited_command(command, limits: _Limits) -> list:
+    """
+    command, wrapped if need be so the child is held to limits' rlimits.
+
+    No preexec_fn is used: it runs Python in the forked child, which can deadlock when other
+    threads exist (run_redline_many, arun_redline, callers' thread pools), and it rules out
+    posix_spawn. Where resource.prlimit exists (Linux), command is left alone and
+    _apply_rlimits sets the limits on the running child. Elsewhere a shell sets them with
+    ulimit and then execs command.
+    """
+    rlimits = _rlimits(limits)
+    if not rlimits or hasattr(resource, 'prlimit'):
+        return list(command)
+    script = []
+    for which, (soft, hard) in rlimits:
+        if which == resource.RLIMIT_DATA:
+            script.append(f'ulimit -d {max(soft // 1024, 1)}')
+        else:
+            script.append(f'ulimit -S -t {soft} && ulimit -H -t {hard}')
+    return ['/bin/sh', '-c', ' && '.join(script) + ' && exec "$@"', 'sh', *map(os.fspath, command)]
+
+
+def _apply_rlimits(pid: int, limits: _Limits):
+    """Sets limits' rlimits on the just-spawned process pid, where resource.prlimit exists."""
+    if not hasattr(resource, 'prlimit'):
+        return
+    for which, value in _rlimits(limits):
+        try:
+            resource.prlimit(pid, which, value)
+        except ProcessLookupError:
+            return  # it has exited already
+
+
+class _Spawn(NamedTuple):
+    """A request, yielded by BaseEngine._redline_steps, to run one engine process under limits."""
+    command: list
+    limits: _Limits
+    stdin: Optional[bytes]
+    pass_fds: tuple
+    metrics: Optional[RunMetrics]
+
+
+class _RusagePopen(subprocess.Popen):
+    """Popen that reaps its child with os.wait4, keeping the child's resource usage in rusage."""
+    rusage = None
+
+    def _try_wait(self, wait_flags):
+        # Mirrors Popen._try_wait, which uses os.waitpid and so discards the rusage.
+        try:
+            pid, sts, rusage = os.wait4(self.pid, wait_flags)
+        except ChildProcessError:
+            return self.pid, 0
+        if pid == self.pid:
+            self.rusage = rusage
+        return pid, sts
+
+
+def _document_size(document) -> Optional[int]:
+    if isinstance(document, bytes):
+        return len(document)
+    if _is_readable(document):
+        return None
+    try:
+        return os.path.getsize(document)
+    except OSError:
+        return None
+
+
+def _copy_document(document, output: RedlineOutput) -> Optional[bytes]:
+    """Returns document's bytes when there is no output, else copies it there in chunks."""
+    if output is None:
+        if isinstance(document, bytes):
+            return document
+        if _is_readable(document):
+            return document.read()
+        return Path(document).read_bytes()
+
+    with contextlib.ExitStack() as stack:
+        if not _is_readable(document) and not isinstance(document, bytes):
+            document = stack.enter_context(open(document, 'rb'))
+        handle = output if _is_writable(output) else stack.enter_context(open(output, 'wb'))
+        _write_document(handle, document)
+    return None
+
+
+@dataclass
+class BatchResult:
+    """The outcome of one pair from BaseEngine.run_redline_many."""
+    index: int                      # position of the pair in the input iterable
+    result: Optional[RedlineResult] = None  # run_redline's return value
+    error: Optional[Exception] = None  # set instead of result when this pair failed
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
 def _detect_rid() -> str:
     """Return the .NET-style runtime identifier for the current platform."""
     os_name = platform.system().lower()
@@ -42,6 +299,50 @@ def _detect_rid() -> str:
     raise EnvironmentError(f"Unsupported OS: {os_name}")
 
 
+@functools.lru_cache(maxsize=None)
+def _package_version(distribution: str) -> str:
+    try:
+        return importlib.metadata.version(distribution)
+    except importlib.metadata.PackageNotFoundError:
+        return __version__
+
+
+def _umask() -> int:
+    """The process umask; os.umask can only be read by setting it, so it is put straight back."""
+    mask = os.umask(0o077)
+    os.umask(mask)
+    return mask
+
+
+@contextlib.contextmanager
+def _file_lock(path: Path):
+    """Holds an exclusive advisory lock on path (created if needed) across processes."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a+b') as handle:
+        if os.name == 'nt':
+            import msvcrt
+            handle.seek(0)
+            while True:
+                try:
+                    # LK_LOCK itself gives up after ~10 seconds; keep waiting.
+                    msvcrt.locking(handle.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                handle.seek(0)
+                msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(handle.fileno(), fcntl.LOCK_UN)
+
+
 class BaseEngine(object):
     """
     Base class for redline comparison engines. Each engine ships its compiled
@@ -49,14 +350,129 @@ class BaseEngine(object):
       - BINARY_PACKAGE: importable package name that ships the binary archives
       - BINARY_BASE_NAME: the executable name (without .exe extension)
       - EXTRA_NAME: the python-redlines extra that installs the companion package
+      - WORKER_FLAG: optional flag that starts the binary in worker mode
+      - SUPPORTS_STDIO: whether the binary accepts "-" paths (pipe mode)
+      - MEMFD_VERIFIED: whether io_mode='auto' may pick memfd for the binary
+      - JSON_FLAG: optional flag that makes the binary report a JSON result
     """
     BINARY_PACKAGE: str = NotImplemented
     BINARY_BASE_NAME: str = NotImplemented
     EXTRA_NAME: str = NotImplemented
 
-    def __init__(self, target_path: Optional[str] = None):
+    # CLI flag that starts the binary as a long-lived worker (see WorkerEngine),
+    # or None when the binary only supports one comparison per process.
+    WORKER_FLAG: Optional[str] = None
+
+    # Whether the binary accepts "-" for a path and streams that document through
+    # stdin/stdout instead of the filesystem.
+    SUPPORTS_STDIO: bool = False
+
+    # Whether the binary is known to read and write /proc/self/fd/N paths correctly, so that
+    # io_mode='auto' can choose memfd for it. io_mode='memfd' can still be asked for explicitly.
+    MEMFD_VERIFIED: bool = False
+
+    # CLI flag, placed before the positional arguments, that makes the binary print one JSON
+    # object (revision counts, phase timings, sizes, or a structured error) instead of its
+    # summary text; None when the binary only prints text.
+    JSON_FLAG: Optional[str] = None
+
+    def __init__(self, target_path: Optional[str] = None, max_concurrency: Optional[int] = None,
+                 cache: Optional[RedlineCache] = None, io_mode: str = 'auto',
+                 timeout: Optional[float] = None, max_memory: Optional[int] = None,
+                 max_cpu_seconds: Optional[float] = None,
+                 on_metrics: Optional[Callable[[RunMetrics], None]] = None, skip_unchanged: bool = True,
+                 normalize: bool = False, strip_media: bool = False):
+        """
+        target_path overrides the directory the binary is extracted into. max_concurrency caps
+        how many arun_redline() calls on this instance run their engine process at once. cache,
+        when given, serves repeated comparisons from disk instead of re-running the engine.
+
+        timeout (seconds), max_memory (bytes) and max_cpu_seconds are default limits for every
+        engine process; run_redline() can override them per call. A process over its limit is
+        killed and EngineTimeoutError, EngineMemoryLimitError or EngineCPULimitError is raised.
+        Memory and CPU limits are rlimits on the child (POSIX only), set with prlimit once it
+        has started on Linux; max_memory also caps the .NET GC heap, so it is honoured on
+        Windows too.
+
+        on_metrics, when given, is called with a RunMetrics after every run_redline() and
+        arun_redline() call: wall-clock time per phase, the engine process's peak RSS and CPU
+        time, input and output sizes, and the options used. Without it nothing is measured.
+
+        skip_unchanged checks first whether the two documents have the same content, ignoring
+        what Word changes on every save (see python_redlines.canonical). If they do, the engine
+        is not run: the result has zero revisions and the modified document as its redline.
+
+        normalize strips markup noise from both documents before they reach the binary (rsids,
+        proofing marks, rendering hints) and merges adjacent runs with identical formatting (see
+        python_redlines.normalize). The revisions are the same; heavily edited documents compare
+        faster. run_redline() can override it per call.
+
+        strip_media replaces every media part of at least 4 KiB that is identical in both
+        documents with a small placeholder before the binary sees them, and puts the real
+        content back into the redline afterwards (see python_redlines.media). Image-heavy
+        documents then cost far less to stage, and far less engine memory and time. It can
+        also be overridden per call.
+
+        io_mode chooses how bytes inputs and the redline travel to and from the binary:
+        'tempfile' writes them to temporary files; 'memfd' (Linux only) puts them in anonymous
+        in-memory files the binary opens as /proc/self/fd/N paths; 'pipe' streams them through the
+        binary's stdin/stdout (engines with SUPPORTS_STDIO only), falling back to temporary files
+        for a binary too old to support it. 'auto' uses memfd where supported if the engine sets
+        MEMFD_VERIFIED, else tempfile.
+        """
+        if io_mode not in IO_MODES:
+            raise ValueError(f"io_mode must be one of {', '.join(IO_MODES)}, got {io_mode!r}")
+        if io_mode == 'pipe' and not self.SUPPORTS_STDIO:
+            raise ValueError(f"{type(self).__name__} does not support io_mode='pipe'.")
+        if io_mode == 'memfd' and not memfd_supported():
+            raise ValueError("io_mode='memfd' requires Linux with os.memfd_create and /proc.")
+        if io_mode == 'auto':
+            io_mode = 'memfd' if self.MEMFD_VERIFIED and memfd_supported() else 'tempfile'
+
+        self.limits = _Limits(timeout, max_memory, max_cpu_seconds).validate()
         self.target_path = target_path
-        self.extracted_binaries_path = self._resolve_binary()
+        self.io_mode = io_mode
+        self.max_concurrency = max_concurrency
+        self.cache = cache
+        self.on_metrics = on_metrics
+        self.skip_unchanged = skip_unchanged
+        self.normalize = normalize
+        self.strip_media = strip_media
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    @property
+    def extracted_binaries_path(self) -> str:
+        """
+        Path to the engine executable. Resolved (and extracted, if needed) on first use, then
+        memoized per engine class and extraction directory for the life of the process, so
+        creating engines is cheap. Raises EngineNotInstalledError if the binary package is missing.
+        """
+        key = (type(self), self.target_path)
+        path = _RESOLVED_BINARIES.get(key)
+        if path is None:
+            with _RESOLVE_LOCK:
+                path = _RESOLVED_BINARIES.get(key)
+                if path is None:
+                    path = _RESOLVED_BINARIES[key] = self._resolve_binary()
+        return path
+
+    def warmup(self):
+        """
+        Resolves the binary now instead of on the first comparison, and launches it once (the
+        first time per binary) so its files are in the OS page cache before real work arrives.
+        """
+        binary = self.extracted_binaries_path
+        with _RESOLVE_LOCK:
+            if binary in _WARMED_BINARIES:
+                return
+            _WARMED_BINARIES.add(binary)
+
+        # Run without arguments: the binary prints its usage and exits. Only the launch matters.
+        try:
+            subprocess.run([binary], stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                           stderr=subprocess.DEVNULL, timeout=60)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.warning("Warm-up launch of %s failed: %s", binary, e)
 
     def _resolve_binary(self) -> str:
         """
@@ -86,29 +502,85 @@ class BaseEngine(object):
         extract_root = self._extraction_root() / rid
         binary_path = extract_root / binary_name
 
-        if not binary_path.exists():
-            self._extract_archive(archive, extract_root)
-
-        if not is_windows:
-            os.chmod(binary_path, 0o755)
+        # The stamp is only ever present in a complete, verified extraction.
+        if not (extract_root / _STAMP_NAME).is_file():
+            self._install_binary(archive, extract_root, binary_name)
 
         return str(binary_path)
 
+    def _install_binary(self, archive, extract_root: Path, binary_name: str):
+        """
+        Extracts the archive into extract_root safely when many processes start at once: under
+        a file lock, into a temporary sibling directory that is verified against the archive's
+        manifest, stamped, and only then renamed into place.
+        """
+        with _file_lock(extract_root.parent / f'.{extract_root.name}.lock'):
+            if (extract_root / _STAMP_NAME).is_file():
+                return  # another process finished while we waited for the lock
+
+            staging = Path(tempfile.mkdtemp(prefix=f'.{extract_root.name}-', dir=extract_root.parent))
+            try:
+                sizes = self._extract_archive(archive, staging)
+                self._verify_extraction(staging, sizes)
+                if not binary_name.endswith('.exe'):
+                    os.chmod(staging / binary_name, 0o755)
+                (staging / _STAMP_NAME).write_text(archive.name, encoding='utf-8')
+                # mkdtemp creates the directory private to us, but it becomes the shared
+                # extraction root, so give it the permissions a plain mkdir would have.
+                os.chmod(staging, 0o755 & ~_umask())
+
+                if extract_root.exists():
+                    # Unstamped: a partial extraction, or one from before stamps existed.
+                    stale = Path(tempfile.mkdtemp(prefix=f'.{extract_root.name}-stale-', dir=extract_root.parent))
+                    os.replace(extract_root, stale / extract_root.name)
+                    shutil.rmtree(stale, ignore_errors=True)
+                os.replace(staging, extract_root)
+            except BaseException:
+                shutil.rmtree(staging, ignore_errors=True)
+                raise
+
+    def _verify_extraction(self, directory: Path, sizes: Dict[str, int]):
+        """
+        Checks extracted files against the archive's manifest (sizes and SHA-256), or against the
+        archive's own member sizes for archives built before manifests existed.
+        """
+        manifest_path = directory / _MANIFEST_NAME
+        if manifest_path.is_file():
+            expected = json.loads(manifest_path.read_text(encoding='utf-8'))['files']
+        else:
+            expected = {name: {'size': size} for name, size in sizes.items()}
+
+        for name, entry in expected.items():
+            path = directory / name
+            try:
+                intact = path.stat().st_size == entry['size']
+                if intact and 'sha256' in entry:
+                    intact = self._hash_input(path) == entry['sha256']
+            except OSError:
+                intact = False
+            if not intact:
+                raise EngineNotInstalledError(
+                    f"{type(self).__name__}: extracted file '{name}' failed its integrity check. "
+                    f"Reinstall the '{self.BINARY_PACKAGE}' package."
+                )
+
     def _extraction_root(self) -> Path:
         """Directory the binary is extracted into (writable, outside site-packages)."""
         if self.target_path:
             return Path(self.target_path)
 
-        try:
-            pkg_version = importlib.metadata.version(self.BINARY_PACKAGE.replace('_', '-'))
-        except importlib.metadata.PackageNotFoundError:
-            pkg_version = __version__
+        return Path(platformdirs.user_cache_dir('python-redlines')) / self.EXTRA_NAME / self._binary_version()
 
-        return Path(platformdirs.user_cache_dir('python-redlines')) / self.EXTRA_NAME / pkg_version
+    def _binary_version(self) -> str:
+        """Version of the installed companion binary package (the core version if unknown)."""
+        return _package_version(self.BINARY_PACKAGE.replace('_', '-'))
 
     @staticmethod
-    def _extract_archive(archive, target_path: Path):
-        """Extract a .zip or .tar.gz archive (a Traversable) into target_path."""
+    def _extract_archive(archive, target_path: Path) -> Dict[str, int]:
+        """
+        Extract a .zip or .tar.gz archive (a Traversable) into target_path. Returns the size of
+        every regular file in the archive, keyed by its path inside it.
+        """
         target_path.mkdir(parents=True, exist_ok=True)
         name = archive.name
 
@@ -116,12 +588,14 @@ class BaseEngine(object):
             if name.endswith('.zip'):
                 with zipfile.ZipFile(archive_path, 'r') as zip_ref:
                     zip_ref.extractall(target_path)
+                    return {info.filename: info.file_size for info in zip_ref.infolist() if not info.is_dir()}
             elif name.endswith('.tar.gz'):
                 with tarfile.open(archive_path, 'r:gz') as tar_ref:
                     try:
                         tar_ref.extractall(target_path, filter='data')
                     except TypeError:
                         tar_ref.extractall(target_path)
+                    return {member.name: member.size for member in tar_ref.getmembers() if member.isfile()}
             else:
                 raise ValueError(f"Unsupported archive format: {name}")
 
@@ -132,11 +606,21 @@ class BaseEngine(object):
         """
         return [self.extracted_binaries_path, author_tag, original_path, modified_path, target_path]
 
-    def run_redline(self, author_tag: str, original: Union[str, bytes, Path], modified: Union[str, bytes, Path],
-                    **kwargs) -> Tuple[bytes, Optional[str], Optional[str]]:
+    def run_redline(self, author_tag: str, original: DocumentInput, modified: DocumentInput,
+                    output: RedlineOutput = None, timeout: Optional[float] = None,
+                    max_memory: Optional[int] = None, max_cpu_seconds: Optional[float] = None,
+                    normalize: Optional[bool] = None, strip_media: Optional[bool] = None,
+                    **kwargs) -> RedlineResult:
         """
-        Runs the redline binary. The 'original' and 'modified' arguments can be either bytes or file paths
-        (as ``str`` or ``pathlib.Path``). Returns the redline output as bytes.
+        Runs the redline binary. The 'original' and 'modified' arguments can be bytes, file paths
+        (as ``str`` or ``pathlib.Path``), or binary file objects open for reading, which are
+        copied in chunks rather than read into memory. Returns a RedlineResult, which unpacks
+        as (redline, stdout, stderr) and also carries the revision counts the engine reported.
+        A comparison the engine reports as failed raises EngineError.
+
+        Pass output (a path, or a binary file object open for writing) to have the redline
+        written there instead of returned; the first element of the result is then None. A path
+        becomes the binary's target directly, with no copy.
 
         Additional keyword arguments are passed to _build_command() for engine-specific options.
         DocxodusEngine supports: engine, detail_threshold, case_insensitive, detect_moves,
@@ -147,28 +631,778 @@ class BaseEngine(object):
         (the default) or 'docxdiff'. The docxdiff engine ignores detail_threshold,
         simplify_move_markup, and detect_format_changes, so passing them alongside
         engine='docxdiff' raises ValueError rather than silently changing nothing.
+
+        When the engine has a cache, a comparison seen before is returned from it without
+        running the binary. With skip_unchanged (the default), neither is consulted for two
+        documents with the same content.
+
+        timeout, max_memory and max_cpu_seconds override the engine's limits for this call (see
+        __init__); exceeding one raises the matching EngineLimitError subclass. normalize and
+        strip_media override the engine's settings of the same names.
         """
-        temp_files = []
+        limits = self._resolve_limits(timeout, max_memory, max_cpu_seconds)
+        return self._drive(self._redline_steps(author_tag, original, modified, output, limits, normalize, strip_media,
+                                               kwargs))
+
+    def _redline_steps(self, author_tag, original, modified, output, limits, normalize, strip_media, kwargs,
+                       run=None):
+        """
+        One comparison, from the unchanged check to the delivered result, as a generator that
+        run_redline() and arun_redline() drive (see _drive and _adrive). It yields a callable for
+        each step that blocks in Python (parsing, hashing, copying), to be called and its value
+        sent back, and a _Spawn for each engine process, to be answered with (returncode,
+        stdout, stderr). Returns the RedlineResult.
+
+        run, when given, replaces the engine run as one blocking step; WorkerEngine passes its worker.
+        """
+        with self._instrumented(original, modified, kwargs) as metrics:
+            result = yield functools.partial(self._unchanged_result, original, modified, output, metrics)
+            if result is None:
+                if self._normalizes(normalize):
+                    original, modified = yield functools.partial(self._normalized, original, modified, metrics)
+                stash = None
+                if self._strips_media(strip_media):
+                    original, modified, stash = yield functools.partial(self._stripped, original, modified, metrics)
+                # With media stripped, the redline comes back as bytes and is restored into output.
+                result = yield from self._cached_steps(author_tag, original, modified, None if stash else output,
+                                                       limits, metrics, run, kwargs)
+                if stash:
+                    result = yield functools.partial(self._restored, result, stash, output, metrics)
+            if metrics is not None:
+                self._record_output(metrics, result, output)
+            return result
+
+    def _cached_steps(self, author_tag, original, modified, output, limits, metrics, run, kwargs):
+        """Serves the comparison from the cache if it can, otherwise runs it and stores the result."""
+        key = yield functools.partial(self._cache_key_for, author_tag, original, modified, **kwargs)
+        if key is None:
+            return (yield from self._engine_steps(author_tag, original, modified, output, limits, metrics, run, kwargs))
+
+        cached = yield functools.partial(self._cache_get, key, output)
+        if metrics is not None:
+            metrics.lap('cache_lookup')
+            metrics.cached = cached is not None
+        if cached is not None:
+            return cached
+
+        with self._cacheable_output(output) as target:
+            result = yield from self._engine_steps(author_tag, original, modified, target, limits, metrics, run, kwargs)
+            yield functools.partial(self._cache_put, key, result, target)
+            if metrics is not None:
+                metrics.lap('cache_store')
+        return result
+
+    def _engine_steps(self, author_tag, original, modified, output, limits, metrics, run, kwargs):
+        if run is not None:
+            return (yield functools.partial(run, author_tag, original, modified, output, limits, metrics, **kwargs))
+        # A binary found to predate pipe mode or JSON results is remembered, and the run retried without it.
+        while True:
+            result = yield from self._attempt_steps(author_tag, original, modified, output, limits, metrics, kwargs)
+            if result is not None:
+                return result
+
+    def _attempt_steps(self, author_tag, original, modified, output, limits, metrics, kwargs):
+        """One engine run; returns None when it must be retried without pipe mode or JSON results."""
+        json_mode = self._use_json()
+        if self._use_pipe(original, modified):
+            command, stdin = self._pipe_command(author_tag, original, modified, json_mode, **kwargs)
+            if metrics is not None:
+                metrics.lap('stage')
+            returncode, stdout, stderr = yield _Spawn(command, limits, stdin, (), metrics)
+            result = self._collect_piped(command, json_mode, returncode, stdout, stderr, output)
+            if metrics is not None:
+                metrics.lap('collect')
+            return result
+
+        with self._redline_paths(original, modified, memfd=self.io_mode == 'memfd', output=output) as (
+                original_path, modified_path, target_path, pass_fds):
+            if metrics is not None:
+                metrics.lap('stage')
+            command = self._command(author_tag, original_path, modified_path, target_path, json_mode, **kwargs)
+
+            returncode, stdout, stderr = yield _Spawn(command, limits, None, pass_fds, metrics)
+
+            result = self._parse_result(command, json_mode, returncode, stdout, stderr)
+            if result is not None:
+                result.redline = self._deliver(target_path, output)
+            if metrics is not None:
+                metrics.lap('collect')
+        if metrics is not None:
+            metrics.lap('cleanup')
+        return result
+
+    def _drive(self, steps):
+        """Runs _redline_steps to completion on this thread and returns its result."""
+        answer, error = None, None
+        while True:
+            try:
+                request = steps.throw(error) if error is not None else steps.send(answer)
+            except StopIteration as done:
+                return done.value
+            try:
+                if isinstance(request, _Spawn):
+                    answer = self._exec(request.command, request.limits, request.stdin, request.pass_fds,
+                                        request.metrics)
+                else:
+                    answer = request()
+                error = None
+            except BaseException as e:
+                answer, error = None, e
+
+    async def _adrive(self, steps):
+        """
+        Runs _redline_steps to completion on the event loop: blocking steps go to the default
+        executor and engine processes run as asyncio subprocesses, at most max_concurrency at once.
+        """
+        loop = asyncio.get_running_loop()
+        answer, error = None, None
+        while True:
+            try:
+                request = steps.throw(error) if error is not None else steps.send(answer)
+            except StopIteration as done:
+                return done.value
+            try:
+                if isinstance(request, _Spawn):
+                    answer = await self._aspawn(request)
+                else:
+                    answer = await loop.run_in_executor(None, request)
+                error = None
+            except BaseException as e:
+                answer, error = None, e
+
+    async def _aspawn(self, request: '_Spawn'):
+        if self.max_concurrency is None:
+            return await self._aexec(request.command, request.limits, request.stdin, request.pass_fds, request.metrics)
+        # Created on first use so it binds to the running event loop (Python 3.9 binds at construction).
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        async with self._semaphore:
+            if request.metrics is not None:
+                request.metrics.lap('queue')
+            return await self._aexec(request.command, request.limits, request.stdin, request.pass_fds,
+                                     request.metrics)
+
+    async def arun_redline(self, author_tag: str, original: DocumentInput, modified: DocumentInput,
+                           output: RedlineOutput = None, timeout: Optional[float] = None,
+                           max_memory: Optional[int] = None, max_cpu_seconds: Optional[float] = None,
+                           normalize: Optional[bool] = None, strip_media: Optional[bool] = None,
+                           **kwargs) -> RedlineResult:
+        """
+        Asyncio counterpart of run_redline(), with the same arguments and return value. The engine
+        runs via asyncio.create_subprocess_exec, so no thread is tied up while it works.
+
+        Cancelling the call kills the engine process and removes its temporary files. When the
+        engine was created with max_concurrency, calls beyond that limit wait for a free slot; the
+        timeout covers only the engine run, not that wait.
+        """
+        limits = self._resolve_limits(timeout, max_memory, max_cpu_seconds)
+        return await self._adrive(self._redline_steps(author_tag, original, modified, output, limits, normalize,
+                                                      strip_media, kwargs))
+
+    @contextlib.contextmanager
+    def _instrumented(self, original, modified, kwargs):
+        """
+        Yields a RunMetrics for one call, passed to on_metrics once the call finishes or fails;
+        yields None when there is no on_metrics, so that disabled instrumentation costs nothing.
+        """
+        if self.on_metrics is None:
+            yield None
+            return
+
+        metrics = RunMetrics(type(self).__name__, dict(kwargs), self.io_mode,
+                             input_sizes=(_document_size(original), _document_size(modified)))
+        try:
+            yield metrics
+        except BaseException as exc:
+            metrics.error = exc
+            raise
+        finally:
+            metrics.finish()
+            # A broken metrics sink must not fail the redline.
+            try:
+                self.on_metrics(metrics)
+            except Exception:
+                logger.exception("on_metrics callback failed")
+
+    @staticmethod
+    def _record_output(metrics: RunMetrics, result: RedlineResult, output: RedlineOutput):
+        metrics.engine_timings = dict(result.timings)
+        if 'redline' in result.sizes:
+            metrics.output_size = result.sizes['redline']
+        elif result.redline is not None:
+            metrics.output_size = len(result.redline)
+        elif output is not None and not _is_writable(output):
+            metrics.output_size = _document_size(output)
+
+    def _use_json(self) -> bool:
+        return self.JSON_FLAG is not None and self.extracted_binaries_path not in _JSON_UNSUPPORTED
+
+    def _command(self, author_tag, original_path, modified_path, target_path, json_mode: bool, **kwargs):
+        """_build_command(), plus JSON_FLAG when asking for a JSON result."""
+        command = self._build_command(author_tag, original_path, modified_path, target_path, **kwargs)
+        if json_mode:
+            command.insert(1, self.JSON_FLAG)
+        return command
+
+    def _parse_result(self, command, json_mode: bool, returncode: int, stdout: bytes,
+                      stderr: bytes) -> Optional[RedlineResult]:
+        """
+        Turns a finished run's exit code and output into a RedlineResult (without the redline),
+        raising CalledProcessError or EngineError if the run failed. Returns None if the binary
+        turned out not to support JSON results; that binary is not asked for them again.
+        """
+        stderr_output = self._decode_output(stderr)
+
+        if json_mode:
+            payload = _parse_json_object(stdout)
+            if payload is None and returncode == 0:
+                # A binary that predates JSON results prints its usage text for the extra flag.
+                logger.info("%s does not report JSON results; parsing its summary text.",
+                            self.extracted_binaries_path)
+                _JSON_UNSUPPORTED.add(self.extracted_binaries_path)
+                return None
+            if payload is not None:
+                return self._result_from_json(command, returncode, payload, stderr_output)
+
+        stdout_output = self._decode_output(stdout)
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, command, output=stdout_output, stderr=stderr_output)
+        if stdout_output and stdout_output.startswith('Error:'):
+            # Older binaries report failures on stdout and still exit 0.
+            message = stdout_output.splitlines()[0][len('Error:'):].strip()
+            raise EngineError(returncode, command, None, message, output=stdout_output, stderr=stderr_output)
+
+        return RedlineResult(None, stdout_output, stderr_output)
+
+    @staticmethod
+    def _result_from_json(command, returncode: int, payload: dict, stderr_output: Optional[str]) -> RedlineResult:
+        if returncode != 0 or not payload.get('ok'):
+            error = payload.get('error') or {}
+            raise EngineError(returncode, command, error.get('type'), error.get('message'), stderr=stderr_output)
+
+        counts = dict(payload.get('revisions') or {})
+        summary = payload.get('summary')
+        return RedlineResult(
+            None,
+            stdout=f'{summary}\n' if summary else None,
+            stderr=stderr_output,
+            revisions=counts.pop('total', None),
+            revisions_by_type=counts,
+            timings={phase: ms / 1000 for phase, ms in (payload.get('timings_ms') or {}).items()},
+            sizes=payload.get('sizes') or {},
+        )
+
+    def _unchanged_result(self, original, modified, output, metrics) -> Optional[RedlineResult]:
+        """
+        A zero-revision result, with the modified document as the redline, when skip_unchanged
+        is on and the documents have the same content; otherwise None.
+        """
+        if not self.skip_unchanged:
+            return None
+        unchanged = same_content(original, modified)
+        if metrics is not None:
+            metrics.lap('content_check')
+            metrics.unchanged = unchanged
+        if not unchanged:
+            return None
+
+        sizes = {'original': _document_size(original), 'modified': _document_size(modified)}
+        redline = _copy_document(modified, output)
+        sizes['redline'] = len(redline) if redline is not None else sizes['modified']
+        return RedlineResult(redline, 'No content changes; the engine was not run.\n', None, revisions=0,
+                             sizes={name: size for name, size in sizes.items() if size is not None})
+
+    def _normalizes(self, normalize: Optional[bool]) -> bool:
+        return self.normalize if normalize is None else normalize
+
+    @staticmethod
+    def _normalized(original, modified, metrics):
+        """
+        The two documents with their markup normalized, as bytes. One that cannot be normalized
+        (not a .docx, or a stream that cannot seek) is passed on as it is, for the engine to
+        report on.
+        """
+        documents = []
+        for document in (original, modified):
+            if _is_readable(document) and not document.seekable():
+                documents.append(document)
+                continue
+            position = document.tell() if _is_readable(document) else None
+            try:
+                documents.append(normalize_docx(document))
+            except zipfile.BadZipFile:
+                if position is not None:
+                    document.seek(position)
+                documents.append(document)
+        if metrics is not None:
+            metrics.lap('normalize')
+        return tuple(documents)
+
+    def _strips_media(self, strip_media: Optional[bool]) -> bool:
+        return self.strip_media if strip_media is None else strip_media
+
+    @staticmethod
+    def _stripped(original, modified, metrics):
+        """
+        (original, modified, stash) with shared media replaced by placeholders (see strip_media),
+        or the documents as given and stash None when there is nothing to strip or either one
+        cannot be read as a package.
+        """
+        stash = None
+        documents = (original, modified)
+        if not any(_is_readable(document) and not document.seekable() for document in documents):
+            positions = [document.tell() if _is_readable(document) else None for document in documents]
+            try:
+                stripped_original, stripped_modified, stash = strip_media(original, modified)
+            except zipfile.BadZipFile:
+                stash = None
+            if stash:
+                original, modified = stripped_original, stripped_modified
+            else:
+                for document, position in zip(documents, positions):
+                    if position is not None:
+                        document.seek(position)
+        if metrics is not None:
+            metrics.lap('strip_media')
+        return original, modified, stash or None
+
+    @staticmethod
+    def _restored(result: RedlineResult, stash: MediaStash, output: RedlineOutput, metrics) -> RedlineResult:
+        """result with the stashed media put back into its redline, which is delivered to output."""
+        if output is None:
+            result.redline = restore_media(result.redline, stash)
+            size = len(result.redline)
+        else:
+            with contextlib.ExitStack() as stack:
+                handle = output if _is_writable(output) else stack.enter_context(open(output, 'wb'))
+                start = handle.tell() if handle.seekable() else None
+                restore_media(result.redline, stash, handle)
+                size = handle.tell() - start if start is not None else None
+            result.redline = None
+        if size is not None:
+            result.sizes['redline'] = size
+        if metrics is not None:
+            metrics.lap('restore_media')
+        return result
+
+    @staticmethod
+    def _deliver(target_path, output: RedlineOutput) -> Optional[bytes]:
+        """
+        Hands over a finished redline: returns its bytes when there is no output, copies it in
+        chunks into an output file object, and does nothing when output was the target path.
+        """
+        if output is None:
+            return Path(target_path).read_bytes()
+        if _is_writable(output):
+            with open(target_path, 'rb') as redline:
+                shutil.copyfileobj(redline, output, _COPY_CHUNK)
+        return None
+
+    def _resolve_limits(self, timeout=None, max_memory=None, max_cpu_seconds=None) -> _Limits:
+        """The engine's limits with any per-call overrides applied."""
+        return _Limits(
+            timeout if timeout is not None else self.limits.timeout,
+            max_memory if max_memory is not None else self.limits.max_memory,
+            max_cpu_seconds if max_cpu_seconds is not None else self.limits.max_cpu_seconds,
+        ).validate()
+
+    @staticmethod
+    def _spawn_options(limits: _Limits) -> dict:
+        """
+        Extra Popen arguments for a child under limits. Its rlimits are applied separately,
+        by _limited_command and _apply_rlimits.
+        """
+        options = {}
+        if limits.max_memory is not None:
+            # As .NET does for a container memory limit, give the GC heap 75% and leave the
+            # rest for the runtime itself; the GC then fails cleanly with OutOfMemoryException.
+            heap_limit = limits.max_memory * 3 // 4
+            options['env'] = dict(os.environ, DOTNET_GCHeapHardLimit=f'{heap_limit:#x}')
+        return options
+
+    def _exec(self, command, limits: _Limits, stdin: Optional[bytes] = None, pass_fds=(),
+              metrics: Optional[RunMetrics] = None) -> Tuple[int, bytes, bytes]:
+        """Runs command to completion under limits; returns (returncode, stdout, stderr)."""
+        # Resource usage shows whether a SIGKILL came from the CPU limit.
+        wants_rusage = metrics is not None or limits.max_cpu_seconds is not None
+        popen = _RusagePopen if wants_rusage and hasattr(os, 'wait4') else subprocess.Popen
+        process = popen(_limited_command(command, limits), stdin=subprocess.PIPE if stdin is not None else None,
+                        stdout=subprocess.PIPE, stderr=subprocess.PIPE, pass_fds=pass_fds,
+                        **self._spawn_options(limits))
+        _apply_rlimits(process.pid, limits)
+        if metrics is not None:
+            metrics.lap('spawn')
+
+        # What subprocess.run does, on a Popen we choose.
+        with process:
+            try:
+                stdout, stderr = process.communicate(stdin, timeout=limits.timeout)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                if sys.platform == 'win32':
+                    process.communicate()
+                else:
+                    process.wait()
+                raise EngineTimeoutError(
+                    f"Engine did not finish within {limits.timeout} seconds.", command, limits.timeout) from None
+            except BaseException:
+                process.kill()
+                raise
+
+        rusage = getattr(process, 'rusage', None)
+        if metrics is not None:
+            metrics.lap('run')
+            if rusage is not None:
+                metrics.record_rusage(rusage)
+        cpu_time = rusage.ru_utime + rusage.ru_stime if rusage is not None else None
+        self._check_limits(command, limits, process.returncode, stdout, stderr, cpu_time)
+        return process.returncode, stdout, stderr
+
+    async def _aexec(self, command, limits: _Limits, stdin: Optional[bytes] = None,
+                     pass_fds=(), metrics: Optional[RunMetrics] = None) -> Tuple[int, bytes, bytes]:
+        """
+        Runs command to completion on the event loop under limits; returns (returncode, stdout,
+        stderr). asyncio reaps the child itself, so its resource usage is not recorded.
+        """
+        process = await asyncio.create_subprocess_exec(
+            *_limited_command(command, limits), stdin=asyncio.subprocess.PIPE if stdin is not None else None,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, pass_fds=pass_fds,
+            **self._spawn_options(limits))
+        _apply_rlimits(process.pid, limits)
+        if metrics is not None:
+            metrics.lap('spawn')
         try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(stdin), limits.timeout)
+        except asyncio.TimeoutError:
+            raise EngineTimeoutError(
+                f"Engine did not finish within {limits.timeout} seconds.", command, limits.timeout) from None
+        finally:
+            # Timed out, cancelled (or otherwise interrupted) while the engine was still running.
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+        if metrics is not None:
+            metrics.lap('run')
+        self._check_limits(command, limits, process.returncode, stdout, stderr)
+        return process.returncode, stdout, stderr
 
-            target_path = tempfile.NamedTemporaryFile(delete=False).name
-            original_path = self._write_to_temp_file(original) if isinstance(original, bytes) else original
-            modified_path = self._write_to_temp_file(modified) if isinstance(modified, bytes) else modified
-            temp_files.extend([target_path, original_path, modified_path])
+    @staticmethod
+    def _check_limits(command, limits: _Limits, returncode: Optional[int], stdout: bytes, stderr: bytes,
+                      cpu_time: Optional[float] = None):
+        """
+        Raises EngineMemoryLimitError or EngineCPULimitError if a failed run was stopped by one of
+        limits. Older binaries report exceptions on stdout and exit 0, so that counts as failed.
 
-            command = self._build_command(author_tag, original_path, modified_path, target_path, **kwargs)
+        A SIGKILL is only put down to the CPU limit when cpu_time (the child's user and system
+        seconds, where known) reached it; the OOM killer or another process may have sent it.
+        """
+        if returncode == 0 and not stdout.startswith(b'Error:'):
+            return
 
-            # Capture stdout and stderr
-            result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+        killed_by = -returncode if returncode is not None and returncode < 0 else None
+        if limits.max_cpu_seconds is not None and (
+                killed_by == getattr(signal, 'SIGXCPU', None)
+                or (killed_by == getattr(signal, 'SIGKILL', None) and cpu_time is not None
+                    and cpu_time >= _cpu_seconds(limits))):
+            raise EngineCPULimitError(
+                f"Engine used more than {limits.max_cpu_seconds} seconds of CPU time.",
+                command, limits.max_cpu_seconds)
 
-            stdout_output = result.stdout if isinstance(result.stdout, str) and len(result.stdout) > 0 else None
-            stderr_output = result.stderr if isinstance(result.stderr, str) and len(result.stderr) > 0 else None
+        if limits.max_memory is not None and (
+                killed_by in (getattr(signal, 'SIGKILL', None), signal.SIGABRT, signal.SIGSEGV)
+                or any(marker in stdout or marker in stderr for marker in _OUT_OF_MEMORY_MARKERS)):
+            raise EngineMemoryLimitError(
+                f"Engine ran out of memory under its {limits.max_memory}-byte limit.",
+                command, limits.max_memory)
+
+    def _use_pipe(self, original, modified) -> bool:
+        # File objects are staged instead: pipe mode would have to read them into memory whole.
+        return (self.io_mode == 'pipe'
+                and not _is_readable(original) and not _is_readable(modified)
+                and self.extracted_binaries_path not in _STDIO_UNSUPPORTED)
+
+    def _pipe_command(self, author_tag, original, modified, json_mode: bool = False, **kwargs):
+        """
+        Command and stdin payload for pipe mode. Bytes inputs become "-" and are sent on stdin as
+        8-byte big-endian length-prefixed blobs, in argument order; path inputs are passed as-is.
+        """
+        stdin = []
+        paths = []
+        for document in (original, modified):
+            if isinstance(document, bytes):
+                stdin += [_STDIO_LENGTH.pack(len(document)), document]
+                paths.append('-')
+            else:
+                paths.append(document)
+
+        command = self._command(author_tag, paths[0], paths[1], '-', json_mode, **kwargs)
+        return command, b''.join(stdin)
+
+    def _collect_piped(self, command, json_mode: bool, returncode: int, stdout: bytes, stderr: bytes,
+                       output: RedlineOutput = None) -> Optional[RedlineResult]:
+        """
+        Unpacks pipe-mode output into a RedlineResult, writing the redline to output if given.
+        Returns None if the binary did not answer in pipe mode. That means it predates JSON
+        results, if they were asked for, or else pipe mode itself; either way it is not asked
+        for that again.
+        """
+        if returncode != 0 or not stdout.startswith(_STDIO_MAGIC):
+            if returncode == 0 and not json_mode:
+                logger.info("%s does not support pipe mode; falling back to temp files.",
+                            self.extracted_binaries_path)
+                _STDIO_UNSUPPORTED.add(self.extracted_binaries_path)
+                return None
+            # Raises for a failed run; otherwise the binary predates JSON results.
+            return self._parse_result(command, json_mode, returncode, stdout, stderr)
+
+        start = len(_STDIO_MAGIC) + _STDIO_LENGTH.size
+        (length,) = _STDIO_LENGTH.unpack_from(stdout, len(_STDIO_MAGIC))
+        redline_output = stdout[start:start + length]
+
+        result = self._parse_result(command, json_mode, returncode, stdout[start + length:], stderr)
+        if result is None:
+            return None
+        if output is None:
+            result.redline = redline_output
+        elif _is_writable(output):
+            output.write(redline_output)
+        else:
+            Path(output).write_bytes(redline_output)
+        return result
+
+    @staticmethod
+    def _decode_output(data: bytes) -> Optional[str]:
+        """Decodes captured output the way subprocess.run(text=True) does; empty output is None."""
+        if not data:
+            return None
+        return data.decode(locale.getpreferredencoding(False)).replace('\r\n', '\n')
+
+    def run_redline_many(self, author_tag: str,
+                         pairs: Iterable[Tuple[DocumentInput, DocumentInput]],
+                         max_workers: Optional[int] = None, ordered: bool = False,
+                         **kwargs) -> Iterator[BatchResult]:
+        """
+        Redlines many (original, modified) pairs concurrently, yielding a BatchResult per pair.
+
+        At most max_workers comparisons (default: the CPU count) run at once, and pairs are
+        pulled from the iterable only as capacity frees up, so it may be a lazy generator.
+        Results are yielded as they finish; pass ordered=True to get them in input order
+        instead. A failing pair is reported through BatchResult.error and does not stop the
+        batch. Keyword arguments are passed to run_redline() for every pair.
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        numbered = enumerate(pairs)
+        pending: Dict[concurrent.futures.Future, int] = {}
+        finished: Dict[int, BatchResult] = {}
+        next_index = 0
+
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                # Results held back for ordering count against the window too, so memory stays
+                # bounded even while one slow pair blocks everything queued behind it.
+                window = 2 * max_workers - len(pending) - len(finished)
+                for index, (original, modified) in islice(numbered, max(window, 0)):
+                    future = executor.submit(self.run_redline, author_tag, original, modified, **kwargs)
+                    pending[future] = index
+                if not pending:
+                    break
+
+                done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        outcome = BatchResult(index, result=future.result())
+                    except Exception as exc:
+                        outcome = BatchResult(index, error=exc)
+
+                    if not ordered:
+                        yield outcome
+                        continue
+                    finished[index] = outcome
+                    while next_index in finished:
+                        yield finished.pop(next_index)
+                        next_index += 1
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def run_redline_sections(self, author_tag: str, original: DocumentInput, modified: DocumentInput,
+                             output: RedlineOutput = None, section_size: int = 500,
+                             max_workers: Optional[int] = None, **kwargs) -> RedlineResult:
+        """
+        Redlines one large pair by comparing sections of about section_size paragraphs and tables
+        in parallel, at most max_workers at once, and merging the results into a single redline.
+        Sections that are the same in both documents are not compared. See python_redlines.sections
+        for where documents are cut and when they are not; a pair that cannot be split, or whose
+        section redlines cannot be merged, is compared whole with run_redline(). A move that
+        crosses a cut is reported as a deletion and an insertion.
+
+        Returns a RedlineResult like run_redline() with the sections' revisions added up. The
+        first section to fail raises its error. Keyword arguments are passed to run_redline().
+        """
+        original, modified = _copy_document(original, None), _copy_document(modified, None)
+        plan = plan_sections(original, modified, section_size)
+        if plan is None:
+            return self.run_redline(author_tag, original, modified, output=output, **kwargs)
+
+        changed = [index for index, section in enumerate(plan.sections) if not section.unchanged]
+        results: Dict[int, RedlineResult] = {}
+        for batch in self.run_redline_many(author_tag, (plan.documents(index) for index in changed),
+                                           max_workers=max_workers, ordered=True, **kwargs):
+            if batch.error is not None:
+                raise batch.error
+            results[changed[batch.index]] = batch.result
+
+        redline = merge_sections(plan, {index: result.redline for index, result in results.items()})
+        if redline is None:
+            logger.info("Section redlines could not be merged; comparing the whole document.")
+            return self.run_redline(author_tag, original, modified, output=output, **kwargs)
+
+        counts = [result.revisions for result in results.values()]
+        revisions = None if None in counts else sum(counts)
+        by_type: Dict[str, int] = {}
+        for result in results.values():
+            for kind, count in result.revisions_by_type.items():
+                by_type[kind] = by_type.get(kind, 0) + count
+        stdout = (f"Compared {len(changed)} of {len(plan.sections)} sections.\n"
+                  + (f"Revisions found: {revisions}\n" if revisions is not None else ""))
+        stderr = ''.join(result.stderr for result in results.values() if result.stderr) or None
+        return RedlineResult(_copy_document(redline, output), stdout, stderr, revisions=revisions,
+                             revisions_by_type=by_type,
+                             sizes={'original': len(original), 'modified': len(modified), 'redline': len(redline)})
+
+    def _cache_key_for(self, author_tag, original, modified, **kwargs) -> Optional[str]:
+        """The cache key for this call, or None when there is no cache or an input can't be hashed."""
+        if self.cache is None:
+            return None
+        for document in (original, modified):
+            if _is_readable(document) and not (hasattr(document, 'seekable') and document.seekable()):
+                return None  # hashing would consume a stream we cannot rewind
+        return self._cache_key(author_tag, original, modified, **kwargs)
+
+    def _cache_key(self, author_tag, original, modified, **kwargs) -> str:
+        """
+        Digest identifying one comparison: both inputs, the engine and its binary version, and
+        the command-line arguments the options map to. Building the command with placeholder
+        paths normalizes the options exactly as the binary will see them (and validates them).
+        """
+        command = self._build_command(author_tag, '<original>', '<modified>', '<target>', **kwargs)
+
+        digest = hashlib.sha256()
+        for part in (type(self).__name__, self._binary_version(), *map(str, command[1:])):
+            digest.update(part.encode('utf-8') + b'\0')
+        for document in (original, modified):
+            digest.update(self._hash_input(document).encode('ascii'))
+        return digest.hexdigest()
+
+    @staticmethod
+    def _hash_input(document: DocumentInput) -> str:
+        if isinstance(document, bytes):
+            return hashlib.sha256(document).hexdigest()
+
+        digest = hashlib.sha256()
+        if _is_readable(document):
+            position = document.tell()
+            for chunk in iter(lambda: document.read(_COPY_CHUNK), b''):
+                digest.update(chunk)
+            document.seek(position)
+            return digest.hexdigest()
+
+        with open(document, 'rb') as handle:
+            for chunk in iter(lambda: handle.read(_COPY_CHUNK), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def _cache_get(self, key: str, output: RedlineOutput):
+        """A cached result for key, delivered to output like a fresh one, or None on a miss."""
+        if output is None:
+            return self.cache.get(key)
+
+        hit = self.cache.lookup(key)
+        if hit is None:
+            return None
+        data_path, result = hit
+        try:
+            if _is_writable(output):
+                with open(data_path, 'rb') as redline:
+                    shutil.copyfileobj(redline, output, _COPY_CHUNK)
+            else:
+                shutil.copyfile(data_path, output)
+        except FileNotFoundError:
+            return None  # evicted by another process since the lookup
+        return result
+
+    @contextlib.contextmanager
+    def _cacheable_output(self, output: RedlineOutput):
+        """
+        Yields the output to run against so the result can also be cached: a file object is
+        swapped for a temporary file, copied into the file object once the run succeeds.
+        """
+        if not _is_writable(output):
+            yield output
+            return
+
+        temp_path = tempfile.NamedTemporaryFile(delete=False).name
+        try:
+            yield temp_path
+            with open(temp_path, 'rb') as redline:
+                shutil.copyfileobj(redline, output, _COPY_CHUNK)
+        finally:
+            self._cleanup_temp_files([temp_path])
+
+    def _cache_put(self, key: str, result, target: Union[str, Path, None]):
+        # A cache that cannot be written (full disk, Windows file locking) must not fail the redline.
+        try:
+            if target is None:
+                self.cache.put(key, result)
+            else:
+                self.cache.put_file(key, target, result)
+        except OSError as e:
+            logger.warning("Could not store redline in cache: %s", e)
+
+    @contextlib.contextmanager
+    def _redline_paths(self, original, modified, memfd: bool = False, output: RedlineOutput = None):
+        """
+        Yields (original_path, modified_path, target_path, pass_fds) for one comparison. Bytes and
+        file-object inputs are staged in temporary files and the target is an empty temporary
+        file, unless output is a path, which is used as the target directly. Only staged files
+        are removed afterwards, never caller-supplied paths.
+
+        With memfd=True the staging files are anonymous memory files instead, named by
+        /proc/self/fd/N paths; the child must inherit pass_fds for those paths to resolve, and
+        the parent can read the target through the same path.
+        """
+        temp_files = []
+        memfds = []
+
+        def stage(data) -> str:
+            if not memfd:
+                path = self._write_to_temp_file(data)
+                temp_files.append(path)
+                return path
+            fd = os.memfd_create('python-redlines')
+            memfds.append(fd)
+            with open(fd, 'wb', closefd=False) as handle:
+                _write_document(handle, data)
+            return f'/proc/self/fd/{fd}'
+
+        try:
+            if output is not None and not _is_writable(output):
+                target_path = os.fspath(output)
+            elif memfd:
+                target_path = stage(b'')
+            else:
+                target_path = tempfile.NamedTemporaryFile(delete=False).name
+                temp_files.append(target_path)
 
-            redline_output = Path(target_path).read_bytes()
+            original_path = stage(original) if _needs_staging(original) else original
+            modified_path = stage(modified) if _needs_staging(modified) else modified
 
-            return redline_output, stdout_output, stderr_output
+            yield original_path, modified_path, target_path, tuple(memfds)
 
         finally:
+            for fd in memfds:
+                os.close(fd)
             self._cleanup_temp_files(temp_files)
 
     def _cleanup_temp_files(self, temp_files):
@@ -176,14 +1410,14 @@ class BaseEngine(object):
             try:
                 os.remove(file_path)
             except OSError as e:
-                print(f"Error deleting temp file {file_path}: {e}")
+                logger.warning("Error deleting temp file %s: %s", file_path, e)
 
     def _write_to_temp_file(self, data):
         """
-        Writes bytes data to a temporary file and returns the file path.
+        Writes bytes data (or a binary file object's contents) to a temporary file and returns the file path.
         """
         temp_file = tempfile.NamedTemporaryFile(delete=False)
-        temp_file.write(data)
+        _write_document(temp_file, data)
         temp_file.close()
         return temp_file.name
 
@@ -192,6 +1426,10 @@ class XmlPowerToolsEngine(BaseEngine):
     BINARY_PACKAGE = 'python_redlines_ooxmlpowertools'
     BINARY_BASE_NAME = 'redlines'
     EXTRA_NAME = 'ooxmlpowertools'
+    WORKER_FLAG = '--worker'
+    SUPPORTS_STDIO = True
+    MEMFD_VERIFIED = True
+    JSON_FLAG = '--json'
 
 
 class DocxodusEngine(BaseEngine):
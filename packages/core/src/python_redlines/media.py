@@ -0,0 +1,151 @@
+"""
+Keeps large embedded media out of the engine.
+
+In an image-heavy document (scanned exhibits, diagrams, photos) most of the bytes are in
+word/media/* parts. An image that is the same in both documents cannot produce a revision,
+yet the engine still has to receive, unpack, hash and repackage it. strip_media() replaces
+every media part whose content appears in both documents with a small placeholder naming
+its SHA-256, so identical images still match each other and different ones still differ.
+restore_media() then puts the real content back into the redline package, wherever the
+engine placed it.
+
+The stash that links placeholders to their content refers back to the modified document
+rather than holding the media in memory, so the document must stay readable until the
+redline is restored.
+"""
+import hashlib
+import io
+import shutil
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Dict, Optional, Tuple, Union
+
+Document = Union[str, bytes, Path, BinaryIO]
+
+_MEDIA_PREFIX = 'word/media/'
+_PLACEHOLDER_PREFIX = b'python-redlines:media:'
+_PLACEHOLDER_SIZE = len(_PLACEHOLDER_PREFIX) + 64
+
+# Parts smaller than this are left in place; replacing them would save next to nothing.
+MIN_MEDIA_SIZE = 4096
+
+_CHUNK = 1024 * 1024
+
+
+class MediaStash(object):
+    """Which placeholder stands for which media part of which document."""
+
+    def __init__(self):
+        self._sources: Dict[bytes, Tuple[Document, str]] = {}
+
+    def __bool__(self):
+        return bool(self._sources)
+
+    def __len__(self):
+        return len(self._sources)
+
+    def add(self, placeholder: bytes, document: Document, name: str):
+        self._sources.setdefault(placeholder, (document, name))
+
+    def source(self, placeholder: bytes) -> Optional[Tuple[Document, str]]:
+        return self._sources.get(placeholder)
+
+
+def strip_media(original: Document, modified: Document,
+                min_size: int = MIN_MEDIA_SIZE) -> Tuple[Document, Document, MediaStash]:
+    """
+    Returns (original, modified, stash) with every media part of at least min_size bytes whose
+    content appears in both documents replaced by a placeholder. Documents with no such parts
+    are returned as given and the stash is empty; otherwise both come back as bytes. Raises
+    zipfile.BadZipFile if either document is not a .docx package.
+    """
+    original_media = _media_digests(original, min_size)
+    modified_media = _media_digests(modified, min_size)
+    shared = set(original_media.values()) & set(modified_media.values())
+    stash = MediaStash()
+    if not shared:
+        return original, modified, stash
+
+    for name, digest in modified_media.items():
+        if digest in shared:
+            stash.add(_placeholder(digest), modified, name)
+    replace = {name: _placeholder(digest) for name, digest in original_media.items() if digest in shared}
+    stripped_original = _rewrite(original, replace)
+    replace = {name: _placeholder(digest) for name, digest in modified_media.items() if digest in shared}
+    stripped_modified = _rewrite(modified, replace)
+    return stripped_original, stripped_modified, stash
+
+
+def restore_media(redline: Document, stash: MediaStash, output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    """
+    Writes redline to output (a binary file object), or returns it as bytes when output is None,
+    with every placeholder part replaced by the media it stands for.
+    """
+    target = io.BytesIO() if output is None else output
+    sources = {}
+    try:
+        with _open(redline) as source, \
+                zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as restored:
+            for info in source.infolist():
+                placeholder = source.read(info) if info.file_size == _PLACEHOLDER_SIZE else None
+                origin = stash.source(placeholder) if placeholder is not None else None
+                if origin is None:
+                    _copy_part(source, info, restored)
+                    continue
+                document, name = origin
+                if id(document) not in sources:
+                    sources[id(document)] = _open(document)
+                media = sources[id(document)]
+                _copy_part(media, media.getinfo(name), restored, name=info.filename)
+    finally:
+        for archive in sources.values():
+            archive.close()
+    return target.getvalue() if output is None else None
+
+
+def _placeholder(digest: str) -> bytes:
+    return _PLACEHOLDER_PREFIX + digest.encode('ascii')
+
+
+def _open(document: Document) -> zipfile.ZipFile:
+    if isinstance(document, bytes):
+        document = io.BytesIO(document)
+    return zipfile.ZipFile(document)
+
+
+def _media_digests(document: Document, min_size: int) -> Dict[str, str]:
+    """{part name: SHA-256 hex} of the document's media parts of at least min_size bytes."""
+    digests = {}
+    with _open(document) as archive:
+        for info in archive.infolist():
+            if not info.filename.startswith(_MEDIA_PREFIX) or info.is_dir() or info.file_size < min_size:
+                continue
+            digest = hashlib.sha256()
+            with archive.open(info) as part:
+                for chunk in iter(lambda: part.read(_CHUNK), b''):
+                    digest.update(chunk)
+            digests[info.filename] = digest.hexdigest()
+    return digests
+
+
+def _rewrite(document: Document, replace: Dict[str, bytes]) -> bytes:
+    """The document's package with the named parts' content replaced."""
+    buffer = io.BytesIO()
+    with _open(document) as source, zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as target:
+        for info in source.infolist():
+            if info.filename in replace:
+                entry = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+                entry.external_attr = info.external_attr
+                target.writestr(entry, replace[info.filename], compress_type=zipfile.ZIP_STORED)
+            else:
+                _copy_part(source, info, target)
+    return buffer.getvalue()
+
+
+def _copy_part(source: zipfile.ZipFile, info: zipfile.ZipInfo, target: zipfile.ZipFile, name: Optional[str] = None):
+    """Streams one part into target, keeping its compression, under name if given."""
+    entry = zipfile.ZipInfo(name or info.filename, date_time=info.date_time)
+    entry.external_attr = info.external_attr
+    entry.compress_type = info.compress_type
+    with source.open(info) as part, target.open(entry, 'w', force_zip64=info.file_size > 2 ** 31) as copy:
+        shutil.copyfileobj(part, copy, _CHUNK)
@@ -0,0 +1,66 @@
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, Optional, Tuple
+
+
+@dataclass
+class RunMetrics:
+    """
+    Where the time and resources of one run_redline() call went, passed to the engine's
+    on_metrics callback after every call, successful or not.
+
+    phases holds wall-clock seconds per phase, in the order they ran. Not every call has
+    every phase:
+      - content_check: comparing the documents' content, to skip unchanged pairs
+      - normalize: stripping markup noise from the inputs, when normalize is on
+      - strip_media: replacing media both inputs share with placeholders, when strip_media is on
+      - cache_lookup: hashing the inputs and checking the result cache
+      - queue: waiting for a max_concurrency slot (arun_redline) or a busy WorkerEngine
+      - stage: writing inputs to temp/memfd files, or building the pipe-mode payload
+      - spawn: starting the engine process
+      - run: the engine process, from start to exit (for a WorkerEngine, the job)
+      - collect: parsing its output and reading or copying the redline back
+      - cleanup: removing staged files
+      - cache_store: writing the result to the cache
+      - restore_media: putting the stripped media back into the redline
+
+    A binary that turns out to predate pipe mode or JSON results is run again without them;
+    its phases then add up across both attempts. max_rss and the CPU times come from os.wait4
+    and are None where it is unavailable: on Windows, under arun_redline (asyncio reaps the
+    child itself) and for a WorkerEngine, whose process outlives the call.
+    """
+    engine: str                     # engine class name
+    options: Dict[str, Any]         # keyword arguments passed to run_redline
+    io_mode: str
+    phases: Dict[str, float] = field(default_factory=dict)
+    total: float = 0.0              # wall-clock seconds for the whole call
+    engine_timings: Dict[str, float] = field(default_factory=dict)  # RedlineResult.timings
+    input_sizes: Tuple[Optional[int], Optional[int]] = (None, None)  # bytes; None if unknown
+    output_size: Optional[int] = None  # bytes
+    max_rss: Optional[int] = None   # peak resident set of the engine process, in bytes
+    cpu_user: Optional[float] = None    # engine process CPU seconds
+    cpu_system: Optional[float] = None
+    cached: bool = False            # served from the result cache without running the engine
+    unchanged: bool = False         # same content in both documents, so the engine was not run
+    error: Optional[BaseException] = None  # what the call raised, if it failed
+
+    def __post_init__(self):
+        self._started = self._last = time.perf_counter()
+
+    def lap(self, phase: str):
+        """Charges the time since the previous lap (or the start) to phase."""
+        now = time.perf_counter()
+        self.phases[phase] = self.phases.get(phase, 0.0) + now - self._last
+        self._last = now
+
+    def record_rusage(self, rusage):
+        """Adds an engine process's os.wait4() resource usage."""
+        # ru_maxrss is in kilobytes, except on macOS where it is in bytes.
+        max_rss = rusage.ru_maxrss if sys.platform == 'darwin' else rusage.ru_maxrss * 1024
+        self.max_rss = max(self.max_rss or 0, max_rss)
+        self.cpu_user = (self.cpu_user or 0.0) + rusage.ru_utime
+        self.cpu_system = (self.cpu_system or 0.0) + rusage.ru_stime
+
+    def finish(self):
+        self.total = time.perf_counter() - self._started
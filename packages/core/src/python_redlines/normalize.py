@@ -0,0 +1,138 @@
+"""
+Removes markup noise from .docx files before comparison.
+
+Word's output carries a lot of markup that has no bearing on a redline: revision-save IDs
+(w:rsid* attributes) on nearly every paragraph and run, spelling and grammar marks
+(w:proofErr), rendering hints (w:lastRenderedPageBreak), and text split across many
+adjacent runs with identical formatting, one per editing session. WmlComparer's cost
+grows with the number of runs and elements, so a heavily edited document can take several
+times longer to compare than its content warrants.
+
+normalize_docx() rewrites the main document, headers, footers, footnotes, endnotes and
+comments with that noise removed and adjacent identically formatted text runs merged. Text,
+formatting and structure are untouched, so the redline has the same revisions. Parts are
+streamed a paragraph at a time, so memory stays flat however large the document. Other
+parts are copied as they are.
+
+It works on the markup lexically rather than parsing it, which preserves every namespace
+declaration and mc:Ignorable prefix byte for byte. It assumes the standard "w" prefix for
+WordprocessingML that Word and other producers use; a document that binds a different
+prefix is copied through unchanged.
+"""
+import io
+import re
+import shutil
+import zipfile
+from pathlib import Path
+from typing import BinaryIO, Optional, Union
+
+# Parts rewritten; everything else in the package is copied as is.
+_NORMALIZED_PARTS = re.compile(
+    rb'word/(document|header\d*|footer\d*|footnotes|endnotes|comments)\.xml', re.IGNORECASE)
+
+_CHUNK = 1024 * 1024
+
+# Noise removed outright. proofErr and lastRenderedPageBreak are always empty elements.
+# rsid attributes are only removed inside w: start tags, never from text, where Word
+# leaves '"' unescaped; attribute values may hold '>'.
+_START_TAG = re.compile(rb'<w:[\w.\-]+(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+_RSID_ATTRIBUTE = re.compile(rb'\s+w:rsid[A-Za-z]*="[^"]*"')
+_PROOF_ERROR = re.compile(rb'<w:proofErr\b[^>]*/>')
+_RENDERED_PAGE_BREAK = re.compile(rb'<w:lastRenderedPageBreak\s*/>')
+
+# A run holding nothing but optional formatting and one piece of text. Runs with tabs,
+# breaks, fields, drawings or anything else do not match and are never merged.
+_SIMPLE_RUN = re.compile(
+    rb'<w:r>(<w:rPr>(?:(?!</w:rPr>).)*</w:rPr>)?<w:t( xml:space="preserve")?>([^<]*)</w:t></w:r>', re.DOTALL)
+
+_PARAGRAPH_END = b'</w:p>'
+
+Document = Union[str, bytes, Path, BinaryIO]
+
+
+def normalize_docx(document: Document, output: Optional[BinaryIO] = None) -> Optional[bytes]:
+    """
+    Writes a normalized copy of document (bytes, a path, or a binary file object) to output, a
+    binary file object, or returns it as bytes when output is None. Raises zipfile.BadZipFile
+    if document is not a .docx package.
+    """
+    if isinstance(document, bytes):
+        document = io.BytesIO(document)
+    target = io.BytesIO() if output is None else output
+
+    with zipfile.ZipFile(document) as source, \
+            zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as normalized:
+        for info in source.infolist():
+            # A fresh ZipInfo keeps the name, timestamp and attributes but not the old sizes.
+            entry = zipfile.ZipInfo(info.filename, date_time=info.date_time)
+            entry.external_attr = info.external_attr
+            entry.compress_type = info.compress_type
+            with source.open(info) as part, normalized.open(entry, 'w', force_zip64=info.file_size > 2 ** 31) as copy:
+                if _NORMALIZED_PARTS.fullmatch(info.filename.encode('utf-8')):
+                    _normalize_part(part, copy)
+                else:
+                    shutil.copyfileobj(part, copy, _CHUNK)
+
+    return target.getvalue() if output is None else None
+
+
+def normalize_xml(xml: bytes) -> bytes:
+    """xml, a complete run of paragraphs (or any text that ends between them), normalized."""
+    xml = _START_TAG.sub(_without_rsids, xml)
+    xml = _PROOF_ERROR.sub(b'', xml)
+    xml = _RENDERED_PAGE_BREAK.sub(b'', xml)
+    return _merge_runs(xml)
+
+
+def _without_rsids(tag) -> bytes:
+    tag = tag.group(0)
+    return _RSID_ATTRIBUTE.sub(b'', tag) if b'w:rsid' in tag else tag
+
+
+def _normalize_part(part, copy):
+    """Streams one XML part through normalize_xml, cutting it only after a paragraph end."""
+    pending = b''
+    for chunk in iter(lambda: part.read(_CHUNK), b''):
+        pending += chunk
+        cut = pending.rfind(_PARAGRAPH_END)
+        if cut < 0:
+            continue
+        cut += len(_PARAGRAPH_END)
+        copy.write(normalize_xml(pending[:cut]))
+        pending = pending[cut:]
+    copy.write(normalize_xml(pending))
+
+
+def _merge_runs(xml: bytes) -> bytes:
+    """Merges each series of directly adjacent simple runs with identical formatting into one."""
+    pieces = []
+    position = 0
+    series = []     # the adjacent, identically formatted simple runs found so far
+    for run in _SIMPLE_RUN.finditer(xml):
+        if not _mergeable(run):
+            continue
+        if series and (run.start() != series[-1].end() or run.group(1) != series[0].group(1)):
+            pieces.append(_merged(xml, position, series))
+            position = series[-1].end()
+            series = []
+        series.append(run)
+    if series:
+        pieces.append(_merged(xml, position, series))
+        position = series[-1].end()
+    pieces.append(xml[position:])
+    return b''.join(pieces)
+
+
+def _mergeable(run) -> bool:
+    # Without xml:space="preserve", edge whitespace is not significant; merging would make it so.
+    text = run.group(3)
+    return bool(run.group(2)) or text == text.strip()
+
+
+def _merged(xml: bytes, position: int, series) -> bytes:
+    """xml from position up to the end of series, with the runs of series merged into one."""
+    if len(series) == 1:
+        return xml[position:series[0].end()]
+    text = b''.join(run.group(3) for run in series)
+    merged = b'<w:r>%s<w:t xml:space="preserve">%s</w:t></w:r>' % (series[0].group(1) or b'', text)
+    return xml[position:series[0].start()] + merged
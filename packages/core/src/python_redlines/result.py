@@ -0,0 +1,68 @@
+import re
+import subprocess
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+# The summary line each engine prints, for binaries that cannot report JSON results.
+_REVISION_COUNT = re.compile(r'(?:Revisions found:|Redline complete:)\s*(\d+)')
+
+
+@dataclass(eq=False)
+class RedlineResult:
+    """
+    The outcome of one comparison, as returned by run_redline().
+
+    It unpacks and indexes like the (redline, stdout, stderr) tuple earlier versions returned,
+    so ``redline, stdout, stderr = engine.run_redline(...)`` and ``result[0]`` keep working, and
+    it compares equal to that tuple. The other fields come from the binary's JSON result mode
+    and are empty when the binary does not support it.
+    """
+    redline: Optional[bytes]        # None when the redline was written to an output instead
+    stdout: Optional[str] = None    # the engine's summary text
+    stderr: Optional[str] = None
+    revisions: Optional[int] = None  # total revisions, when the engine reported them
+    revisions_by_type: Dict[str, int] = field(default_factory=dict)  # insert/delete/move/format
+    timings: Dict[str, float] = field(default_factory=dict)  # seconds per engine phase
+    sizes: Dict[str, int] = field(default_factory=dict)  # bytes: original, modified, redline
+
+    def __post_init__(self):
+        if self.revisions is None and self.stdout:
+            match = _REVISION_COUNT.search(self.stdout)
+            if match:
+                self.revisions = int(match.group(1))
+
+    def __iter__(self):
+        return iter((self.redline, self.stdout, self.stderr))
+
+    def __len__(self):
+        return 3
+
+    def __getitem__(self, index):
+        return (self.redline, self.stdout, self.stderr)[index]
+
+    def __eq__(self, other):
+        if isinstance(other, tuple):
+            return tuple(self) == other
+        if isinstance(other, RedlineResult):
+            return (tuple(self), self.revisions, self.revisions_by_type, self.sizes) == (
+                tuple(other), other.revisions, other.revisions_by_type, other.sizes)
+        return NotImplemented
+
+    __hash__ = None
+
+
+class EngineError(subprocess.CalledProcessError):
+    """
+    Raised when the engine binary reports that a comparison failed. error_type is the
+    engine's exception type (when it reported one) and message its description.
+    """
+
+    def __init__(self, returncode: int, cmd, error_type: Optional[str], message: Optional[str],
+                 output: Optional[str] = None, stderr: Optional[str] = None):
+        super().__init__(returncode, cmd, output=output, stderr=stderr)
+        self.error_type = error_type
+        self.message = message
+
+    def __str__(self):
+        kind = f"{self.error_type}: " if self.error_type else ""
+        return f"Engine failed with exit code {self.returncode}: {kind}{self.message}"
@@ -0,0 +1,482 @@
+"""
+Splits a large comparison into sections that can run in parallel, and merges the results.
+
+One engine process compares a whole document on a single thread, so a 3,000-page
+agreement takes as long as the slowest core allows. plan_sections() finds anchors: body
+paragraphs or tables that occur exactly once in each document, are identical in both, and
+appear in the same order. It then cuts both documents before some of them, preferring
+headings and section breaks, into sections of about section_size body blocks. No cut falls
+inside a bookmark, move range, permission range or field that spans paragraphs, so every
+range starts and ends in the same section. Because
+every cut falls just before an unchanged anchor, no revision can span two sections, and
+comparing the sections one by one finds the same revisions as comparing the whole. The one
+exception is a moved paragraph that crosses a cut, which shows as a deletion and an
+insertion instead of a move.
+
+Sections whose content is identical in both documents are not compared at all.
+merge_sections() puts the section redlines back together into one package. It renumbers
+revision IDs and brings over any relationship (an image of deleted content, say) or style
+that a section's redline introduced.
+
+Documents are only split when that is known to be safe. They must have no footnotes,
+endnotes or comments referenced from the body, and their headers, footers and notes parts
+must match. Section redlines that disagree about shared parts such as numbering, or that
+define one style differently, cannot be merged, and merge_sections() returns None; callers
+then compare the whole document instead. The revision-save IDs listed in settings are
+ignored, since the engine records its own for every comparison.
+"""
+import hashlib
+import io
+import posixpath
+import re
+import zipfile
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from xml.etree import ElementTree
+from xml.sax.saxutils import quoteattr
+
+from .normalize import normalize_xml
+
+_DOCUMENT = 'word/document.xml'
+_DOCUMENT_RELS = 'word/_rels/document.xml.rels'
+_CONTENT_TYPES = '[Content_Types].xml'
+
+_RELS_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+_TYPES_NS = 'http://schemas.openxmlformats.org/package/2006/content-types'
+
+# One tag, with attribute values that may contain '>'.
+_TAG = re.compile(rb'<(/?)([\w:.\-]+)(?:[^>"\']|"[^"]*"|\'[^\']*\')*?(/?)>')
+_BODY_START = re.compile(rb'<w:body\b[^>]*>')
+_ROOT_START = re.compile(rb'<w:document\b(?:[^>"\']|"[^"]*"|\'[^\']*\')*>')
+_NAMESPACE = re.compile(rb'\sxmlns:([\w.\-]+)="[^"]*"')
+
+# Body content that refers into notes or comments parts, whose IDs the engine may renumber.
+_UNSPLITTABLE = re.compile(rb'<w:(footnoteReference|endnoteReference|commentReference|commentRangeStart)\b')
+# Parts that must match for sections to be compared independently.
+_MUST_MATCH = re.compile(r'word/(header\d*|footer\d*|footnotes|endnotes|comments)\.xml', re.IGNORECASE)
+# Parts every section redline must agree on for them to be merged.
+_SHARED = re.compile(r'word/(styles|numbering|settings|fontTable|footnotes|endnotes|comments)\.xml', re.IGNORECASE)
+
+# Ranges whose start and end must stay in one section, and complex field boundaries.
+_RANGE = re.compile(rb'<w:(bookmark|moveFromRange|moveToRange|commentRange|perm)(Start|End)\b[^>]*?\bw:id="([^"]*)"'
+                    rb'|<w:fldChar\b[^>]*?\bw:fldCharType="(begin|end)"')
+# Settings' list of revision-save IDs, which differs between any two comparisons.
+_SETTINGS_RSIDS = re.compile(rb'<w:rsids>.*?</w:rsids>', re.DOTALL)
+_STYLES = 'word/styles.xml'
+_STYLE = re.compile(rb'<w:style\b[^>]*?\bw:styleId="([^"]*)"(?:[^>]*/>|[^>]*>.*?</w:style>)', re.DOTALL)
+
+_HEADING = re.compile(rb'<w:pStyle w:val="(?:[Hh]eading ?\d|Title)"|<w:outlineLvl w:val="0"|<w:sectPr\b')
+
+# Annotations whose w:id must be unique across the merged document.
+_ANNOTATION = re.compile(
+    rb'(<w:(?:ins|del|moveFrom|moveTo|moveFromRangeStart|moveFromRangeEnd|moveToRangeStart|moveToRangeEnd|'
+    rb'rPrChange|pPrChange|sectPrChange|tblPrChange|trPrChange|tcPrChange|tblGridChange|numberingChange|'
+    rb'cellIns|cellDel|cellMerge|bookmarkStart|bookmarkEnd)\b[^>]*?\bw:id=")(-?\d+)(")')
+# Move ranges pair up by name, which must be unique too.
+_MOVE_NAME = re.compile(rb'(<w:move(?:From|To)RangeStart\b[^>]*?\bw:name=")([^"]*)(")')
+# Attributes that refer to the document part's relationships.
+_RELATIONSHIP_REFERENCE = re.compile(rb'(\br:[A-Za-z]+=")([^"]+)(")')
+
+
+@dataclass
+class Section:
+    """A slice of the body blocks of each document, [start, end)."""
+    original: Tuple[int, int]
+    modified: Tuple[int, int]
+    unchanged: bool
+
+
+class _Document(object):
+    """A parsed .docx: its parts, and document.xml cut into head, body blocks and tail."""
+
+    def __init__(self, data: bytes):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            self.names = archive.namelist()
+            self.parts = {name: archive.read(name) for name in self.names}
+        xml = self.parts[_DOCUMENT]
+        body = _BODY_START.search(xml)
+        end = xml.rfind(b'</w:body>')
+        if body is None or end < 0:
+            raise ValueError("document.xml has no body")
+
+        self.blocks = _top_level_elements(xml, body.end(), end)
+        tail_start = end
+        if self.blocks and self.blocks[-1].startswith(b'<w:sectPr'):
+            final_section = self.blocks.pop()
+            tail_start = xml.rfind(final_section, 0, end)
+        self.head = xml[:body.end()]
+        self.tail = xml[tail_start:]
+        self.keys = [hashlib.sha256(normalize_xml(block)).digest() for block in self.blocks]
+        self.open_before = _open_ranges(self.blocks)
+
+    def package(self, blocks: List[bytes]) -> bytes:
+        """This document with its body replaced by blocks."""
+        return _write_package(self.names, self.parts, {_DOCUMENT: self.head + b''.join(blocks) + self.tail})
+
+
+class SectionPlan(object):
+    """Where to cut a pair of documents, and the section documents to compare."""
+
+    def __init__(self, original: _Document, modified: _Document, sections: List[Section]):
+        self.original = original
+        self.modified = modified
+        self.sections = sections
+
+    def documents(self, index: int) -> Tuple[bytes, bytes]:
+        """The (original, modified) pair of .docx packages for one section."""
+        section = self.sections[index]
+        return (self.original.package(self.original.blocks[slice(*section.original)]),
+                self.modified.package(self.modified.blocks[slice(*section.modified)]))
+
+
+def plan_sections(original: bytes, modified: bytes, section_size: int = 500) -> Optional[SectionPlan]:
+    """
+    Plans sections of about section_size body blocks (paragraphs and tables). Returns None when
+    the pair cannot be split safely or would form a single section.
+    """
+    try:
+        documents = _Document(original), _Document(modified)
+    except (zipfile.BadZipFile, KeyError, ValueError):
+        return None
+    original_doc, modified_doc = documents
+    for document in documents:
+        if any(_UNSPLITTABLE.search(block) for block in document.blocks):
+            return None
+    for name in set(original_doc.parts) | set(modified_doc.parts):
+        if _MUST_MATCH.fullmatch(name) and _normalized_part(original_doc, name) != _normalized_part(modified_doc, name):
+            return None
+
+    cuts = _choose_cuts(original_doc, modified_doc, _anchors(original_doc.keys, modified_doc.keys), section_size)
+    if not cuts:
+        return None
+    bounds = [(0, 0)] + cuts + [(len(original_doc.blocks), len(modified_doc.blocks))]
+    sections = []
+    for (original_start, modified_start), (original_end, modified_end) in zip(bounds, bounds[1:]):
+        unchanged = (original_doc.keys[original_start:original_end] == modified_doc.keys[modified_start:modified_end])
+        sections.append(Section((original_start, original_end), (modified_start, modified_end), unchanged))
+    return SectionPlan(original_doc, modified_doc, sections)
+
+
+def merge_sections(plan: SectionPlan, redlines: Dict[int, bytes]) -> Optional[bytes]:
+    """
+    One redline package from the redlines of the changed sections, keyed by section index;
+    unchanged sections are taken from the modified document. Returns None if the section
+    redlines disagree about a shared part and cannot be merged.
+    """
+    documents = {index: _Document(redline) for index, redline in redlines.items()}
+    if not documents:
+        return plan.modified.package(plan.modified.blocks)
+    base = documents[min(documents)]
+    for document in documents.values():
+        for name in set(base.parts) | set(document.parts):
+            if _SHARED.fullmatch(name) and name != _STYLES and \
+                    _comparable_part(base, name) != _comparable_part(document, name):
+                return None
+    styles = _merge_styles([document.parts.get(_STYLES) for document in documents.values()])
+    if styles is None:
+        return None
+
+    parts = dict(base.parts)
+    if styles:
+        parts[_STYLES] = styles
+    names = list(base.names)
+    relationships = _Relationships(parts.get(_DOCUMENT_RELS, b''))
+    content_types = _ContentTypes(parts[_CONTENT_TYPES])
+    ids = _Renumbering()
+    body = []
+    for index, section in enumerate(plan.sections):
+        document = documents.get(index)
+        if document is None:
+            blocks = plan.modified.blocks[slice(*section.modified)]
+            source = plan.modified
+        else:
+            blocks = document.blocks
+            source = document
+        if source is not base:
+            rename = relationships.merge(_Relationships(source.parts.get(_DOCUMENT_RELS, b'')), source, parts, names,
+                                         content_types, index)
+            blocks = [_RELATIONSHIP_REFERENCE.sub(
+                lambda match: match.group(1) + rename.get(match.group(2), match.group(2)) + match.group(3), block)
+                for block in blocks]
+        body.extend(ids.renumber(block, index) for block in blocks)
+
+    last = documents.get(len(plan.sections) - 1, plan.modified)
+    head = _merge_namespaces(base.head, [plan.modified.head] + [document.head for document in documents.values()])
+    parts[_DOCUMENT] = head + b''.join(body) + ids.renumber(last.tail, len(plan.sections) - 1)
+    parts[_DOCUMENT_RELS] = relationships.serialize()
+    parts[_CONTENT_TYPES] = content_types.serialize()
+    if _DOCUMENT_RELS not in names:
+        names.append(_DOCUMENT_RELS)
+    return _write_package(names, parts, {})
+
+
+def _top_level_elements(xml: bytes, start: int, end: int) -> List[bytes]:
+    """The complete elements directly inside xml[start:end]."""
+    blocks = []
+    depth = 0
+    block_start = None
+    for tag in _TAG.finditer(xml, start, end):
+        closing, self_closing = tag.group(1), tag.group(3)
+        if closing:
+            depth -= 1
+            if depth == 0:
+                blocks.append(xml[block_start:tag.end()])
+        elif self_closing:
+            if depth == 0:
+                blocks.append(xml[tag.start():tag.end()])
+        else:
+            if depth == 0:
+                block_start = tag.start()
+            depth += 1
+    return blocks
+
+
+def _anchors(original: List[bytes], modified: List[bytes]) -> List[Tuple[int, int]]:
+    """
+    (original index, modified index) of blocks that occur once in each document, in the same
+    order in both: the longest increasing run of such unique matches, as in patience diff.
+    """
+    def unique(keys):
+        seen = {}
+        for index, key in enumerate(keys):
+            seen[key] = None if key in seen else index
+        return {key: index for key, index in seen.items() if index is not None}
+
+    in_modified = unique(modified)
+    matches = [(index, in_modified[key]) for key, index in sorted(unique(original).items(), key=lambda item: item[1])
+               if key in in_modified]
+
+    # Longest increasing subsequence of the modified indexes, O(n log n).
+    tails, tail_ends, previous = [], [], [None] * len(matches)
+    for position, (_, modified_index) in enumerate(matches):
+        length = bisect_left(tail_ends, modified_index)
+        previous[position] = tails[length - 1] if length else None
+        if length == len(tails):
+            tails.append(position)
+            tail_ends.append(modified_index)
+        else:
+            tails[length] = position
+            tail_ends[length] = modified_index
+    anchors = []
+    position = tails[-1] if tails else None
+    while position is not None:
+        anchors.append(matches[position])
+        position = previous[position]
+    return anchors[::-1]
+
+
+def _choose_cuts(original: _Document, modified: _Document, anchors, section_size: int) -> List[Tuple[int, int]]:
+    """
+    Anchors to cut before: the first heading or section break at least section_size blocks
+    past the previous cut, or failing that any anchor twice as far.
+    """
+    cuts = []
+    last = 0
+    for original_index, modified_index in anchors:
+        distance = original_index - last
+        if distance < section_size or original.open_before[original_index] or modified.open_before[modified_index]:
+            continue
+        if _HEADING.search(original.blocks[original_index]) or distance >= 2 * section_size:
+            cuts.append((original_index, modified_index))
+            last = original_index
+    # A last section much smaller than the rest is folded into the one before.
+    if cuts and len(original.blocks) - cuts[-1][0] < section_size // 4:
+        cuts.pop()
+    return cuts
+
+
+def _open_ranges(blocks: List[bytes]) -> List[bool]:
+    """For each block, whether a range or field opened by an earlier block is still open there."""
+    open_before = []
+    ranges = set()
+    fields = 0
+    for block in blocks:
+        open_before.append(bool(ranges) or fields > 0)
+        for match in _RANGE.finditer(block):
+            kind, edge, range_id, field_edge = match.groups()
+            if field_edge is not None:
+                fields = fields + 1 if field_edge == b'begin' else max(fields - 1, 0)
+            elif edge == b'Start':
+                ranges.add((kind, range_id))
+            else:
+                ranges.discard((kind, range_id))
+    return open_before
+
+
+def _normalized_part(document: _Document, name: str) -> Optional[bytes]:
+    data = document.parts.get(name)
+    return normalize_xml(data) if data is not None else None
+
+
+def _comparable_part(document: _Document, name: str) -> Optional[bytes]:
+    """A shared part as section redlines must agree on it: normalized, and settings without rsids."""
+    data = _normalized_part(document, name)
+    if data is not None and name.lower() == 'word/settings.xml':
+        data = _SETTINGS_RSIDS.sub(b'', data)
+    return data
+
+
+def _merge_styles(styles: List[Optional[bytes]]) -> Optional[bytes]:
+    """
+    The first section's styles with any style the others added, such as the style of deleted
+    content, or None if two sections define a style differently or differ in anything else.
+    b'' when no section has a styles part.
+    """
+    present = [data for data in styles if data is not None]
+    if not present:
+        return b''
+    if len(present) != len(styles):
+        return None
+    merged = present[0]
+    definitions = {match.group(1): normalize_xml(match.group(0)) for match in _STYLE.finditer(merged)}
+    rest = normalize_xml(_STYLE.sub(b'', merged))
+    added = []
+    for data in present[1:]:
+        if normalize_xml(_STYLE.sub(b'', data)) != rest:
+            return None
+        for match in _STYLE.finditer(data):
+            definition = normalize_xml(match.group(0))
+            known = definitions.setdefault(match.group(1), definition)
+            if known != definition:
+                return None
+            if known is definition:
+                added.append(match.group(0))
+    if not added:
+        return merged
+    end = merged.rfind(b'</w:styles>')
+    return merged[:end] + b''.join(added) + merged[end:]
+
+
+def _write_package(names: List[str], parts: Dict[str, bytes], replace: Dict[str, bytes]) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED, compresslevel=1) as archive:
+        for name in names:
+            archive.writestr(name, replace.get(name, parts[name]))
+    return buffer.getvalue()
+
+
+def _merge_namespaces(head: bytes, heads: List[bytes]) -> bytes:
+    """head with any namespace declaration from heads' root elements that it lacks."""
+    root = _ROOT_START.search(head)
+    if root is None:
+        return head
+    declared = set(_NAMESPACE.findall(root.group(0)))
+    missing = []
+    for other in heads:
+        other_root = _ROOT_START.search(other)
+        for declaration in _NAMESPACE.finditer(other_root.group(0) if other_root else b''):
+            if declaration.group(1) not in declared:
+                declared.add(declaration.group(1))
+                missing.append(declaration.group(0))
+    if not missing:
+        return head
+    insert = root.end() - (2 if root.group(0).endswith(b'/>') else 1)
+    return head[:insert] + b''.join(missing) + head[insert:]
+
+
+class _Renumbering(object):
+    """Gives each section's annotation IDs and move names new values unique across the merge."""
+
+    def __init__(self):
+        self._ids: Dict[Tuple[int, bytes], bytes] = {}
+
+    def renumber(self, xml: bytes, section: int) -> bytes:
+        def new_id(match):
+            key = (section, match.group(2))
+            if key not in self._ids:
+                self._ids[key] = str(len(self._ids) + 1).encode('ascii')
+            return match.group(1) + self._ids[key] + match.group(3)
+
+        xml = _ANNOTATION.sub(new_id, xml)
+        return _MOVE_NAME.sub(lambda match: match.group(1) + match.group(2) + b'_s%d' % section + match.group(3), xml)
+
+
+class _Relationships(object):
+    """The relationships of word/document.xml."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.entries: Dict[str, Dict[str, str]] = {}
+        if data:
+            for element in ElementTree.fromstring(data):
+                self.entries[element.get('Id')] = dict(element.attrib)
+
+    def merge(self, other: '_Relationships', source: _Document, parts: Dict[str, bytes], names: List[str],
+              content_types: '_ContentTypes', section: int) -> Dict[bytes, bytes]:
+        """
+        Adds other's relationships that this one lacks or has with a different target or target
+        content, copying their parts from source. Returns {old ID: new ID} for those renamed.
+        """
+        rename = {}
+        for relationship_id, entry in other.entries.items():
+            mine = self.entries.get(relationship_id)
+            target = self._part_name(entry)
+            if mine is not None and mine.get('Target') == entry.get('Target') and \
+                    mine.get('Type') == entry.get('Type') and \
+                    (target is None or parts.get(target) == source.parts.get(target)):
+                continue
+            if target is not None and target not in source.parts:
+                continue  # a dangling relationship; nothing to bring over
+            new_id = f'rIdS{section}{relationship_id}'
+            entry = dict(entry, Id=new_id)
+            if target is not None and parts.get(target) != source.parts[target]:
+                directory, base = posixpath.split(entry['Target'])
+                entry['Target'] = posixpath.join(directory, f's{section}-{base}')
+                new_target = self._part_name(entry)
+                parts[new_target] = source.parts[target]
+                names.append(new_target)
+                content_types.cover(new_target, source.parts[_CONTENT_TYPES], target)
+            self.entries[new_id] = entry
+            rename[relationship_id.encode('utf-8')] = new_id.encode('utf-8')
+        return rename
+
+    @staticmethod
+    def _part_name(entry: Dict[str, str]) -> Optional[str]:
+        if entry.get('TargetMode') == 'External':
+            return None
+        target = entry.get('Target', '')
+        return target.lstrip('/') if target.startswith('/') else posixpath.normpath(posixpath.join('word', target))
+
+    def serialize(self) -> bytes:
+        if self.data and len(self.entries) == len(ElementTree.fromstring(self.data)):
+            return self.data
+        lines = [f'<Relationship {" ".join(f"{key}={quoteattr(value)}" for key, value in entry.items())}/>'
+                 for entry in self.entries.values()]
+        return (f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+                f'<Relationships xmlns="{_RELS_NS}">{"".join(lines)}</Relationships>').encode('utf-8')
+
+
+class _ContentTypes(object):
+    """[Content_Types].xml, extended with entries for parts copied from other packages."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        root = ElementTree.fromstring(data)
+        self.defaults = {element.get('Extension', '').lower() for element in root
+                         if element.tag == f'{{{_TYPES_NS}}}Default'}
+        self.additions = []
+
+    def cover(self, name: str, source_types: bytes, source_name: str):
+        """Makes sure name has a content type, taking source_name's from source_types."""
+        extension = posixpath.splitext(name)[1].lstrip('.').lower()
+        source = ElementTree.fromstring(source_types)
+        for element in source:
+            if element.tag == f'{{{_TYPES_NS}}}Override' and element.get('PartName') == '/' + source_name:
+                self.additions.append(f'<Override PartName={quoteattr("/" + name)} '
+                                      f'ContentType={quoteattr(element.get("ContentType"))}/>')
+                return
+        if extension in self.defaults:
+            return
+        for element in source:
+            if element.tag == f'{{{_TYPES_NS}}}Default' and element.get('Extension', '').lower() == extension:
+                self.defaults.add(extension)
+                self.additions.append(f'<Default Extension={quoteattr(extension)} '
+                                      f'ContentType={quoteattr(element.get("ContentType"))}/>')
+                return
+
+    def serialize(self) -> bytes:
+        if not self.additions:
+            return self.data
+        end = self.data.rfind(b'</Types>')
+        return self.data[:end] + ''.join(self.additions).encode('utf-8') + self.data[end:]
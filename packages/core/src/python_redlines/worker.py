@@ -0,0 +1,212 @@
+import json
+import logging
+import os
+import struct
+import subprocess
+import threading
+from typing import Optional
+
+from .engines import (
+    BaseEngine,
+    DocumentInput,
+    EngineTimeoutError,
+    RedlineOutput,
+    _apply_rlimits,
+    _limited_command,
+)
+from .result import RedlineResult
+
+logger = logging.getLogger(__name__)
+
+# Frames are a 4-byte big-endian payload length followed by a UTF-8 JSON payload;
+# csproj/Program.cs implements the other end.
+_FRAME_HEADER = struct.Struct('>I')
+
+
+class WorkerEngine(object):
+    """
+    Runs redlines through one long-lived engine process instead of one process per call.
+
+    Wraps an engine whose binary supports worker mode (``WORKER_FLAG``) and exposes the same
+    ``run_redline`` signature. The worker is started on first use and restarted automatically
+    if it dies; calls are serialized, so use one WorkerEngine per thread for parallelism.
+
+    The engine's timeout applies to each job, and its max_memory to the worker process as a
+    whole. A worker that times out is killed and replaced on the next call. max_cpu_seconds
+    is not supported, since CPU time accumulates across every job the worker runs. The
+    engine's cache, if it has one, is consulted before a job is sent to the worker.
+
+        with WorkerEngine(XmlPowerToolsEngine()) as engine:
+            for original, modified in pairs:
+                redline, stdout, stderr = engine.run_redline("Author", original, modified)
+    """
+
+    def __init__(self, engine: BaseEngine):
+        if not engine.WORKER_FLAG:
+            raise ValueError(f"{type(engine).__name__} does not support worker mode.")
+        if engine.limits.max_cpu_seconds is not None:
+            raise ValueError("WorkerEngine does not support max_cpu_seconds; use timeout instead.")
+        self.engine = engine
+        self.spawn_count = 0
+        self._process: Optional[subprocess.Popen] = None
+        self._lock = threading.Lock()
+
+    def __enter__(self) -> 'WorkerEngine':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def run_redline(self, author_tag: str, original: DocumentInput, modified: DocumentInput,
+                    output: RedlineOutput = None, timeout: Optional[float] = None,
+                    max_memory: Optional[int] = None, max_cpu_seconds: Optional[float] = None,
+                    normalize: Optional[bool] = None, strip_media: Optional[bool] = None,
+                    **kwargs) -> RedlineResult:
+        """
+        Runs one comparison on the worker. Arguments and return value match
+        BaseEngine.run_redline; a non-zero job exit raises subprocess.CalledProcessError.
+        timeout, normalize and strip_media override the engine's settings for this job.
+
+        The worker's memory limit is fixed when it starts, so max_memory may only repeat the
+        engine's own, and max_cpu_seconds is not supported; anything else raises ValueError.
+        """
+        engine = self.engine
+        if max_cpu_seconds is not None:
+            raise ValueError("WorkerEngine does not support max_cpu_seconds; use timeout instead.")
+        if max_memory is not None and max_memory != engine.limits.max_memory:
+            raise ValueError("WorkerEngine applies the engine's max_memory to the whole worker; "
+                             "set it on the engine instead of per call.")
+        limits = engine._resolve_limits(timeout)
+        return engine._drive(engine._redline_steps(author_tag, original, modified, output, limits, normalize,
+                                                   strip_media, kwargs, run=self._run_staged))
+
+    def _run_staged(self, author_tag, original, modified, output, limits, metrics, **kwargs) -> RedlineResult:
+        with self.engine._redline_paths(original, modified, output=output) as (
+                original_path, modified_path, target_path, _):
+            if metrics is not None:
+                metrics.lap('stage')
+            result = self._run_job(author_tag, original_path, modified_path, target_path, output, limits, metrics,
+                                   **kwargs)
+        if metrics is not None:
+            metrics.lap('cleanup')
+        return result
+
+    def _run_job(self, author_tag, original_path, modified_path, target_path, output, limits, metrics,
+                 **kwargs) -> RedlineResult:
+        engine = self.engine
+        # Retried without JSON results if the binary turns out to predate them.
+        while True:
+            json_mode = engine._use_json()
+            command = engine._command(author_tag, original_path, modified_path, target_path, json_mode, **kwargs)
+            request = {'args': [os.fspath(arg) for arg in command[1:]]}
+
+            with self._lock:
+                if metrics is not None:
+                    metrics.lap('queue')
+                response = self._submit(request, command, limits)
+            if metrics is not None:
+                metrics.lap('run')
+
+            exit_code = response.get('exit_code', 0)
+            stdout = (response.get('stdout') or '').encode('utf-8')
+            stderr = (response.get('stderr') or '').encode('utf-8')
+            engine._check_limits(command, limits, exit_code, stdout, stderr)
+
+            result = engine._parse_result(command, json_mode, exit_code, stdout, stderr)
+            if result is not None:
+                result.redline = engine._deliver(target_path, output)
+                if metrics is not None:
+                    metrics.lap('collect')
+                return result
+
+    def warmup(self):
+        """Starts the worker process now rather than on the first comparison."""
+        with self._lock:
+            self._ensure_process()
+
+    def close(self):
+        """Stops the worker process, if one is running. A later run_redline starts a new one."""
+        with self._lock:
+            self._stop()
+
+    def _submit(self, request: dict, command, limits) -> dict:
+        payload = json.dumps(request).encode('utf-8')
+
+        # A worker that died between jobs is replaced and the job sent again. One that dies
+        # after accepting a job is not retried: the document itself may be what killed it.
+        for attempt in range(2):
+            process = self._ensure_process()
+            try:
+                process.stdin.write(_FRAME_HEADER.pack(len(payload)) + payload)
+                process.stdin.flush()
+            except (BrokenPipeError, OSError):
+                self._stop()
+                if attempt:
+                    raise
+                continue
+
+            expired = threading.Event()
+            timer = None
+            if limits.timeout is not None:
+                timer = threading.Timer(limits.timeout, lambda: (expired.set(), process.kill()))
+                timer.start()
+            try:
+                response = self._read_frame(process)
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+            if response is None:
+                returncode = self._stop()
+                if expired.is_set():
+                    raise EngineTimeoutError(
+                        f"Engine did not finish within {limits.timeout} seconds.", command, limits.timeout)
+                self.engine._check_limits(command, limits, returncode, b'', b'')
+                raise subprocess.CalledProcessError(
+                    returncode, command, stderr='engine worker exited before completing the job')
+            return json.loads(response.decode('utf-8'))
+
+    def _ensure_process(self) -> subprocess.Popen:
+        if self._process is not None and self._process.poll() is not None:
+            logger.warning("Engine worker exited with code %s; restarting it.", self._process.returncode)
+            self._stop()
+
+        if self._process is None:
+            limits = self.engine.limits
+            command = _limited_command([self.engine.extracted_binaries_path, self.engine.WORKER_FLAG], limits)
+            self._process = subprocess.Popen(command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                             **self.engine._spawn_options(limits))
+            _apply_rlimits(self._process.pid, limits)
+            self.spawn_count += 1
+
+        return self._process
+
+    def _stop(self) -> Optional[int]:
+        """Shuts the current worker down (EOF first, then kill) and returns its exit code."""
+        process, self._process = self._process, None
+        if process is None:
+            return None
+
+        try:
+            process.stdin.close()
+        except OSError:
+            pass
+        try:
+            process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        process.stdout.close()
+        return process.returncode
+
+    @staticmethod
+    def _read_frame(process: subprocess.Popen) -> Optional[bytes]:
+        """Reads one response frame, or returns None if the worker closed stdout first."""
+        header = process.stdout.read(_FRAME_HEADER.size)
+        if len(header) < _FRAME_HEADER.size:
+            return None
+        (length,) = _FRAME_HEADER.unpack(header)
+        payload = process.stdout.read(length)
+        if len(payload) < length:
+            return None
+        return payload
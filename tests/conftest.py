@@ -0,0 +1,10 @@
+import pytest
+
+from python_redlines import engines
+
+
+@pytest.fixture(autouse=True)
+def forget_legacy_binaries(monkeypatch):
+    """Each test starts without binaries remembered as predating pipe mode or JSON results."""
+    monkeypatch.setattr(engines, '_STDIO_UNSUPPORTED', set())
+    monkeypatch.setattr(engines, '_JSON_UNSUPPORTED', set())
@@ -0,0 +1,153 @@
+"""A stand-in for the compiled engine binaries, for tests that exercise the Python wrapper.
+
+``fake_redline_binary()`` writes an executable script that speaks the same command line,
+pipe mode and worker protocol as csproj/Program.cs: it "redlines" by copying the modified document
+to the target and reports one revision when the inputs differ, none when they match.
+A modified document whose bytes are ``b'CRASH'`` makes it exit abruptly; ``b'SLOW'``
+makes it hang for a minute; ``b'SPIN'`` burns CPU for a minute; ``b'HOG'`` allocates
+memory until it fails. With FAKE_REDLINES_LEGACY set it behaves like a binary that
+predates pipe mode and JSON results, and with FAKE_REDLINES_NO_JSON like one that predates
+only JSON results.
+"""
+
+import os
+import sys
+import tempfile
+
+import pytest
+
+from python_redlines.engines import XmlPowerToolsEngine
+
+# For tests that run the fake binary, which is a shebang script.
+needs_fake_binary = pytest.mark.skipif(sys.platform == 'win32', reason='the fake engine binary is a shebang script')
+
+SCRIPT = r'''
+import json
+import os
+import struct
+import sys
+import time
+
+FRAME = struct.Struct('>I')
+BLOB = struct.Struct('>Q')
+
+
+def read_document(path, stdin):
+    if path == '-':
+        (length,) = BLOB.unpack(stdin.read(BLOB.size))
+        return stdin.read(length)
+    with open(path, 'rb') as handle:
+        return handle.read()
+
+
+def run(args, out, allow_stdio=True):
+    json_mode = args[:1] == ['--json'] and not os.environ.get('FAKE_REDLINES_LEGACY') \
+        and not os.environ.get('FAKE_REDLINES_NO_JSON')
+    if json_mode:
+        args = args[1:]
+    if len(args) != 4:
+        out.write('Usage: redlines [--json] <author_tag> <original_path.docx> <modified_path.docx> <redline_path.docx>\n')
+        return 0
+    author, original, modified, target = args
+    legacy = os.environ.get('FAKE_REDLINES_LEGACY')
+    if '-' in args and (not allow_stdio or legacy):
+        # what a binary that predates pipe mode does with "-" paths
+        out.write('Error: One or both files do not exist.\n')
+        return 0
+    try:
+        original_bytes = read_document(original, sys.stdin.buffer)
+        modified_bytes = read_document(modified, sys.stdin.buffer)
+    except OSError as exc:
+        if json_mode:
+            error = {'type': type(exc).__name__, 'message': str(exc)}
+            out.write(json.dumps({'ok': False, 'error': error}) + '\n')
+            return 1
+        if legacy:
+            out.write('Error: One or both files do not exist.\n')
+            return 0
+        sys.stderr.write('Error: One or both files do not exist.\n')
+        return 1
+    if modified_bytes == b'CRASH':
+        os._exit(3)
+    if modified_bytes == b'SLOW':
+        time.sleep(60)
+    if modified_bytes == b'SPIN':
+        deadline = time.time() + 60
+        while time.time() < deadline:
+            pass
+    if modified_bytes == b'HOG':
+        hoard = [bytearray(1 << 24) for _ in range(1 << 12)]
+    count = 0 if original_bytes == modified_bytes else 1
+    summary = 'Revisions found: %d' % count
+    if json_mode:
+        summary = json.dumps({
+            'ok': True,
+            'summary': summary,
+            'revisions': {'total': count, 'insert': count, 'delete': 0, 'move': 0, 'format': 0},
+            'timings_ms': {'read': 1.0, 'compare': 2.0, 'revisions': 0.5, 'write': 1.0},
+            'sizes': {'original': len(original_bytes), 'modified': len(modified_bytes),
+                      'redline': len(modified_bytes)},
+        })
+    summary += '\n'
+    if target == '-':
+        stdout = sys.stdout.buffer
+        stdout.write(b'RDLN' + BLOB.pack(len(modified_bytes)) + modified_bytes + summary.encode())
+        stdout.flush()
+        return 0
+    with open(target, 'wb') as handle:
+        handle.write(modified_bytes)
+    out.write(summary)
+    return 0
+
+
+def read_exactly(stream, size):
+    data = stream.read(size)
+    return data if len(data) == size else None
+
+
+def serve():
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    while True:
+        header = read_exactly(stdin, FRAME.size)
+        if header is None:
+            return 0
+        job = json.loads(read_exactly(stdin, FRAME.unpack(header)[0]))
+
+        class Capture(object):
+            text = ''
+
+            def write(self, value):
+                self.text += value
+
+        out = Capture()
+        exit_code = run(job['args'], out, allow_stdio=False)
+        payload = json.dumps({'exit_code': exit_code, 'stdout': out.text, 'stderr': ''}).encode()
+        stdout.write(FRAME.pack(len(payload)) + payload)
+        stdout.flush()
+
+
+if sys.argv[1:] == ['--worker']:
+    sys.exit(serve())
+sys.exit(run(sys.argv[1:], sys.stdout))
+'''
+
+_binary_path = None
+
+
+def fake_redline_binary() -> str:
+    """Path to the fake engine executable, written once per test session."""
+    global _binary_path
+    if _binary_path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix='fake-redlines-'), 'redlines')
+        with open(path, 'w') as handle:
+            handle.write(f'#!{sys.executable}\n{SCRIPT}')
+        os.chmod(path, 0o755)
+        _binary_path = path
+    return _binary_path
+
+
+class FakeEngine(XmlPowerToolsEngine):
+    """XmlPowerToolsEngine wired to the fake binary instead of an installed companion package."""
+
+    def _resolve_binary(self) -> str:
+        return fake_redline_binary()
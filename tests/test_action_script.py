@@ -5,9 +5,16 @@ the two integration tests at the bottom run the real DocxodusEngine against
 the repo fixtures, matching the requirements of the other test modules.
 """
 
+import fnmatch
+import hashlib
+import io
 import json
+import shutil
 import subprocess
 import sys
+import threading
+import time
+import zipfile
 from pathlib import Path
 
 import pytest
@@ -55,7 +62,12 @@ def test_inputs_defaults():
     assert inputs.output_dir == 'redlines'
     assert inputs.html_preview == 'auto'
     assert inputs.write_summary is True
+    assert inputs.parallelism >= 1
     assert inputs.engine_kwargs() == {}
+    assert ra.Inputs.from_env({'INPUT_PARALLELISM': '3'}).parallelism == 3
+    limited = ra.Inputs.from_env({'INPUT_MAX_FILES': '5', 'INPUT_TIME_BUDGET': '1.5'})
+    assert (limited.max_files, limited.time_budget) == (5, 1.5)
+    assert (inputs.max_files, inputs.time_budget) == (0, None)
 
 
 def test_inputs_engine_kwargs():
@@ -73,6 +85,15 @@ def test_inputs_engine_kwargs():
     {'INPUT_ENGINE': 'xmlpowertools', 'INPUT_COMPARISON': 'docxdiff'},
     {'INPUT_ENGINE': 'xmlpowertools', 'INPUT_DETECT_MOVES': 'true'},
     {'INPUT_DETECT_MOVES': 'yes'},                             # not a bool
+    {'INPUT_PARALLELISM': '0'},
+    {'INPUT_PARALLELISM': 'many'},
+    {'INPUT_SHARD_COUNT': '2', 'INPUT_SHARD_INDEX': '2'},
+    {'INPUT_SHARD_INDEX': '-1'},
+    {'INPUT_MAX_FILES': 'all'},
+    {'INPUT_TIME_BUDGET': '0'},
+    {'INPUT_TIME_BUDGET': 'soon'},
+    {'INPUT_ORIGINAL': 'a.docx', 'INPUT_MODIFIED': 'b.docx', 'INPUT_SHARD_COUNT': '2'},
+    {'INPUT_ORIGINAL': 'a.docx', 'INPUT_MODIFIED': 'b.docx', 'INPUT_MERGE': 'true'},
 ])
 def test_inputs_rejects_bad_combinations(env):
     with pytest.raises(ra.ConfigError):
@@ -93,6 +114,39 @@ def test_revision_count_from_stdout(stdout, expected):
     assert ra.revision_count_from_stdout(stdout) == expected
 
 
+def test_revision_count_prefers_structured_result():
+    from python_redlines import RedlineResult
+
+    result = RedlineResult(b'', 'Revisions found: 9', None, revisions=7)
+    assert ra.revision_count(result, result.stdout) == 7
+    assert ra.revision_count((b'', 'Revisions found: 9', None), 'Revisions found: 9') == 9
+
+
+def test_run_redline_pair_skips_resaved_document(tmp_path):
+    original = (FIXTURES / 'original.docx').read_bytes()
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(original)) as source, zipfile.ZipFile(buffer, 'w') as target:
+        for info in source.infolist():
+            info.date_time = (2030, 1, 1, 0, 0, 0)
+            target.writestr(info, source.read(info.filename))
+    resaved = buffer.getvalue()
+
+    class NoEngine:
+        def run_redline(self, *args, **kwargs):
+            raise AssertionError('the engine should not run for unchanged content')
+
+    change = ra.Change(path='a.docx', status='modified')
+    inputs = ra.Inputs(output_dir=str(tmp_path))
+    assert resaved != original
+    ra.run_redline_pair(NoEngine(), inputs, change, original, resaved, previews=None)
+    assert (change.revisions, change.redline, change.error) == (0, None, None)
+
+
+@pytest.mark.parametrize('engine', ['xmlpowertools', 'docxodus'])
+def test_make_engine_leaves_the_content_check_to_the_action(engine):
+    assert ra.make_engine(ra.Inputs(engine=engine)).skip_unchanged is False
+
+
 def test_parse_name_status_handles_modifications_and_renames():
     raw = b'M\0docs/contract.docx\0R097\0old name.docx\0new name.docx\0A\0added.docx\0D\0gone.docx\0'
     changes = ra.parse_name_status(raw)
@@ -170,6 +224,22 @@ def test_detect_changes_and_read_blob(repo):
     assert ra.read_blob(head, 'docs/contract.docx', cwd=str(repo)) == b'modified bytes'
 
 
+def test_blob_reader_streams_blobs_from_one_process(repo, tmp_path):
+    first = commit_file(repo, 'docs/contract.docx', b'original bytes')
+    second = commit_file(repo, 'docs/contract.docx', bytes(range(256)) * 5000)
+
+    with ra.BlobReader(cwd=str(repo)) as blobs:
+        first_id = blobs.write_blob(first, 'docs/contract.docx', tmp_path / 'first')
+        second_id = blobs.write_blob(second, 'docs/contract.docx', tmp_path / 'second')
+        assert blobs.write_blob(first, 'docs/contract.docx', tmp_path / 'again') == first_id
+        with pytest.raises(subprocess.CalledProcessError):
+            blobs.write_blob(first, 'docs/missing.docx', tmp_path / 'missing')
+
+    assert (tmp_path / 'first').read_bytes() == b'original bytes'
+    assert (tmp_path / 'second').read_bytes() == bytes(range(256)) * 5000
+    assert second_id == git(repo, 'rev-parse', f'{second}:docs/contract.docx')
+
+
 def test_detect_changes_pure_rename(repo):
     base = commit_file(repo, 'a.docx', b'same bytes either way')
     git(repo, 'mv', 'a.docx', 'b.docx')
@@ -197,6 +267,307 @@ def test_detect_changes_respects_patterns_and_extension(repo):
     assert [c.path for c in changes] == ['docs/in-scope.docx']
 
 
+def test_redline_changes_in_parallel_keeps_order(repo, tmp_path, capsys):
+    for name in 'bcd':
+        (repo / f'{name}.docx').write_bytes(name.encode() + b'1')
+    base = commit_file(repo, 'a.docx', b'a1')
+    for name in 'bcd':
+        (repo / f'{name}.docx').write_bytes(name.encode() + b'2')
+    head = commit_file(repo, 'a.docx', b'a2')
+
+    class SlowEngine:
+        active = peak = 0
+        lock = threading.Lock()
+
+        def run_redline(self, author, original, modified, **kwargs):
+            modified = Path(modified).read_bytes()
+            with self.lock:
+                self.active += 1
+                SlowEngine.peak = max(self.peak, self.active)
+            try:
+                # The first file finishes last.
+                time.sleep(0.2 if modified.startswith(b'a') else 0.05)
+                if modified.startswith(b'c'):
+                    raise subprocess.CalledProcessError(1, 'redline', stderr=b'corrupt package')
+                return modified, 'Revisions found: 1', None
+            finally:
+                with self.lock:
+                    self.active -= 1
+
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), parallelism=2)
+    ra.redline_changes(SlowEngine(), inputs, changes, base, head, previews=None, cwd=str(repo))
+
+    assert SlowEngine.peak == 2
+    assert [(c.path, c.revisions, c.error) for c in changes] == [
+        ('a.docx', 1, None), ('b.docx', 1, None), ('c.docx', None, 'corrupt package'), ('d.docx', 1, None)]
+    assert Path(changes[1].redline).read_bytes() == b'b2'
+    progress = [line.split(':')[0].strip() for line in capsys.readouterr().out.splitlines() if line.startswith('  ')]
+    assert progress == ['a.docx', 'b.docx', 'c.docx', 'd.docx']
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='the fake previewer is a shell script')
+def test_previews_render_in_the_background(tmp_path):
+    previewer = tmp_path / 'docx2html'
+    previewer.write_text('#!/bin/sh\ncp "$1" "$2"\n')
+    previewer.chmod(0o755)
+
+    class CopyEngine:
+        def run_redline(self, author, original, modified, **kwargs):
+            return modified, 'Revisions found: 1', None
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), parallelism=2)
+    previews = ra.PreviewQueue(str(previewer), workers=2)
+    changes = [ra.Change(path=f'doc{n}.docx', status='modified') for n in range(3)]
+    for change in changes:
+        ra.run_redline_pair(CopyEngine(), inputs, change, b'old', change.path.encode(), previews)
+    previews.finish()
+
+    for change in changes:
+        assert Path(change.html).read_bytes() == change.path.encode()
+
+
+def test_redline_pair_streams_to_the_output_path(tmp_path):
+    class StreamingEngine:
+        def run_redline(self, author, original, modified, output=None, **kwargs):
+            Path(output).write_bytes(modified)
+            return None, 'Revisions found: 2', None
+
+    class FailingEngine:
+        def run_redline(self, author, original, modified, output=None, **kwargs):
+            Path(output).write_bytes(b'partial')
+            raise subprocess.CalledProcessError(1, ['redline'], stderr='bad document')
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'))
+    change = ra.Change(path='doc.docx', status='modified')
+    ra.run_redline_pair(StreamingEngine(), inputs, change, b'old', b'new', None)
+
+    assert Path(change.redline).read_bytes() == b'new'
+    assert change.revisions == 2
+
+    failed = ra.Change(path='bad.docx', status='modified')
+    ra.run_redline_pair(FailingEngine(), inputs, failed, b'old', b'new', None)
+    assert failed.error == 'bad document' and failed.redline is None
+    assert not (tmp_path / 'redlines' / 'bad.redline.docx').exists()
+
+
+def test_redline_store_restores_earlier_runs(repo, tmp_path):
+    (repo / 'b.docx').write_bytes(b'b1')
+    base = commit_file(repo, 'a.docx', b'a1')
+    (repo / 'b.docx').write_bytes(b'b2')
+    head = commit_file(repo, 'a.docx', b'a2')
+
+    class CountingEngine:
+        calls = 0
+
+        def run_redline(self, author, original, modified, **kwargs):
+            CountingEngine.calls += 1
+            return Path(modified).read_bytes(), 'Revisions found: 3', None
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), parallelism=2)
+
+    def run(deadline=None):
+        changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+        store = ra.RedlineStore(str(tmp_path / 'cache'), inputs, ['python-redlines==1.0'])
+        ra.redline_changes(CountingEngine(), inputs, changes, base, head, previews=None, cwd=str(repo), store=store,
+                           deadline=deadline)
+        return changes, store
+
+    first, store = run()
+    assert (CountingEngine.calls, store.hits, store.misses) == (2, 0, 2)
+    shutil.rmtree(tmp_path / 'redlines')
+
+    second, store = run()
+    assert (CountingEngine.calls, store.hits, store.misses) == (2, 2, 0)
+    assert [c.to_dict() for c in second] == [c.to_dict() for c in first]
+    assert Path(second[0].redline).read_bytes() == b'a2'
+    assert store.close() == 2
+    assert 'Restored 2 of 2 redline(s) from the cache (100% hit rate)' in ra.build_summary(
+        second, base, head, (store.hits, store.misses))
+
+    # Restoring needs no engine time, so cached files are not skipped once the budget is spent.
+    third, store = run(deadline=time.monotonic() - 1)
+    assert (CountingEngine.calls, store.hits) == (2, 2)
+    assert [c.skipped for c in third] == [None, None]
+
+    other = ra.RedlineStore(str(tmp_path / 'cache'), ra.Inputs(author='Someone else'), ['python-redlines==1.0'])
+    assert other.key('a', 'b') != store.key('a', 'b')
+
+
+def test_redline_changes_resolves_renames_past_the_budget(repo, tmp_path):
+    base = commit_file(repo, 'a.docx', b'same bytes either way')
+    git(repo, 'mv', 'a.docx', 'b.docx')
+    git(repo, 'commit', '-q', '-m', 'rename')
+    head = git(repo, 'rev-parse', 'HEAD')
+
+    class NoEngine:
+        def run_redline(self, *args, **kwargs):
+            raise AssertionError('the engine should not run for a pure rename')
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'))
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+    ra.redline_changes(NoEngine(), inputs, changes, base, head, previews=None, cwd=str(repo),
+                       deadline=time.monotonic() - 1)
+    assert [(c.revisions, c.skipped) for c in changes] == [(0, None)]
+
+
+def test_redline_changes_largest_first_within_budget(repo, tmp_path, capsys):
+    sizes = {'a.docx': 10, 'b.docx': 3000, 'c.docx': 200}
+    for name, size in sizes.items():
+        (repo / name).write_bytes(b'1' * size)
+    base = commit_file(repo, 'a.docx', b'1' * sizes['a.docx'])
+    for name, size in sizes.items():
+        (repo / name).write_bytes(b'2' * size)
+    head = commit_file(repo, 'a.docx', b'2' * sizes['a.docx'])
+
+    class RecordingEngine:
+        def __init__(self):
+            self.sizes = []
+
+        def run_redline(self, author, original, modified, timeout=None, **kwargs):
+            self.sizes.append(Path(modified).stat().st_size)
+            if timeout is not None and timeout < 5:
+                raise TimeoutError('budget')
+            return b'redline', 'Revisions found: 1', None
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), parallelism=1)
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+    engine = RecordingEngine()
+    ra.redline_changes(engine, inputs, changes, base, head, previews=None, cwd=str(repo))
+    assert engine.sizes == [3000, 200, 10]
+    progress = [line.split(':')[0].strip() for line in capsys.readouterr().out.splitlines()]
+    assert progress == ['a.docx', 'b.docx', 'c.docx']
+
+    # A comparison running when the budget ends is stopped; none start after it.
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+    ra.redline_changes(RecordingEngine(), inputs, changes, base, head, previews=None, cwd=str(repo),
+                       deadline=time.monotonic() + 2)
+    assert [c.skipped for c in changes] == ['time budget'] * 3
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+    engine = RecordingEngine()
+    ra.redline_changes(engine, inputs, changes, base, head, previews=None, cwd=str(repo),
+                       deadline=time.monotonic() - 1)
+    assert engine.sizes == [] and [c.to_dict()['skipped'] for c in changes] == ['time budget'] * 3
+
+    summary = ra.build_summary(changes, base, head)
+    assert summary.count('⏭️ skipped (time budget)') == 3
+    assert '3 file(s) were skipped' in summary
+
+
+def lfs_pointer(content: bytes) -> bytes:
+    oid = hashlib.sha256(content).hexdigest()
+    return f'version https://git-lfs.github.com/spec/v1\noid sha256:{oid}\nsize {len(content)}\n'.encode()
+
+
+def test_parse_lfs_pointer():
+    pointer = ra.parse_lfs_pointer(lfs_pointer(b'contract'))
+    assert (pointer.oid, pointer.size) == (hashlib.sha256(b'contract').hexdigest(), 8)
+    extended = (b'version https://git-lfs.github.com/spec/v1\next-0-foo sha256:' + b'0' * 64 + b'\n'
+                + lfs_pointer(b'x').split(b'\n', 1)[1])
+    assert ra.parse_lfs_pointer(extended).size == 1
+    assert ra.parse_lfs_pointer(b'PK\x03\x04 a real docx') is None
+
+
+def test_lfs_fetch_includes_each_path_literally(monkeypatch):
+    paths = ['docs/a,b.docx', 'x/*star?.docx', '[draft] v2.docx', '!important.docx', 'plain.docx']
+    calls = []
+    monkeypatch.setattr(ra, 'run_git', lambda args, cwd=None: calls.append(args))
+
+    ra.fetch_lfs_objects([ra.BlobSide('c0ffee', path, 'blob', 1) for path in paths], 4)
+
+    (args,) = calls
+    include = args[args.index('fetch') + 1]
+    patterns = include[len('--include='):].split(',')
+    assert len(patterns) == len(paths)
+    for path in paths:
+        assert [pattern for pattern in patterns if fnmatch.fnmatchcase(path, pattern)]
+    # Glob characters only match themselves, so these patterns fetch no other file.
+    assert not fnmatch.fnmatchcase('x/1star2.docx', ra.lfs_include_pattern('x/*star?.docx'))
+    assert not fnmatch.fnmatchcase('d v2.docx', ra.lfs_include_pattern('[draft] v2.docx'))
+
+
+def test_redline_changes_reads_lfs_content(repo, tmp_path, capsys):
+    contents = {'base': b'original contract ' * 100, 'head': b'modified contract ' * 100}
+    base = commit_file(repo, 'lfs.docx', lfs_pointer(contents['base']))
+    head = commit_file(repo, 'lfs.docx', lfs_pointer(contents['head']))
+    for content in contents.values():
+        oid = hashlib.sha256(content).hexdigest()
+        stored = repo / '.git' / 'lfs' / 'objects' / oid[:2] / oid[2:4] / oid
+        stored.parent.mkdir(parents=True)
+        stored.write_bytes(content)
+
+    class ReadingEngine:
+        def run_redline(self, author, original, modified, **kwargs):
+            self.inputs = Path(original).read_bytes(), Path(modified).read_bytes()
+            return b'redline', 'Revisions found: 1', None
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'))
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+    with ra.BlobReader(cwd=str(repo)) as blobs:
+        assert [side.size for side in ra.describe_change(blobs, changes[0], base, head)] == [1800, 1800]
+
+    engine = ReadingEngine()
+    ra.redline_changes(engine, inputs, changes, base, head, previews=None, cwd=str(repo))
+    assert engine.inputs == (contents['base'], contents['head'])
+    assert changes[0].revisions == 1
+    assert 'Fetching 2 Git LFS object(s)' in capsys.readouterr().out
+
+    # Content that is neither stored locally nor fetchable is reported per file.
+    missing = commit_file(repo, 'lfs.docx', lfs_pointer(b'never uploaded'))
+    changes = ra.detect_changes(head, missing, ['**/*.docx'], cwd=str(repo))
+    ra.redline_changes(ReadingEngine(), inputs, changes, head, missing, previews=None, cwd=str(repo))
+    assert changes[0].error.startswith('Could not fetch the Git LFS content')
+
+
+def test_assign_shards_balances_size():
+    assert ra.assign_shards([10, 1, 1, 1, 7, 2], 2) == [0, 1, 0, 1, 1, 1]
+    assert ra.assign_shards([5, 5, 5], 3) == [0, 1, 2]
+    assert ra.assign_shards([], 4) == []
+
+
+def test_shards_split_changes_and_merge_back(repo, tmp_path):
+    sizes = {'big.docx': 9000, 'mid.docx': 5000, 'small.docx': 3000, 'tiny.docx': 1000}
+    for name, size in sizes.items():
+        (repo / name).write_bytes(b'1' * size)
+    base = commit_file(repo, 'gone.docx', b'deleted later')
+    for name, size in sizes.items():
+        (repo / name).write_bytes(b'2' * size)
+    (repo / 'gone.docx').unlink()
+    head = commit_file(repo, 'new.docx', b'added')
+    changes = ra.detect_changes(base, head, ['**/*.docx'], cwd=str(repo))
+
+    positions = []
+    for index in range(2):
+        inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), shard_index=index, shard_count=2)
+        positions.append(ra.select_shard(changes, base, head, inputs, cwd=str(repo)))
+        for position in positions[index]:
+            changes[position].revisions = index
+        ra.write_shard_manifest(inputs, changes, positions[index], base, head, (index, 1))
+
+    assert sorted(positions[0] + positions[1]) == list(range(len(changes)))
+    assert sorted(changes[i].path for i in positions[1]) == ['mid.docx', 'small.docx', 'tiny.docx']
+    # Added and deleted files, which need no redline, stay with the first shard.
+    assert {changes[i].status for i in positions[1]} == {'modified'}
+
+    merged, merged_base, merged_head, cache, missing = ra.merge_shards(str(tmp_path / 'redlines'))
+    assert [c.to_dict() for c in merged] == [c.to_dict() for c in changes]
+    assert (merged_base, merged_head, cache, missing) == (base, head, (1, 2), [])
+    assert not list((tmp_path / 'redlines').glob('*.json'))
+
+    inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), shard_index=1, shard_count=3)
+    ra.write_shard_manifest(inputs, changes, [0], base, head, None)
+    assert ra.merge_shards(str(tmp_path / 'redlines'))[4] == [0, 2]
+    with pytest.raises(ra.ConfigError):
+        ra.merge_shards(str(tmp_path / 'redlines'))
+
+    # A shard that ran against another head commit, e.g. after a force-push mid-run.
+    for index, shard_head in ((0, head), (1, base)):
+        inputs = ra.Inputs(output_dir=str(tmp_path / 'redlines'), shard_index=index, shard_count=2)
+        ra.write_shard_manifest(inputs, changes, positions[index], base, shard_head, None)
+    with pytest.raises(ra.ConfigError, match='disagree on head'):
+        ra.merge_shards(str(tmp_path / 'redlines'))
+
+
 def test_resolve_refs_push_event(repo):
     base = commit_file(repo, 'a.docx', b'v1')
     head = commit_file(repo, 'a.docx', b'v2')
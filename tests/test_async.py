@@ -0,0 +1,84 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+def test_arun_redline_returns_same_shape_as_run_redline():
+    engine = FakeEngine()
+    redline, stdout, stderr = asyncio.run(engine.arun_redline('Author', b'original', b'modified'))
+    assert (redline, stdout, stderr) == engine.run_redline('Author', b'original', b'modified')
+    assert redline == b'modified'
+    assert stdout == 'Revisions found: 1\n'
+    assert stderr is None
+
+
+def test_arun_redline_raises_on_engine_failure(tmp_path):
+    engine = FakeEngine()
+    with pytest.raises(subprocess.CalledProcessError):
+        asyncio.run(engine.arun_redline('Author', str(tmp_path / 'missing.docx'), b'modified'))
+
+
+def test_arun_redline_cancellation_kills_process_and_cleans_up(monkeypatch):
+    engine = FakeEngine(io_mode='tempfile')
+    processes, temp_paths = [], []
+
+    real_exec = asyncio.create_subprocess_exec
+
+    async def spy_exec(*args, **kwargs):
+        process = await real_exec(*args, **kwargs)
+        processes.append(process)
+        temp_paths.extend(args[2:5])
+        return process
+
+    monkeypatch.setattr(asyncio, 'create_subprocess_exec', spy_exec)
+
+    async def scenario():
+        task = asyncio.ensure_future(engine.arun_redline('Author', b'original', b'SLOW'))
+        while not processes:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert processes[0].returncode is not None
+    assert temp_paths and not any(os.path.exists(path) for path in temp_paths)
+
+
+def test_arun_redline_respects_max_concurrency(monkeypatch):
+    engine = FakeEngine(max_concurrency=2)
+    active, peak = [0], [0]
+
+    real_exec = asyncio.create_subprocess_exec
+
+    async def counting_exec(*args, **kwargs):
+        active[0] += 1
+        peak[0] = max(peak[0], active[0])
+        process = await real_exec(*args, **kwargs)
+        real_wait = process.communicate
+
+        async def communicate(*a, **kw):
+            try:
+                return await real_wait(*a, **kw)
+            finally:
+                active[0] -= 1
+
+        process.communicate = communicate
+        return process
+
+    monkeypatch.setattr(asyncio, 'create_subprocess_exec', counting_exec)
+
+    async def scenario():
+        return await asyncio.gather(*(engine.arun_redline('Author', b'a', b'%d' % i) for i in range(6)))
+
+    results = asyncio.run(scenario())
+
+    assert [r[0] for r in results] == [b'%d' % i for i in range(6)]
+    assert peak[0] <= 2
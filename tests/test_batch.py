@@ -0,0 +1,79 @@
+import threading
+import time
+
+from python_redlines.engines import BatchResult
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+def test_run_redline_many_returns_every_pair():
+    engine = FakeEngine()
+    pairs = [(b'original', b'modified %d' % i) for i in range(10)]
+
+    results = list(engine.run_redline_many('Author', pairs, max_workers=4))
+
+    assert sorted(r.index for r in results) == list(range(10))
+    for r in results:
+        assert r.ok
+        assert r.result[0] == b'modified %d' % r.index
+
+
+def test_run_redline_many_ordered():
+    engine = FakeEngine()
+    pairs = [(b'original', b'modified %d' % i) for i in range(10)]
+
+    results = list(engine.run_redline_many('Author', pairs, max_workers=3, ordered=True))
+
+    assert [r.index for r in results] == list(range(10))
+
+
+def test_run_redline_many_reports_errors_per_pair(tmp_path):
+    engine = FakeEngine()
+    missing = str(tmp_path / 'missing.docx')
+    pairs = [(b'a', b'b'), (missing, b'c'), (b'a', b'd')]
+
+    results = list(engine.run_redline_many('Author', pairs, ordered=True))
+
+    assert [r.ok for r in results] == [True, False, True]
+    assert results[1].result is None
+    assert results[1].error is not None
+    assert results[2].result[0] == b'd'
+
+
+def test_run_redline_many_bounds_concurrency():
+    active = []
+    peak = []
+    lock = threading.Lock()
+
+    class CountingEngine(FakeEngine):
+        def run_redline(self, author_tag, original, modified, **kwargs):
+            with lock:
+                active.append(1)
+                peak.append(len(active))
+            time.sleep(0.02)
+            with lock:
+                active.pop()
+            return modified, None, None
+
+    results = list(CountingEngine().run_redline_many('Author', ((b'a', b'b') for _ in range(20)), max_workers=2))
+
+    assert len(results) == 20
+    assert max(peak) <= 2
+
+
+def test_run_redline_many_pulls_pairs_lazily():
+    pulled = []
+
+    def pairs():
+        for i in range(100):
+            pulled.append(i)
+            yield b'a', b'%d' % i
+
+    results = FakeEngine().run_redline_many('Author', pairs(), max_workers=1)
+    first = next(results)
+    results.close()
+
+    assert isinstance(first, BatchResult)
+    assert len(pulled) < 100
@@ -0,0 +1,134 @@
+"""Tests for extracting engine binaries from companion-package archives into the cache."""
+
+import importlib
+import json
+import os
+import stat
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+from python_redlines.engines import BaseEngine, EngineNotInstalledError, _detect_rid
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT))
+
+import build_differ  # noqa: E402
+
+RID = _detect_rid()
+BINARY_NAME = 'engine.exe' if RID.startswith('win-') else 'engine'
+
+
+@pytest.fixture
+def binary_package(tmp_path, monkeypatch):
+    """A throwaway companion package whose archive holds a tiny 'engine' and a support file."""
+    package_name = f'fake_binaries_{tmp_path.name.replace("-", "_")}'
+    publish = tmp_path / 'publish'
+    publish.mkdir()
+    (publish / BINARY_NAME).write_bytes(b'#!/bin/sh\necho engine\n')
+    (publish / 'support.dll').write_bytes(b'x' * 4096)
+
+    binaries = tmp_path / 'site' / package_name / '_binaries'
+    binaries.mkdir(parents=True)
+    (binaries.parent / '__init__.py').write_text('')
+    build_differ.compress_dir(str(publish), str(binaries / build_differ.archive_name(RID)))
+
+    monkeypatch.syspath_prepend(str(tmp_path / 'site'))
+    importlib.invalidate_caches()
+
+    class PackagedEngine(BaseEngine):
+        BINARY_PACKAGE = package_name
+        BINARY_BASE_NAME = 'engine'
+        EXTRA_NAME = 'fake'
+
+    return PackagedEngine, tmp_path / 'cache'
+
+
+def test_extracts_verifies_and_stamps(binary_package):
+    engine_class, cache = binary_package
+    path = Path(engine_class(target_path=str(cache))._resolve_binary())
+
+    assert path == cache / RID / BINARY_NAME
+    assert path.read_bytes() == b'#!/bin/sh\necho engine\n'
+    assert (cache / RID / '.redlines-extracted').is_file()
+    manifest = json.loads((cache / RID / '.redlines-manifest.json').read_text())
+    assert manifest['files']['support.dll']['size'] == 4096
+    # nothing but the final directory and the lock file is left behind
+    assert sorted(p.name for p in cache.iterdir()) == sorted([RID, f'.{RID}.lock'])
+
+
+@pytest.mark.skipif(os.name == 'nt', reason='POSIX permissions')
+def test_extraction_root_gets_umask_permissions(binary_package):
+    engine_class, cache = binary_package
+    previous = os.umask(0o027)
+    try:
+        engine_class(target_path=str(cache))._resolve_binary()
+    finally:
+        os.umask(previous)
+
+    # not the 0700 of the temporary directory it was staged in
+    assert stat.S_IMODE((cache / RID).stat().st_mode) == 0o750
+
+
+def test_stamped_directory_is_not_extracted_again(binary_package, monkeypatch):
+    engine_class, cache = binary_package
+    engine_class(target_path=str(cache))._resolve_binary()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('should not extract again')
+
+    monkeypatch.setattr(engine_class, '_extract_archive', staticmethod(fail))
+    engine_class(target_path=str(cache))._resolve_binary()
+
+
+def test_unstamped_directory_is_replaced(binary_package):
+    engine_class, cache = binary_package
+    partial = cache / RID
+    partial.mkdir(parents=True)
+    (partial / BINARY_NAME).write_bytes(b'half')
+
+    path = Path(engine_class(target_path=str(cache))._resolve_binary())
+
+    assert path.read_bytes() == b'#!/bin/sh\necho engine\n'
+    assert (partial / 'support.dll').is_file()
+
+
+def test_corrupt_extraction_is_rejected(binary_package, monkeypatch):
+    engine_class, cache = binary_package
+    real_extract = engine_class._extract_archive
+
+    def corrupting_extract(archive, target_path):
+        sizes = real_extract(archive, target_path)
+        (target_path / 'support.dll').write_bytes(b'y' * 4096)  # same size, different content
+        return sizes
+
+    monkeypatch.setattr(engine_class, '_extract_archive', staticmethod(corrupting_extract))
+    with pytest.raises(EngineNotInstalledError, match="'support.dll' failed its integrity check"):
+        engine_class(target_path=str(cache))._resolve_binary()
+
+    assert not (cache / RID).exists()
+    assert [p.name for p in cache.iterdir()] == [f'.{RID}.lock']
+
+
+def test_concurrent_cold_starts_extract_once(binary_package, monkeypatch):
+    engine_class, cache = binary_package
+    real_extract = engine_class._extract_archive
+    extractions = []
+
+    def counting_extract(archive, target_path):
+        extractions.append(target_path)
+        return real_extract(archive, target_path)
+
+    monkeypatch.setattr(engine_class, '_extract_archive', staticmethod(counting_extract))
+    paths = []
+    threads = [threading.Thread(target=lambda: paths.append(engine_class(target_path=str(cache))._resolve_binary()))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(paths) == 8 and len(set(paths)) == 1
+    assert len(extractions) == 1
@@ -0,0 +1,85 @@
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from python_redlines import engines
+from python_redlines.engines import BaseEngine, EngineNotInstalledError
+
+from .fake_engine import FakeEngine, fake_redline_binary
+
+
+def counting_engine():
+    calls = []
+
+    class CountingEngine(FakeEngine):
+        def _resolve_binary(self):
+            calls.append(1)
+            return super()._resolve_binary()
+
+    return CountingEngine, calls
+
+
+def test_instantiation_does_not_resolve_the_binary():
+    engine_class, calls = counting_engine()
+    engine_class()
+    engine_class()
+    assert calls == []
+
+
+def test_resolution_is_memoized_across_instances_and_threads():
+    engine_class, calls = counting_engine()
+    paths = []
+
+    def resolve():
+        paths.append(engine_class().extracted_binaries_path)
+
+    threads = [threading.Thread(target=resolve) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert paths == [fake_redline_binary()] * 8
+    assert calls == [1]
+
+
+def test_resolution_is_per_extraction_directory(tmp_path):
+    engine_class, calls = counting_engine()
+    engine_class().extracted_binaries_path
+    engine_class(target_path=str(tmp_path)).extracted_binaries_path
+    engine_class(target_path=str(tmp_path)).extracted_binaries_path
+    assert calls == [1, 1]
+
+
+def test_missing_binary_package_is_reported_on_first_use():
+    class MissingEngine(BaseEngine):
+        BINARY_PACKAGE = 'python_redlines_no_such_engine'
+        BINARY_BASE_NAME = 'nothing'
+        EXTRA_NAME = 'nothing'
+
+    engine = MissingEngine()
+    with pytest.raises(EngineNotInstalledError, match=r'pip install python-redlines\[nothing\]'):
+        engine.run_redline('Author', b'original', b'modified')
+
+
+@pytest.mark.skipif(sys.platform == 'win32', reason='the fake engine binary is a shebang script')
+def test_warmup_resolves_and_launches_once(monkeypatch):
+    monkeypatch.setattr(engines, '_WARMED_BINARIES', set())
+    engine_class, calls = counting_engine()
+    launches = []
+    real_run = subprocess.run
+
+    def spy_run(command, *args, **kwargs):
+        launches.append(command)
+        return real_run(command, *args, **kwargs)
+
+    monkeypatch.setattr(subprocess, 'run', spy_run)
+    engine = engine_class()
+    engine.warmup()
+    engine.warmup()
+    engine_class().warmup()
+
+    assert calls == [1]
+    assert launches == [[fake_redline_binary()]]
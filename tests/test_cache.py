@@ -0,0 +1,93 @@
+import os
+import time
+
+import pytest
+
+from python_redlines.cache import RedlineCache
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return RedlineCache(directory=tmp_path / 'cache')
+
+
+def test_put_then_get_round_trips(cache):
+    cache.put('ab' * 32, (b'redline', 'Revisions found: 1\n', None))
+    assert cache.get('ab' * 32) == (b'redline', 'Revisions found: 1\n', None)
+    assert cache.get('cd' * 32) is None
+    assert (cache.stats.hits, cache.stats.misses, cache.stats.writes) == (1, 1, 1)
+    assert cache.stats.hit_rate == 0.5
+
+
+def test_entry_without_metadata_is_a_miss(cache):
+    cache.put('ab' * 32, (b'redline', None, None))
+    os.remove(cache.directory / 'ab' / f'{"ab" * 32}.json')
+    assert cache.get('ab' * 32) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = RedlineCache(directory=tmp_path / 'cache', max_size=3500)
+    keys = [c * 64 for c in 'abc']
+    for i, key in enumerate(keys):
+        cache.put(key, (b'x' * 1000, None, None))
+        data_path = cache.directory / key[:2] / f'{key}.docx'
+        os.utime(data_path, (time.time() - 100 + i, time.time() - 100 + i))
+
+    # touching 'a' makes 'b' the least recently used
+    assert cache.get(keys[0]) is not None
+    cache.put('d' * 64, (b'x' * 1000, None, None))
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get('d' * 64) is not None
+    assert cache.stats.evictions >= 1
+
+
+def test_stale_temp_files_are_swept(cache):
+    cache.put('ab' * 32, (b'redline', None, None))
+    stale = cache.directory / 'ab' / '.tmp-leftover'
+    stale.write_bytes(b'partial')
+    os.utime(stale, (0, 0))
+    # A new instance, as in the next process, scans the directory on its first put.
+    RedlineCache(directory=cache.directory).put('ab' * 32, (b'redline', None, None))
+    assert not stale.exists()
+
+
+def test_puts_track_size_without_rescanning(cache, monkeypatch):
+    scans = []
+    files = cache._files
+    monkeypatch.setattr(cache, '_files', lambda: scans.append(1) or files())
+
+    for i in range(10):
+        cache.put('%02x' % i * 32, (b'x' * 100, None, None))
+    cache.put('00' * 32, (b'x' * 50, None, None))
+
+    assert len(scans) == 1
+    on_disk = sum(path.stat().st_size for shard in cache.directory.iterdir() for path in shard.iterdir())
+    assert cache._size == on_disk
+
+
+@needs_fake_binary
+def test_engine_serves_repeats_from_cache(cache):
+    engine = FakeEngine(cache=cache)
+
+    first = engine.run_redline('Author', b'original', b'modified')
+    second = engine.run_redline('Author', b'original', b'modified')
+
+    assert first == second == (b'modified', 'Revisions found: 1\n', None)
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+
+@needs_fake_binary
+def test_cache_key_covers_inputs_author_and_options(cache, tmp_path):
+    engine = FakeEngine(cache=cache)
+    path = tmp_path / 'original.docx'
+    path.write_bytes(b'original')
+
+    base = engine._cache_key('Author', b'original', b'modified')
+    assert engine._cache_key('Author', path, b'modified') == base
+    assert engine._cache_key('Other', b'original', b'modified') != base
+    assert engine._cache_key('Author', b'original', b'changed') != base
+    assert engine._cache_key('Author', b'modified', b'original') != base
@@ -0,0 +1,182 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from python_redlines import WorkerEngine
+from python_redlines.canonical import canonical_hash, same_content
+from benchmarks.synthetic import generate_pair
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+
+W14 = 'http://schemas.microsoft.com/office/word/2010/wordml'
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return generate_pair(pages=2, format_changes=1, seed=2)
+
+
+def resave(docx: bytes, edit=lambda xml: xml) -> bytes:
+    """docx as Word might write it back unedited: new timestamps and metadata, fresh rsids
+    and paragraph IDs, proofing marks and a _GoBack bookmark, parts in another order."""
+    source = zipfile.ZipFile(io.BytesIO(docx))
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as target:
+        target.writestr('docProps/core.xml', '<cp:coreProperties modified="2026-10-18T00:00:00Z"/>')
+        for name in reversed(source.namelist()):
+            data = source.read(name)
+            if name == 'word/document.xml':
+                xml = data.decode('utf-8')
+                xml = xml.replace('<w:document ', f'<w:document xmlns:w14="{W14}" ', 1)
+                xml = xml.replace('<w:p>', '<w:p w:rsidR="00A1B2C3" w14:paraId="1A2B3C4D" w14:textId="77777777">')
+                xml = xml.replace('<w:r>', '<w:r w:rsidRPr="00D4E5F6">')
+                xml = xml.replace('</w:p>', '<w:proofErr w:type="spellStart"/></w:p>', 3)
+                xml = xml.replace('<w:sectPr/>', '<w:bookmarkStart w:id="0" w:name="_GoBack"/>'
+                                                 '<w:bookmarkEnd w:id="0"/><w:sectPr/>')
+                data = edit(xml).encode('utf-8')
+            target.writestr(zipfile.ZipInfo(name, date_time=(2026, 10, 18, 12, 0, 0)), data)
+    return buffer.getvalue()
+
+
+def test_resaved_document_has_the_same_content(pair):
+    resaved = resave(pair.original)
+
+    assert resaved != pair.original
+    assert same_content(pair.original, resaved)
+    assert canonical_hash(pair.original) == canonical_hash(resaved)
+
+
+def test_edits_change_the_content(pair):
+    assert not same_content(pair.original, pair.modified)
+    assert canonical_hash(pair.original) != canonical_hash(pair.modified)
+
+    # One changed character, and a change to an attribute that is not ignored.
+    typo = resave(pair.original, lambda xml: xml.replace('. ', '.  ', 1))
+    centred = resave(pair.original, lambda xml: xml.replace('<w:p ', '<w:p><w:pPr><w:jc w:val="center"/></w:pPr>'
+                                                            '</w:p><w:p ', 1))
+    assert not same_content(pair.original, typo)
+    assert not same_content(pair.original, centred)
+
+
+def test_media_are_compared():
+    with_image = generate_pair(pages=1, images=1, seed=1).original
+    other_image = generate_pair(pages=1, images=1, seed=2).original
+    same_text_other_image = zipfile.ZipFile(io.BytesIO(other_image)).read('word/media/image1.png')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(with_image)) as source, zipfile.ZipFile(buffer, 'w') as target:
+        for name in source.namelist():
+            target.writestr(name, same_text_other_image if name.endswith('.png') else source.read(name))
+
+    assert same_content(with_image, resave(with_image))
+    assert not same_content(with_image, buffer.getvalue())
+
+
+def with_parts(docx: bytes, replacements: dict) -> bytes:
+    """docx with the given parts replaced or added."""
+    parts = dict(replacements)
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(io.BytesIO(docx)) as source, zipfile.ZipFile(buffer, 'w') as target:
+        for name in source.namelist():
+            target.writestr(name, parts.pop(name, source.read(name)))
+        for name, data in parts.items():
+            target.writestr(name, data)
+    return buffer.getvalue()
+
+
+def linked(docx: bytes, url: str, rid: str = 'rIdLink') -> bytes:
+    """docx with its first run wrapped in a hyperlink to url."""
+    with zipfile.ZipFile(io.BytesIO(docx)) as source:
+        xml = source.read('word/document.xml').decode('utf-8')
+        rels = source.read('word/_rels/document.xml.rels').decode('utf-8')
+    start = xml.index('<w:r>')
+    end = xml.index('</w:r>', start) + len('</w:r>')
+    xml = f'{xml[:start]}<w:hyperlink r:id="{rid}">{xml[start:end]}</w:hyperlink>{xml[end:]}'
+    rels = rels.replace('</Relationships>', f'<Relationship Id="{rid}" TargetMode="External" Target="{url}" Type='
+                        '"http://schemas.openxmlformats.org/officeDocument/2006/relationships/hyperlink"/>'
+                        '</Relationships>')
+    return with_parts(docx, {'word/document.xml': xml.encode('utf-8'),
+                             'word/_rels/document.xml.rels': rels.encode('utf-8')})
+
+
+def test_relationship_targets_are_compared():
+    docx = generate_pair(pages=1, images=1, seed=1).original
+    original = linked(docx, 'https://example.com/terms')
+
+    assert same_content(original, resave(linked(docx, 'https://example.com/terms', rid='rId99')))
+    assert not same_content(original, linked(docx, 'https://example.com/other-terms'))
+    assert canonical_hash(original) != canonical_hash(linked(docx, 'https://example.com/other-terms'))
+
+
+def test_styles_are_compared(pair):
+    styles = ('<w:styles xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+              '<w:style w:styleId="Normal"><w:rsid w:val="00A1B2C3"/><w:rPr><w:sz w:val="%d"/></w:rPr>'
+              '</w:style></w:styles>')
+    original = with_parts(pair.original, {'word/styles.xml': (styles % 22).encode('utf-8')})
+    resaved = with_parts(pair.original, {'word/styles.xml': (styles % 22).replace('00A1B2C3', '00D4E5F6').encode('utf-8')})
+
+    assert same_content(original, resaved)
+    assert not same_content(original, with_parts(pair.original, {'word/styles.xml': (styles % 24).encode('utf-8')}))
+
+
+def test_accepts_paths_and_rewinds_file_objects(pair, tmp_path):
+    path = tmp_path / 'original.docx'
+    path.write_bytes(pair.original)
+    stream = io.BytesIO(resave(pair.original))
+
+    assert same_content(path, stream)
+    assert stream.tell() == 0
+    assert canonical_hash(str(path)) == canonical_hash(pair.original)
+
+
+def test_uncomparable_inputs_are_not_the_same():
+    assert not same_content(b'not a docx', b'not a docx')
+    with pytest.raises(ValueError):
+        canonical_hash(b'not a docx')
+
+
+@needs_fake_binary
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe'])
+def test_engine_skips_unchanged_documents(pair, tmp_path, io_mode):
+    reports = []
+    engine = FakeEngine(io_mode=io_mode, on_metrics=reports.append)
+    resaved = resave(pair.original)
+
+    result = engine.run_redline('Author', pair.original, resaved)
+
+    assert result.revisions == 0
+    assert result.redline == resaved
+    assert result.sizes == {'original': len(pair.original), 'modified': len(resaved), 'redline': len(resaved)}
+    (metrics,) = reports
+    assert metrics.unchanged and 'run' not in metrics.phases
+
+    target = tmp_path / 'redline.docx'
+    assert engine.run_redline('Author', pair.original, resaved, output=target).redline is None
+    assert target.read_bytes() == resaved
+
+
+@needs_fake_binary
+def test_engine_runs_on_changed_or_opted_out_documents(pair):
+    resaved = resave(pair.original)
+
+    assert FakeEngine().run_redline('Author', pair.original, pair.modified).revisions == 1
+
+    reports = []
+    engine = FakeEngine(skip_unchanged=False, on_metrics=reports.append)
+    assert engine.run_redline('Author', pair.original, resaved).revisions == 1
+    assert 'run' in reports[0].phases and not reports[0].unchanged
+
+
+@needs_fake_binary
+def test_async_and_worker_skip_unchanged_documents(pair):
+    resaved = resave(pair.original)
+    result = asyncio.run(FakeEngine().arun_redline('Author', pair.original, resaved))
+    assert (result.revisions, result.redline) == (0, resaved)
+
+    with WorkerEngine(FakeEngine()) as worker:
+        result = worker.run_redline('Author', pair.original, resaved)
+        assert (result.revisions, result.redline) == (0, resaved)
+        assert worker.spawn_count == 0
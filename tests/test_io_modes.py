@@ -0,0 +1,110 @@
+import asyncio
+import os
+import subprocess
+
+import pytest
+
+from python_redlines import engines
+from python_redlines.engines import DocxodusEngine
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+def test_pipe_mode_matches_tempfile_mode():
+    piped = FakeEngine(io_mode='pipe').run_redline('Author', b'original', b'modified')
+    tempfile_result = FakeEngine(io_mode='tempfile').run_redline('Author', b'original', b'modified')
+    assert piped == tempfile_result == (b'modified', 'Revisions found: 1\n', None)
+
+
+def test_pipe_mode_sends_bytes_through_stdin(monkeypatch):
+    engine = FakeEngine(io_mode='pipe')
+    written = []
+    monkeypatch.setattr(engine, '_write_to_temp_file', lambda data: written.append(data))
+
+    redline, _, _ = engine.run_redline('Author', b'original', b'modified')
+
+    assert redline == b'modified'
+    assert written == []
+
+
+def test_pipe_mode_mixes_paths_and_bytes(tmp_path):
+    original = tmp_path / 'original.docx'
+    original.write_bytes(b'same')
+    redline, stdout, _ = FakeEngine(io_mode='pipe').run_redline('Author', original, b'same')
+    assert redline == b'same'
+    assert stdout == 'Revisions found: 0\n'
+
+
+def test_pipe_mode_async():
+    result = asyncio.run(FakeEngine(io_mode='pipe').arun_redline('Author', b'original', b'modified'))
+    assert result == (b'modified', 'Revisions found: 1\n', None)
+
+
+def test_pipe_mode_falls_back_for_legacy_binary(monkeypatch):
+    monkeypatch.setenv('FAKE_REDLINES_LEGACY', '1')
+    engine = FakeEngine(io_mode='pipe')
+
+    assert engine.run_redline('Author', b'original', b'modified')[0] == b'modified'
+    assert engine.extracted_binaries_path in engines._STDIO_UNSUPPORTED
+    assert not engine._use_pipe(b'original', b'modified')
+
+
+def test_pipe_mode_engine_failure_raises(tmp_path):
+    engine = FakeEngine(io_mode='pipe')
+    with pytest.raises(subprocess.CalledProcessError):
+        engine.run_redline('Author', str(tmp_path / 'missing.docx'), b'modified')
+
+
+def test_io_mode_is_validated():
+    with pytest.raises(ValueError, match='io_mode must be one of'):
+        FakeEngine(io_mode='carrier-pigeon')
+
+
+def test_pipe_mode_requires_engine_support():
+    with pytest.raises(ValueError, match="does not support io_mode='pipe'"):
+        DocxodusEngine(io_mode='pipe')
+
+
+needs_memfd = pytest.mark.skipif(not engines.memfd_supported(), reason='memfd needs Linux')
+
+
+@needs_memfd
+def test_auto_prefers_memfd_where_supported():
+    assert FakeEngine().io_mode == 'memfd'
+
+
+def test_auto_keeps_tempfile_for_engines_not_verified_with_memfd():
+    assert DocxodusEngine().io_mode == 'tempfile'
+
+
+@needs_memfd
+def test_memfd_mode_writes_no_temp_files(monkeypatch):
+    def no_temp_files(*args, **kwargs):
+        raise AssertionError('memfd mode must not create temp files')
+
+    monkeypatch.setattr(engines.tempfile, 'NamedTemporaryFile', no_temp_files)
+    engine = FakeEngine(io_mode='memfd')
+
+    assert engine.run_redline('Author', b'original', b'modified') == (b'modified', 'Revisions found: 1\n', None)
+    assert asyncio.run(engine.arun_redline('Author', b'same', b'same'))[1] == 'Revisions found: 0\n'
+
+
+@needs_memfd
+def test_memfd_mode_closes_its_descriptors():
+    engine = FakeEngine(io_mode='memfd')
+    staged = []
+    with engine._redline_paths(b'original', b'modified', memfd=True) as (_, _, _, pass_fds):
+        staged.extend(pass_fds)
+    assert len(staged) == 3
+    for fd in staged:
+        with pytest.raises(OSError):
+            os.fstat(fd)
+
+
+def test_memfd_mode_rejected_where_unsupported(monkeypatch):
+    monkeypatch.setattr(engines, 'memfd_supported', lambda: False)
+    with pytest.raises(ValueError, match="io_mode='memfd' requires Linux"):
+        FakeEngine(io_mode='memfd')
+    assert FakeEngine().io_mode == 'tempfile'
@@ -0,0 +1,119 @@
+import asyncio
+import signal
+import subprocess
+import time
+
+import pytest
+
+from python_redlines import (
+    EngineCPULimitError,
+    EngineLimitError,
+    EngineMemoryLimitError,
+    EngineTimeoutError,
+    WorkerEngine,
+)
+from python_redlines import engines
+from python_redlines.engines import _Limits
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe'])
+def test_timeout_kills_engine(io_mode):
+    engine = FakeEngine(io_mode=io_mode, timeout=0.5)
+
+    start = time.monotonic()
+    with pytest.raises(EngineTimeoutError) as excinfo:
+        engine.run_redline('Author', b'original', b'SLOW')
+
+    assert time.monotonic() - start < 10
+    assert excinfo.value.limit == 0.5
+    assert isinstance(excinfo.value, TimeoutError)
+
+
+def test_per_call_timeout_overrides_engine():
+    engine = FakeEngine(timeout=60)
+    with pytest.raises(EngineTimeoutError):
+        engine.run_redline('Author', b'original', b'SLOW', timeout=0.5)
+    assert engine.run_redline('Author', b'original', b'modified', timeout=30)[0] == b'modified'
+
+
+def test_async_timeout_kills_engine():
+    with pytest.raises(EngineTimeoutError):
+        asyncio.run(FakeEngine(timeout=0.5).arun_redline('Author', b'original', b'SLOW'))
+
+
+def test_memory_limit():
+    engine = FakeEngine(max_memory=256 * 1024 ** 2)
+    with pytest.raises(EngineMemoryLimitError) as excinfo:
+        engine.run_redline('Author', b'original', b'HOG')
+    assert excinfo.value.limit == 256 * 1024 ** 2
+
+
+def test_cpu_limit():
+    with pytest.raises(EngineCPULimitError):
+        FakeEngine().run_redline('Author', b'original', b'SPIN', max_cpu_seconds=1)
+
+
+def test_limits_do_not_affect_normal_runs():
+    engine = FakeEngine(timeout=30, max_memory=1024 ** 3, max_cpu_seconds=30)
+    assert engine.run_redline('Author', b'original', b'modified') == (b'modified', 'Revisions found: 1\n', None)
+
+
+def test_unrelated_failure_is_not_a_limit_error():
+    engine = FakeEngine(io_mode='tempfile', max_memory=1024 ** 3, max_cpu_seconds=30)
+    with pytest.raises(subprocess.CalledProcessError):
+        engine.run_redline('Author', b'original', b'CRASH')
+
+
+def test_memory_limit_sets_dotnet_heap_limit():
+    options = FakeEngine._spawn_options(_Limits(max_memory=1024 ** 3))
+    assert options['env']['DOTNET_GCHeapHardLimit'] == hex(1024 ** 3 * 3 // 4)
+    # Limits are never applied from a preexec_fn, which can deadlock a threaded parent.
+    assert 'preexec_fn' not in options
+
+
+def test_limits_through_the_shell_wrapper_without_prlimit(monkeypatch):
+    monkeypatch.delattr(engines.resource, 'prlimit', raising=False)
+    command = engines._limited_command(['redline'], _Limits(max_memory=1024 ** 3, max_cpu_seconds=2))
+    assert command[:2] == ['/bin/sh', '-c'] and command[-1] == 'redline'
+    assert 'ulimit -d 1048576' in command[2] and 'ulimit -S -t 2' in command[2]
+
+    with pytest.raises(EngineMemoryLimitError):
+        FakeEngine(max_memory=256 * 1024 ** 2).run_redline('Author', b'original', b'HOG')
+    with pytest.raises(EngineCPULimitError):
+        FakeEngine().run_redline('Author', b'original', b'SPIN', max_cpu_seconds=1)
+    assert FakeEngine(max_memory=1024 ** 3).run_redline('Author', b'original', b'modified')[0] == b'modified'
+
+
+def test_sigkill_is_only_a_cpu_limit_when_the_cpu_time_was_used():
+    limits = _Limits(max_cpu_seconds=10)
+    killed = -signal.SIGKILL
+    # The OOM killer or another process: not the CPU limit, so the caller sees the plain failure.
+    FakeEngine._check_limits(['redline'], limits, killed, b'', b'', cpu_time=0.5)
+    FakeEngine._check_limits(['redline'], limits, killed, b'', b'')
+    with pytest.raises(EngineCPULimitError):
+        FakeEngine._check_limits(['redline'], limits, killed, b'', b'', cpu_time=10.2)
+
+
+@pytest.mark.parametrize('limit', [{'timeout': 0}, {'max_memory': -1}, {'max_cpu_seconds': 0}])
+def test_invalid_limits_rejected(limit):
+    with pytest.raises(ValueError):
+        FakeEngine(**limit)
+    with pytest.raises(ValueError):
+        FakeEngine().run_redline('Author', b'original', b'modified', **limit)
+
+
+def test_worker_timeout_replaces_worker():
+    with WorkerEngine(FakeEngine(timeout=0.5)) as worker:
+        with pytest.raises(EngineLimitError):
+            worker.run_redline('Author', b'original', b'SLOW')
+        assert worker.run_redline('Author', b'original', b'modified')[0] == b'modified'
+        assert worker.spawn_count == 2
+
+
+def test_worker_rejects_cpu_limit():
+    with pytest.raises(ValueError):
+        WorkerEngine(FakeEngine(max_cpu_seconds=10))
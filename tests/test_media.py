@@ -0,0 +1,121 @@
+import asyncio
+import io
+import zipfile
+
+import pytest
+
+from python_redlines import RedlineCache, WorkerEngine
+from python_redlines.media import restore_media, strip_media
+from benchmarks.synthetic import generate_pair
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+
+@pytest.fixture(scope='module')
+def pair():
+    return generate_pair(pages=2, insertions=1, images=3, seed=8)
+
+
+def parts(docx: bytes):
+    with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def rewrite(docx: bytes, replace=None, rename=None) -> bytes:
+    """docx with some parts' content replaced and some renamed."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as target:
+        for name, data in parts(docx).items():
+            target.writestr((rename or {}).get(name, name), (replace or {}).get(name, data))
+    return buffer.getvalue()
+
+
+def test_shared_media_round_trip(pair):
+    original, modified, stash = strip_media(pair.original, pair.modified)
+
+    assert len(stash) == 3
+    assert len(original) < len(pair.original) / 4 and len(modified) < len(pair.modified) / 4
+    placeholders = {parts(modified)[f'word/media/image{n}.png'] for n in (1, 2, 3)}
+    assert len(placeholders) == 3 and all(len(p) < 100 for p in placeholders)
+    assert parts(original)['word/document.xml'] == parts(pair.original)['word/document.xml']
+
+    assert parts(restore_media(modified, stash)) == parts(pair.modified)
+
+
+def test_only_media_in_both_documents_is_stripped(pair):
+    changed_image = parts(generate_pair(pages=1, images=1, seed=99).original)['word/media/image1.png']
+    modified = rewrite(pair.modified, replace={'word/media/image1.png': changed_image})
+
+    _, stripped, stash = strip_media(pair.original, modified)
+
+    assert len(stash) == 2
+    assert parts(stripped)['word/media/image1.png'] == changed_image
+    assert parts(restore_media(stripped, stash)) == parts(modified)
+
+
+def test_restores_media_the_engine_moved(pair):
+    _, modified, stash = strip_media(pair.original, pair.modified)
+    # An engine is free to rename parts in the package it writes.
+    redline = rewrite(modified, rename={'word/media/image2.png': 'word/media/redline-image7.png'})
+
+    restored = parts(restore_media(redline, stash))
+    assert restored['word/media/redline-image7.png'] == parts(pair.modified)['word/media/image2.png']
+
+
+def test_nothing_to_strip(pair):
+    plain = generate_pair(pages=1, seed=1)
+    original, modified, stash = strip_media(plain.original, plain.modified)
+    assert (original, modified, len(stash)) == (plain.original, plain.modified, 0)
+
+    small = strip_media(pair.original, pair.modified, min_size=1024 ** 2)
+    assert not small[2]
+
+
+@needs_fake_binary
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe'])
+def test_engine_strips_and_restores_media(pair, tmp_path, io_mode):
+    reports = []
+    engine = FakeEngine(io_mode=io_mode, strip_media=True, on_metrics=reports.append)
+
+    # The fake engine's redline is a copy of the modified document it was given.
+    result = engine.run_redline('Author', pair.original, pair.modified)
+
+    assert parts(result.redline) == parts(pair.modified)
+    assert result.sizes['modified'] < len(pair.modified) / 4
+    assert result.sizes['redline'] == len(result.redline)
+    assert {'strip_media', 'restore_media'} <= set(reports[0].phases)
+
+    target = tmp_path / 'redline.docx'
+    assert engine.run_redline('Author', pair.original, pair.modified, output=target).redline is None
+    assert parts(target.read_bytes()) == parts(pair.modified)
+
+    handle = io.BytesIO()
+    engine.run_redline('Author', pair.original, pair.modified, output=handle)
+    assert parts(handle.getvalue()) == parts(pair.modified)
+
+    unstripped = engine.run_redline('Author', pair.original, pair.modified, strip_media=False)
+    assert unstripped.sizes['modified'] == len(pair.modified)
+
+
+@needs_fake_binary
+def test_cached_redlines_are_restored(pair, tmp_path):
+    engine = FakeEngine(strip_media=True, cache=RedlineCache(directory=tmp_path / 'cache'))
+
+    first = engine.run_redline('Author', pair.original, pair.modified)
+    second = engine.run_redline('Author', pair.original, pair.modified)
+
+    assert engine.cache.stats.hits == 1
+    assert parts(first.redline) == parts(second.redline) == parts(pair.modified)
+
+
+@needs_fake_binary
+def test_async_and_worker_strip_media(pair):
+    engine = FakeEngine(strip_media=True)
+
+    result = asyncio.run(engine.arun_redline('Author', pair.original, pair.modified))
+    assert parts(result.redline) == parts(pair.modified)
+
+    with WorkerEngine(engine) as worker:
+        result = worker.run_redline('Author', pair.original, pair.modified)
+        assert parts(result.redline) == parts(pair.modified)
+        assert result.sizes['modified'] < len(pair.modified) / 4
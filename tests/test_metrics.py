@@ -0,0 +1,103 @@
+import asyncio
+import subprocess
+
+import pytest
+
+from python_redlines import RedlineCache, WorkerEngine
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe'])
+def test_metrics_reported_per_call(io_mode):
+    reports = []
+    engine = FakeEngine(io_mode=io_mode, on_metrics=reports.append)
+
+    engine.run_redline('Author', b'original', b'modified-document')
+
+    (metrics,) = reports
+    assert metrics.engine == 'FakeEngine'
+    assert metrics.io_mode == io_mode
+    assert {'stage', 'spawn', 'run', 'collect'} <= set(metrics.phases)
+    assert metrics.total >= sum(metrics.phases.values()) > 0
+    assert metrics.input_sizes == (8, 17)
+    assert metrics.output_size == 17
+    assert metrics.engine_timings['compare'] == pytest.approx(0.002)
+    assert metrics.error is None
+
+
+def test_metrics_record_child_resource_usage():
+    reports = []
+    FakeEngine(on_metrics=reports.append).run_redline('Author', b'original', b'modified')
+
+    (metrics,) = reports
+    assert metrics.max_rss > 1024 * 1024
+    assert metrics.cpu_user + metrics.cpu_system > 0
+
+
+def test_metrics_record_options_and_errors(tmp_path):
+    reports = []
+    engine = FakeEngine(io_mode='tempfile', on_metrics=reports.append)
+
+    with pytest.raises(subprocess.CalledProcessError):
+        engine.run_redline('Author', tmp_path / 'missing.docx', b'modified')
+
+    assert isinstance(reports[0].error, subprocess.CalledProcessError)
+    assert reports[0].input_sizes == (None, 8)
+
+
+def test_metrics_mark_cache_hits(tmp_path):
+    reports = []
+    engine = FakeEngine(cache=RedlineCache(tmp_path / 'cache'), on_metrics=reports.append)
+
+    engine.run_redline('Author', b'original', b'modified')
+    engine.run_redline('Author', b'original', b'modified')
+
+    assert [m.cached for m in reports] == [False, True]
+    assert 'cache_store' in reports[0].phases
+    assert 'run' not in reports[1].phases
+
+
+def test_async_metrics():
+    reports = []
+    engine = FakeEngine(on_metrics=reports.append, max_concurrency=1)
+
+    asyncio.run(engine.arun_redline('Author', b'original', b'modified'))
+
+    (metrics,) = reports
+    assert {'queue', 'spawn', 'run'} <= set(metrics.phases)
+    assert metrics.max_rss is None
+
+
+def test_worker_metrics():
+    reports = []
+    with WorkerEngine(FakeEngine(on_metrics=reports.append)) as worker:
+        worker.run_redline('Author', b'original', b'modified')
+
+    assert {'stage', 'run', 'collect'} <= set(reports[0].phases)
+
+
+def test_failing_callback_does_not_fail_the_redline(caplog):
+    def broken(metrics):
+        raise RuntimeError('dashboard down')
+
+    result = FakeEngine(on_metrics=broken).run_redline('Author', b'original', b'modified')
+
+    assert result[0] == b'modified'
+    assert 'on_metrics callback failed' in caplog.text
+
+
+def test_no_callback_uses_plain_popen(monkeypatch):
+    spawned = []
+    real_init = subprocess.Popen.__init__
+
+    def spy_init(self, *args, **kwargs):
+        spawned.append(type(self))
+        real_init(self, *args, **kwargs)
+
+    monkeypatch.setattr(subprocess.Popen, '__init__', spy_init)
+    FakeEngine(io_mode='tempfile').run_redline('Author', b'original', b'modified')
+
+    assert spawned == [subprocess.Popen]
@@ -0,0 +1,115 @@
+import io
+import zipfile
+from pathlib import Path
+from xml.dom import minidom
+
+import pytest
+
+from python_redlines import XmlPowerToolsEngine
+from python_redlines import normalize
+from python_redlines.canonical import same_content
+from python_redlines.normalize import normalize_docx, normalize_xml
+from benchmarks.synthetic import generate_pair
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+FIXTURES = Path(__file__).resolve().parent / 'fixtures'
+
+
+def document_xml(docx: bytes) -> bytes:
+    with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+        return archive.read('word/document.xml')
+
+
+def test_noise_is_removed_and_runs_merged():
+    xml = (b'<w:p w:rsidR="00A1" w:rsidRDefault="00B2"><w:r w:rsidRPr="00C3"><w:t>Hello</w:t></w:r>'
+           b'<w:proofErr w:type="spellStart"/><w:r><w:t xml:space="preserve"> wor</w:t></w:r>'
+           b'<w:r><w:lastRenderedPageBreak/><w:t>ld</w:t></w:r></w:p>')
+
+    assert normalize_xml(xml) == b'<w:p><w:r><w:t xml:space="preserve">Hello world</w:t></w:r></w:p>'
+
+
+def test_text_that_looks_like_an_rsid_is_kept():
+    xml = (b'<w:p w:rsidR="00A1"><w:r><w:t xml:space="preserve">Set w:rsidR="00AB" on the tag</w:t></w:r>'
+           b'<w:r w:rsidRPr="00C3"><w:t xml:space="preserve">, or "w:rsidDel="00CD"&gt;".</w:t></w:r></w:p>')
+
+    assert normalize_xml(xml) == (b'<w:p><w:r><w:t xml:space="preserve">Set w:rsidR="00AB" on the tag, '
+                                  b'or "w:rsidDel="00CD"&gt;".</w:t></w:r></w:p>')
+
+
+@pytest.mark.parametrize('xml', [
+    # different formatting
+    b'<w:p><w:r><w:rPr><w:b/></w:rPr><w:t>A</w:t></w:r><w:r><w:t>B</w:t></w:r></w:p>',
+    # edge whitespace without xml:space="preserve" is not significant
+    b'<w:p><w:r><w:t>A</w:t></w:r><w:r><w:t> B</w:t></w:r></w:p>',
+    # not simple text runs
+    b'<w:p><w:r><w:t>A</w:t></w:r><w:r><w:tab/><w:t>B</w:t></w:r></w:p>',
+    # not adjacent
+    b'<w:p><w:r><w:t>A</w:t></w:r><w:bookmarkStart w:id="1" w:name="x"/><w:r><w:t>B</w:t></w:r></w:p>',
+])
+def test_runs_that_must_stay_separate(xml):
+    assert normalize_xml(xml) == xml
+
+
+def test_fragmented_document_normalizes_to_the_plain_one(monkeypatch):
+    plain = generate_pair(pages=3, images=1, seed=6).original
+    fragmented = generate_pair(pages=3, images=1, fragmentation=1.0, seed=6).original
+    # Small chunks exercise cutting the part between paragraphs.
+    monkeypatch.setattr(normalize, '_CHUNK', 97)
+
+    normalized = normalize_docx(fragmented)
+
+    assert document_xml(fragmented) != document_xml(plain)
+    assert document_xml(normalized) == document_xml(plain)
+    minidom.parseString(document_xml(normalized))
+    with zipfile.ZipFile(io.BytesIO(normalized)) as result, zipfile.ZipFile(io.BytesIO(fragmented)) as source:
+        assert result.namelist() == source.namelist()
+        assert result.read('word/media/image1.png') == source.read('word/media/image1.png')
+        assert result.getinfo('word/media/image1.png').compress_type == zipfile.ZIP_STORED
+
+
+def test_word_document_keeps_its_content(tmp_path):
+    source = FIXTURES / 'modified.docx'
+    output = tmp_path / 'normalized.docx'
+
+    with open(output, 'wb') as handle:
+        assert normalize_docx(source, handle) is None
+
+    normalized = output.read_bytes()
+    assert b'w:rsid' not in document_xml(normalized)
+    assert document_xml(normalized).count(b'<w:r>') < document_xml(source.read_bytes()).count(b'<w:r')
+    assert same_content(normalized, normalize_docx(normalized))
+    minidom.parseString(document_xml(normalized))
+
+
+@needs_fake_binary
+def test_engine_normalizes_inputs_when_asked():
+    modified = (FIXTURES / 'modified.docx').read_bytes()
+    reports = []
+    engine = FakeEngine(normalize=True, on_metrics=reports.append)
+
+    # The fake engine's redline is a copy of the modified document it was given.
+    with open(FIXTURES / 'original.docx', 'rb') as original:
+        redline = engine.run_redline('Author', original, modified).redline
+    assert redline == normalize_docx(modified)
+    assert 'normalize' in reports[0].phases
+
+    assert engine.run_redline('Author', b'original', modified, normalize=False).redline == modified
+    assert FakeEngine().run_redline('Author', b'original', modified).redline == modified
+
+
+@needs_fake_binary
+def test_engine_passes_on_what_it_cannot_normalize():
+    result = FakeEngine(normalize=True).run_redline('Author', b'original', b'modified')
+    assert (result.redline, result.revisions) == (b'modified', 1)
+
+
+def test_normalized_redline_has_the_same_revisions():
+    engine = XmlPowerToolsEngine()
+    original, modified = (FIXTURES / 'original.docx').read_bytes(), (FIXTURES / 'modified.docx').read_bytes()
+
+    raw = engine.run_redline('TestAuthor', original, modified)
+    normalized = engine.run_redline('TestAuthor', original, modified, normalize=True)
+
+    assert normalized.revisions == raw.revisions == 9
+    assert normalized.revisions_by_type == raw.revisions_by_type
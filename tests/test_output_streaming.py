@@ -0,0 +1,105 @@
+import asyncio
+import io
+
+import pytest
+
+from python_redlines.cache import RedlineCache
+from python_redlines.worker import WorkerEngine
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe', 'auto'])
+def test_output_path_receives_redline(tmp_path, io_mode):
+    target = tmp_path / 'redline.docx'
+
+    result = FakeEngine(io_mode=io_mode).run_redline('Author', b'original', b'modified', output=target)
+
+    assert result == (None, 'Revisions found: 1\n', None)
+    assert target.read_bytes() == b'modified'
+
+
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe', 'auto'])
+def test_output_file_object_receives_redline(io_mode):
+    output = io.BytesIO()
+
+    redline, stdout, _ = FakeEngine(io_mode=io_mode).run_redline('Author', b'original', b'modified', output=output)
+
+    assert redline is None
+    assert stdout == 'Revisions found: 1\n'
+    assert output.getvalue() == b'modified'
+
+
+def test_output_path_is_used_as_target(tmp_path, monkeypatch):
+    engine = FakeEngine(io_mode='tempfile')
+    target = tmp_path / 'redline.docx'
+    commands = []
+    build_command = engine._build_command
+    monkeypatch.setattr(engine, '_build_command',
+                        lambda *args, **kwargs: commands.append(build_command(*args, **kwargs)) or commands[-1])
+
+    engine.run_redline('Author', b'original', b'modified', output=str(target))
+
+    assert commands[0][-1] == str(target)
+    assert target.exists()
+
+
+def test_file_object_inputs(tmp_path):
+    original = tmp_path / 'original.docx'
+    original.write_bytes(b'original')
+
+    with open(original, 'rb') as handle:
+        result = FakeEngine().run_redline('Author', handle, io.BytesIO(b'modified'))
+
+    assert result == (b'modified', 'Revisions found: 1\n', None)
+
+
+def test_file_object_inputs_skip_pipe_mode():
+    engine = FakeEngine(io_mode='pipe')
+    assert not engine._use_pipe(io.BytesIO(b'original'), b'modified')
+    assert engine.run_redline('Author', io.BytesIO(b'original'), b'modified')[0] == b'modified'
+
+
+def test_async_output_file_object():
+    output = io.BytesIO()
+
+    result = asyncio.run(FakeEngine().arun_redline('Author', b'original', b'modified', output=output))
+
+    assert result == (None, 'Revisions found: 1\n', None)
+    assert output.getvalue() == b'modified'
+
+
+def test_worker_output_path(tmp_path):
+    target = tmp_path / 'redline.docx'
+
+    with WorkerEngine(FakeEngine()) as worker:
+        result = worker.run_redline('Author', io.BytesIO(b'original'), b'modified', output=target)
+
+    assert result == (None, 'Revisions found: 1\n', None)
+    assert target.read_bytes() == b'modified'
+
+
+def test_cached_result_streams_to_output(tmp_path):
+    cache = RedlineCache(tmp_path / 'cache')
+    engine = FakeEngine(cache=cache)
+    first, second = io.BytesIO(), io.BytesIO()
+
+    engine.run_redline('Author', b'original', b'modified', output=first)
+    result = engine.run_redline('Author', io.BytesIO(b'original'), b'modified', output=second)
+
+    assert result == (None, 'Revisions found: 1\n', None)
+    assert first.getvalue() == second.getvalue() == b'modified'
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+    assert engine.run_redline('Author', b'original', b'modified')[0] == b'modified'
+
+
+def test_cache_rewinds_hashed_file_object(tmp_path):
+    engine = FakeEngine(cache=RedlineCache(tmp_path / 'cache'))
+    original = io.BytesIO(b'xxoriginal')
+    original.seek(2)
+
+    assert engine.run_redline('Author', original, b'modified')[1] == 'Revisions found: 1\n'
+    assert engine._cache_key('Author', io.BytesIO(b'original'), b'modified') == \
+        engine._cache_key('Author', b'original', b'modified')
@@ -0,0 +1,95 @@
+import subprocess
+
+import pytest
+
+from python_redlines import EngineError, RedlineCache, RedlineResult, WorkerEngine
+from python_redlines import engines
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+
+def test_result_unpacks_like_a_tuple():
+    result = RedlineResult(b'redline', 'Revisions found: 2\n', None)
+
+    redline, stdout, stderr = result
+    assert (redline, stdout, stderr) == (b'redline', 'Revisions found: 2\n', None)
+    assert result[0] == b'redline'
+    assert len(result) == 3
+    assert result == (b'redline', 'Revisions found: 2\n', None)
+
+
+@pytest.mark.parametrize('stdout,expected', [
+    ('Revisions found: 9', 9),
+    ('Redline complete: 11 revision(s) found', 11),
+    ('nothing to see here', None),
+    (None, None),
+])
+def test_result_parses_revision_count_from_summary(stdout, expected):
+    assert RedlineResult(None, stdout).revisions == expected
+
+
+@needs_fake_binary
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe'])
+def test_json_result_fields(io_mode):
+    result = FakeEngine(io_mode=io_mode).run_redline('Author', b'original', b'modified')
+
+    assert result == (b'modified', 'Revisions found: 1\n', None)
+    assert result.revisions == 1
+    assert result.revisions_by_type == {'insert': 1, 'delete': 0, 'move': 0, 'format': 0}
+    assert result.timings['compare'] == pytest.approx(0.002)
+    assert result.sizes == {'original': 8, 'modified': 8, 'redline': 8}
+
+
+@needs_fake_binary
+@pytest.mark.parametrize('io_mode', ['tempfile', 'pipe'])
+def test_binary_without_json_falls_back_to_summary_text(monkeypatch, io_mode):
+    monkeypatch.setenv('FAKE_REDLINES_NO_JSON', '1')
+    engine = FakeEngine(io_mode=io_mode)
+
+    result = engine.run_redline('Author', b'original', b'modified')
+
+    assert result == (b'modified', 'Revisions found: 1\n', None)
+    assert result.revisions == 1
+    assert result.revisions_by_type == {}
+    assert engine.extracted_binaries_path in engines._JSON_UNSUPPORTED
+    assert engine.extracted_binaries_path not in engines._STDIO_UNSUPPORTED
+
+
+@needs_fake_binary
+def test_json_error_raises_engine_error(tmp_path):
+    with pytest.raises(EngineError) as excinfo:
+        FakeEngine(io_mode='tempfile').run_redline('Author', tmp_path / 'missing.docx', b'modified')
+
+    assert isinstance(excinfo.value, subprocess.CalledProcessError)
+    assert excinfo.value.returncode == 1
+    assert excinfo.value.error_type == 'FileNotFoundError'
+
+
+@needs_fake_binary
+def test_legacy_error_on_stdout_fails_fast(monkeypatch, tmp_path):
+    monkeypatch.setenv('FAKE_REDLINES_LEGACY', '1')
+
+    with pytest.raises(EngineError, match='One or both files do not exist'):
+        FakeEngine(io_mode='tempfile').run_redline('Author', tmp_path / 'missing.docx', b'modified')
+
+
+@needs_fake_binary
+def test_cache_keeps_structured_fields(tmp_path):
+    engine = FakeEngine(cache=RedlineCache(tmp_path / 'cache'))
+
+    engine.run_redline('Author', b'original', b'modified')
+    cached = engine.run_redline('Author', b'original', b'modified')
+
+    assert engine.cache.stats.hits == 1
+    assert cached.revisions == 1
+    assert cached.revisions_by_type['insert'] == 1
+    assert cached.timings == {}
+
+
+@needs_fake_binary
+def test_worker_returns_structured_result():
+    with WorkerEngine(FakeEngine()) as worker:
+        result = worker.run_redline('Author', b'original', b'modified')
+
+    assert result.revisions == 1
+    assert result.sizes['redline'] == 8
@@ -0,0 +1,198 @@
+import io
+import re
+import zipfile
+from xml.dom import minidom
+
+import pytest
+
+from python_redlines import XmlPowerToolsEngine
+from python_redlines.sections import merge_sections, plan_sections
+from benchmarks.synthetic import generate_pair
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+
+@pytest.fixture(scope='module')
+def pair():
+    # 200 body blocks, with every edit in the first half.
+    pair = generate_pair(pages=20, seed=3)
+    original, modified = parts(pair.original), parts(pair.modified)
+    document = modified['word/document.xml']
+    paragraphs = re.findall(rb'<w:p>.*?</w:p>', document)
+    document = document.replace(paragraphs[10], b'', 1).replace(
+        paragraphs[70], paragraphs[70] + b'<w:p><w:r><w:t>An inserted paragraph.</w:t></w:r></w:p>', 1)
+    return original, dict(modified, **{'word/document.xml': document})
+
+
+def parts(docx: bytes):
+    with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+        return {name: archive.read(name) for name in archive.namelist()}
+
+
+def package(parts_: dict) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in parts_.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def paragraphs(docx: bytes):
+    return re.findall(rb'<w:p>.*?</w:p>', parts(docx)['word/document.xml'])
+
+
+def test_plans_sections_at_unchanged_blocks(pair):
+    original, modified = pair
+    plan = plan_sections(package(original), package(modified), section_size=30)
+
+    assert [section.unchanged for section in plan.sections] == [False, False, True, True]
+    assert plan.sections[0].original == (0, 60) and plan.sections[0].modified == (0, 59)
+    assert plan.sections[-1].original[1] == plan.sections[-1].modified[1] == 200
+
+    rejoined = [paragraph for index in range(len(plan.sections))
+                for paragraph in paragraphs(plan.documents(index)[1])]
+    assert rejoined == paragraphs(package(modified))
+    first = parts(plan.documents(0)[0])
+    assert {name: data for name, data in first.items() if name != 'word/document.xml'} == \
+        {name: data for name, data in original.items() if name != 'word/document.xml'}
+
+
+def test_pairs_that_are_not_split(pair):
+    original, modified = pair
+    assert plan_sections(package(original), package(modified), section_size=500) is None
+    assert plan_sections(b'not a docx', package(modified)) is None
+
+    footnote = dict(modified, **{'word/document.xml': modified['word/document.xml'].replace(
+        b'</w:t></w:r></w:p>', b'</w:t></w:r><w:r><w:footnoteReference w:id="1"/></w:r></w:p>', 1)})
+    assert plan_sections(package(original), package(footnote), section_size=30) is None
+
+    headers = dict(original, **{'word/header1.xml': b'<w:hdr>Draft</w:hdr>'})
+    assert plan_sections(package(headers), package(dict(modified, **{'word/header1.xml': b'<w:hdr>Final</w:hdr>'})),
+                         section_size=30) is None
+
+
+def test_merge_takes_unchanged_sections_from_the_modified_document(pair):
+    original, modified = pair
+    plan = plan_sections(package(original), package(modified), section_size=30)
+
+    merged = merge_sections(plan, {0: plan.documents(0)[1], 1: plan.documents(1)[1]})
+
+    assert parts(merged) == modified
+
+
+def test_no_cut_inside_a_bookmark(pair):
+    original, modified = pair
+    blocks = plan_sections(package(original), package(modified), section_size=30).original.blocks
+    # A bookmark from block 58 to block 62 spans the first cut, before block 60.
+    spanned = {}
+    for name, part in (('original', original), ('modified', modified)):
+        document = part['word/document.xml']
+        document = document.replace(blocks[58], blocks[58].replace(
+            b'<w:p>', b'<w:p><w:bookmarkStart w:id="7" w:name="span"/>', 1), 1)
+        document = document.replace(blocks[62], blocks[62].replace(b'</w:p>', b'<w:bookmarkEnd w:id="7"/></w:p>'), 1)
+        spanned[name] = dict(part, **{'word/document.xml': document})
+
+    plan = plan_sections(package(spanned['original']), package(spanned['modified']), section_size=30)
+
+    assert not any(58 < section.original[0] <= 62 for section in plan.sections)
+    changed = {index: plan.documents(index)[1] for index, section in enumerate(plan.sections)
+               if not section.unchanged}
+    document = parts(merge_sections(plan, changed))['word/document.xml']
+    (start,) = re.findall(rb'<w:bookmarkStart w:id="(\d+)"', document)
+    assert re.findall(rb'<w:bookmarkEnd w:id="(\d+)"', document) == [start]
+
+
+def test_merge_takes_styles_a_section_added(pair):
+    original, modified = pair
+    plan = plan_sections(package(original), package(modified), section_size=30)
+    styles = (b'<w:styles><w:docDefaults/><w:style w:type="paragraph" w:styleId="Normal"><w:name w:val="Normal"/>'
+              b'</w:style>%s</w:styles>')
+    deleted = b'<w:style w:type="character" w:styleId="Strong"><w:name w:val="Strong"/></w:style>'
+    redlines = {}
+    for index, extra in ((0, b''), (1, deleted)):
+        section = parts(plan.documents(index)[1])
+        section['word/styles.xml'] = styles % extra
+        # The engine records its own revision-save IDs in settings for every comparison.
+        section['word/settings.xml'] = b'<w:settings><w:rsids><w:rsid w:val="%02d"/></w:rsids></w:settings>' % index
+        redlines[index] = package(section)
+
+    merged = parts(merge_sections(plan, redlines))
+    assert merged['word/styles.xml'] == styles % deleted
+    assert merged['word/settings.xml'] == b'<w:settings><w:rsids><w:rsid w:val="00"/></w:rsids></w:settings>'
+
+    conflicting = parts(redlines[1])
+    conflicting['word/styles.xml'] = styles.replace(b'w:val="Normal"', b'w:val="Body"') % b''
+    assert merge_sections(plan, {0: redlines[0], 1: package(conflicting)}) is None
+
+
+def test_merge_renumbers_revisions_and_brings_over_relationships(pair):
+    original, modified = pair
+    plan = plan_sections(package(original), package(modified), section_size=30)
+    revision = (b'<w:p><w:ins w:id="1" w:author="A"><w:r><w:drawing r:embed="rId9"/></w:r></w:ins>'
+                b'<w:moveToRangeStart w:id="2" w:name="move1"/><w:moveToRangeEnd w:id="2"/></w:p>')
+    redlines = {}
+    for index in (0, 1):
+        section = parts(plan.documents(index)[1])
+        section['word/document.xml'] = section['word/document.xml'].replace(b'<w:body>', b'<w:body>' + revision)
+        # Each section's redline brings its own image of deleted content under the same ID.
+        section['word/_rels/document.xml.rels'] = section['word/_rels/document.xml.rels'].replace(
+            b'</Relationships>', b'<Relationship Id="rId9" Target="media/deleted.png" Type="http://schemas.'
+                                 b'openxmlformats.org/officeDocument/2006/relationships/image"/></Relationships>')
+        section['word/media/deleted.png'] = b'image %d' % index
+        redlines[index] = package(section)
+
+    merged = parts(merge_sections(plan, redlines))
+
+    document = merged['word/document.xml']
+    assert re.findall(rb'<w:ins w:id="(\d+)"', document) == [b'1', b'3']
+    assert re.findall(rb'<w:moveToRange(?:Start|End) w:id="(\d+)"', document) == [b'2', b'2', b'4', b'4']
+    assert re.findall(rb'w:name="([^"]+)"', document) == [b'move1_s0', b'move1_s1']
+    assert re.findall(rb'r:embed="([^"]+)"', document) == [b'rId9', b'rIdS1rId9']
+    assert b'Id="rIdS1rId9" Target="media/s1-deleted.png"' in merged['word/_rels/document.xml.rels']
+    assert (merged['word/media/deleted.png'], merged['word/media/s1-deleted.png']) == (b'image 0', b'image 1')
+
+
+def test_merge_refuses_section_redlines_that_disagree(pair):
+    original, modified = pair
+    plan = plan_sections(package(original), package(modified), section_size=30)
+    second = parts(plan.documents(1)[1])
+    # As when the engine adds numbering for a deleted list item in one section only.
+    second['word/numbering.xml'] = b'<w:numbering><w:num w:numId="1"/></w:numbering>'
+
+    assert merge_sections(plan, {0: plan.documents(0)[1], 1: package(second)}) is None
+
+
+@needs_fake_binary
+def test_engine_compares_changed_sections(pair, tmp_path):
+    original, modified = package(pair[0]), package(pair[1])
+    reports = []
+    engine = FakeEngine(on_metrics=reports.append)
+
+    result = engine.run_redline_sections('Author', original, modified, section_size=30, max_workers=2)
+
+    # The fake engine's redline is the modified document, and it counts one revision per comparison.
+    assert len(reports) == 2
+    assert result.revisions == 2
+    assert parts(result.redline) == pair[1]
+    assert 'Compared 2 of 4 sections' in result.stdout
+
+    target = tmp_path / 'redline.docx'
+    assert engine.run_redline_sections('Author', original, modified, output=target, section_size=30).redline is None
+    assert parts(target.read_bytes()) == pair[1]
+
+    whole = engine.run_redline_sections('Author', original, modified)
+    assert len(reports) == 5 and whole.revisions == 1
+
+
+def test_real_engine_section_redlines_merge(pair):
+    engine = XmlPowerToolsEngine()
+    original, modified = package(pair[0]), package(pair[1])
+
+    whole = engine.run_redline('Author', original, modified)
+    sectioned = engine.run_redline_sections('Author', original, modified, section_size=30, max_workers=2)
+
+    # Merged from the section redlines, not compared whole after they failed to merge.
+    assert 'Compared 2 of 4 sections' in sectioned.stdout
+    assert sectioned.revisions == whole.revisions
+    assert sectioned.revisions_by_type == whole.revisions_by_type
+    minidom.parseString(parts(sectioned.redline)['word/document.xml'])
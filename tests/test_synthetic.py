@@ -0,0 +1,105 @@
+import io
+import json
+import re
+import zipfile
+from xml.dom import minidom
+
+import pytest
+
+from benchmarks.synthetic import PARAGRAPHS_PER_PAGE, generate_pair, main
+
+
+def document_xml(docx: bytes) -> str:
+    with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+        return archive.read('word/document.xml').decode('utf-8')
+
+
+def body_texts(docx: bytes):
+    """The text of each top-level paragraph, with runs joined."""
+    body = minidom.parseString(document_xml(docx)).documentElement.firstChild
+    texts = []
+    for block in body.childNodes:
+        if block.tagName == 'w:p':
+            texts.append(''.join(node.firstChild.data for node in block.getElementsByTagName('w:t')))
+    return texts
+
+
+def test_generates_well_formed_documents():
+    pair = generate_pair(pages=3, insertions=2, deletions=2, moves=1, format_changes=1, table_edits=1,
+                         table_density=0.3, images=2, fragmentation=0.5, seed=4)
+
+    for docx in (pair.original, pair.modified):
+        with zipfile.ZipFile(io.BytesIO(docx)) as archive:
+            assert archive.testzip() is None
+            assert {'[Content_Types].xml', 'word/document.xml', 'word/media/image2.png'} <= set(archive.namelist())
+            for name in archive.namelist():
+                if name.endswith(('.xml', '.rels')):
+                    minidom.parseString(archive.read(name))
+
+
+def test_same_arguments_generate_the_same_bytes():
+    first = generate_pair(pages=2, insertions=1, moves=1, images=1, fragmentation=0.5, seed=9)
+    second = generate_pair(pages=2, insertions=1, moves=1, images=1, fragmentation=0.5, seed=9)
+    other = generate_pair(pages=2, insertions=1, moves=1, images=1, fragmentation=0.5, seed=10)
+
+    assert (first.original, first.modified) == (second.original, second.modified)
+    assert first.original != other.original
+
+
+def test_manifest_counts_every_edit():
+    pair = generate_pair(pages=5, insertions=3, deletions=2, moves=2, format_changes=4, table_edits=2,
+                         table_density=0.3, seed=1)
+
+    assert pair.expected_counts == {'insert': 3, 'delete': 2, 'move': 2, 'format': 4, 'table_edit': 2}
+    assert len(pair.revisions) == 13
+
+
+def test_edits_are_applied_to_the_modified_document():
+    pair = generate_pair(pages=4, insertions=2, deletions=2, moves=2, format_changes=1, seed=3)
+    original, modified = body_texts(pair.original), body_texts(pair.modified)
+
+    assert len(modified) == len(original) + 2 - 2
+    for revision in pair.revisions:
+        if revision.kind == 'insert':
+            assert modified[revision.modified_block] == revision.text
+            assert revision.text not in original
+        elif revision.kind == 'delete':
+            assert original[revision.original_block] == revision.text
+            assert revision.text not in modified
+        elif revision.kind == 'move':
+            assert original[revision.original_block] == modified[revision.modified_block] == revision.text
+        else:
+            assert revision.text in modified[revision.modified_block]
+            assert re.search(r'<w:b/></w:rPr><w:t xml:space="preserve">' + re.escape(revision.text),
+                             document_xml(pair.modified))
+
+
+def test_fragmentation_changes_markup_but_not_text():
+    plain = generate_pair(pages=2, seed=5)
+    fragmented = generate_pair(pages=2, fragmentation=1.0, seed=5)
+
+    assert fragmented.revisions == []
+    assert body_texts(fragmented.original) == body_texts(fragmented.modified) == body_texts(plain.original)
+    assert document_xml(fragmented.original).count('<w:r ') > document_xml(plain.original).count('<w:r>')
+    assert fragmented.original != fragmented.modified
+
+
+def test_too_many_edits_for_the_document_size():
+    with pytest.raises(ValueError, match='paragraphs'):
+        generate_pair(pages=1, deletions=PARAGRAPHS_PER_PAGE + 1)
+    with pytest.raises(ValueError, match='tables'):
+        generate_pair(pages=1, table_edits=1)
+    with pytest.raises(ValueError, match='negative'):
+        generate_pair(pages=1, moves=-1)
+
+
+def test_write_and_command_line(tmp_path, capsys):
+    assert main([str(tmp_path), '--pages', '2', '--insertions', '1', '--format-changes', '1']) == 0
+
+    manifest = json.loads((tmp_path / 'manifest.json').read_text())
+    assert manifest['counts']['insert'] == manifest['counts']['format'] == 1
+    assert manifest['parameters']['pages'] == 2
+    assert [revision['kind'] for revision in manifest['revisions']] == ['insert', 'format']
+    assert (tmp_path / 'original.docx').read_bytes() == generate_pair(
+        pages=2, insertions=1, format_changes=1).original
+    assert '1 insert, 1 format' in capsys.readouterr().out
@@ -0,0 +1,91 @@
+import subprocess
+
+import pytest
+
+from python_redlines.cache import RedlineCache
+from python_redlines.engines import DocxodusEngine
+from python_redlines.worker import WorkerEngine
+
+from .fake_engine import FakeEngine, needs_fake_binary
+
+pytestmark = needs_fake_binary
+
+
+def test_worker_reuses_one_process():
+    with WorkerEngine(FakeEngine()) as worker:
+        for i in range(5):
+            redline, stdout, stderr = worker.run_redline('Author', b'original', b'modified %d' % i)
+            assert redline == b'modified %d' % i
+            assert stdout == 'Revisions found: 1\n'
+            assert stderr is None
+        assert worker.spawn_count == 1
+
+
+def test_worker_accepts_paths(tmp_path):
+    original = tmp_path / 'original.docx'
+    modified = tmp_path / 'modified.docx'
+    original.write_bytes(b'same')
+    modified.write_bytes(b'same')
+
+    with WorkerEngine(FakeEngine()) as worker:
+        redline, stdout, _ = worker.run_redline('Author', original, str(modified))
+
+    assert redline == b'same'
+    assert stdout == 'Revisions found: 0\n'
+    # caller-supplied inputs are never cleaned up as if they were temp files
+    assert original.exists() and modified.exists()
+
+
+def test_worker_restarts_after_crash():
+    with WorkerEngine(FakeEngine()) as worker:
+        worker.run_redline('Author', b'a', b'b')
+        with pytest.raises(subprocess.CalledProcessError):
+            worker.run_redline('Author', b'a', b'CRASH')
+
+        redline, _, _ = worker.run_redline('Author', b'a', b'c')
+        assert redline == b'c'
+        assert worker.spawn_count == 2
+
+
+def test_worker_restarts_if_killed_between_jobs():
+    with WorkerEngine(FakeEngine()) as worker:
+        worker.run_redline('Author', b'a', b'b')
+        worker._process.kill()
+        worker._process.wait()
+
+        redline, _, _ = worker.run_redline('Author', b'a', b'c')
+        assert redline == b'c'
+        assert worker.spawn_count == 2
+
+
+def test_worker_close_is_idempotent():
+    worker = WorkerEngine(FakeEngine())
+    worker.run_redline('Author', b'a', b'b')
+    worker.close()
+    worker.close()
+    assert worker._process is None
+
+
+def test_worker_requires_worker_capable_engine():
+    engine = DocxodusEngine.__new__(DocxodusEngine)
+    with pytest.raises(ValueError, match='does not support worker mode'):
+        WorkerEngine(engine)
+
+
+def test_worker_serves_repeats_from_the_engine_cache(tmp_path):
+    with WorkerEngine(FakeEngine(cache=RedlineCache(tmp_path / 'cache'))) as worker:
+        first = worker.run_redline('Author', b'a', b'b')
+        worker.close()
+        again = worker.run_redline('Author', b'a', b'b')
+
+    assert again == first
+    assert worker.spawn_count == 1
+
+
+def test_worker_rejects_per_call_limits_it_cannot_apply():
+    with WorkerEngine(FakeEngine(max_memory=1024 ** 3)) as worker:
+        with pytest.raises(ValueError, match='max_cpu_seconds'):
+            worker.run_redline('Author', b'a', b'b', max_cpu_seconds=10)
+        with pytest.raises(ValueError, match='max_memory'):
+            worker.run_redline('Author', b'a', b'b', max_memory=2 * 1024 ** 3)
+        assert worker.run_redline('Author', b'a', b'b', max_memory=1024 ** 3)[0] == b'b'